@@ -0,0 +1,261 @@
+"""
+Make a hub's transformed model-output files queryable with Amazon Athena.
+
+Hubs opt in by adding an athena section to hubs.yaml:
+
+    - hub: example-hub
+      org: hubverse-org
+      repo: example-hub
+      athena:
+        columns:                       # the hub's task ID columns and their Athena data types
+          reference_date: date
+          target: string
+          horizon: int
+          location: string
+        bytes_scanned_cutoff_mb: 10240 # cancel queries that scan more than this (optional)
+        result_reuse_minutes: 60       # how long clients should reuse query results (optional)
+
+Each hub gets a Glue database with two tables over the model-output/ prefix of its bucket:
+
+- model_output: every transformed file, for queries across models
+- model_output_by_model: the same files, partitioned by model_id with partition projection, so
+  queries that filter on a model (WHERE model_id = '...') only list and read that model's
+  directory. No crawler or MSCK REPAIR TABLE is needed when teams add models or rounds.
+
+and an Athena workgroup that enforces the bytes-scanned limit and writes query results to a
+private bucket shared by all hubs (the hub buckets themselves are public).
+
+Note: transformed files are stored as model-output/<model_id>/<round_id>-<model_id>.parquet,
+so model_id is the only directory-level partition. Rounds are pruned by parquet statistics
+rather than by partition.
+
+Athena workgroups don't have a result reuse setting (clients request it for each query), so
+result_reuse_minutes is published in the hub's athena stack output for clients to use.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field, fields
+
+import pulumi
+import pulumi_aws as aws
+
+ATHENA_RESULTS_BUCKET_NAME = "hubverse-athena-results"
+ATHENA_RESULTS_EXPIRATION_DAYS = 7
+
+# Columns that hubverse-transform writes to every transformed model-output file
+MODEL_OUTPUT_COLUMNS = {
+    "round_id": "string",
+    "output_type": "string",
+    "output_type_id": "string",
+    "value": "double",
+    "model_id": "string",
+}
+
+# Athena's smallest allowed bytes-scanned cutoff is 10 MB
+MIN_BYTES_SCANNED_CUTOFF_MB = 10
+# Athena reuses query results for at most 7 days
+MAX_RESULT_REUSE_MINUTES = 10080
+
+PARQUET_INPUT_FORMAT = "org.apache.hadoop.hive.ql.io.parquet.MapredParquetInputFormat"
+PARQUET_OUTPUT_FORMAT = "org.apache.hadoop.hive.ql.io.parquet.MapredParquetOutputFormat"
+PARQUET_SERDE = "org.apache.hadoop.hive.ql.io.parquet.serde.ParquetHiveSerDe"
+
+
+@dataclass(frozen=True)
+class AthenaSettings:
+    """Settings for a hub's Glue tables and Athena workgroup."""
+
+    columns: dict[str, str] = field(default_factory=dict)
+    bytes_scanned_cutoff_mb: int | None = None
+    result_reuse_minutes: int | None = None
+
+    def __post_init__(self):
+        if not self.columns:
+            raise ValueError("columns must list the hub's task ID columns")
+        if self.bytes_scanned_cutoff_mb is not None and self.bytes_scanned_cutoff_mb < MIN_BYTES_SCANNED_CUTOFF_MB:
+            raise ValueError(f"bytes_scanned_cutoff_mb must be at least {MIN_BYTES_SCANNED_CUTOFF_MB}")
+        if self.result_reuse_minutes is not None and not 1 <= self.result_reuse_minutes <= MAX_RESULT_REUSE_MINUTES:
+            raise ValueError(f"result_reuse_minutes must be between 1 and {MAX_RESULT_REUSE_MINUTES}")
+
+    @property
+    def all_columns(self) -> dict[str, str]:
+        """The hub's task ID columns followed by the standard model-output columns."""
+        return {**self.columns, **{name: typ for name, typ in MODEL_OUTPUT_COLUMNS.items() if name not in self.columns}}
+
+
+def get_athena_settings(hub_info: dict) -> AthenaSettings | None:
+    """Return the Athena settings for a hub, or None if the hub doesn't use Athena."""
+    athena = hub_info.get("athena")
+    if athena is None:
+        return None
+
+    allowed = {settings_field.name for settings_field in fields(AthenaSettings)}
+    unknown = set(athena) - allowed
+    if unknown:
+        raise ValueError(f"{hub_info['hub']}: unknown athena settings: {sorted(unknown)}")
+
+    try:
+        return AthenaSettings(**athena)
+    except ValueError as e:
+        raise ValueError(f"{hub_info['hub']}: {e}") from e
+
+
+def get_database_name(hub_name: str) -> str:
+    """Return the name of a hub's Glue database (Athena doesn't allow dashes in names)."""
+    return f"hubverse_{hub_name.replace('-', '_')}"
+
+
+class AthenaResults:
+    """Create the private bucket for Athena query results the first time a hub needs it."""
+
+    def __init__(self) -> None:
+        self._bucket: aws.s3.BucketV2 | None = None
+
+    @property
+    def bucket(self) -> aws.s3.BucketV2:
+        if self._bucket is None:
+            self._bucket = aws.s3.BucketV2(
+                resource_name=ATHENA_RESULTS_BUCKET_NAME,
+                bucket=ATHENA_RESULTS_BUCKET_NAME,
+                tags={"hub": "hubverse"},
+            )
+            aws.s3.BucketPublicAccessBlock(
+                resource_name=f"{ATHENA_RESULTS_BUCKET_NAME}-public-access-block",
+                bucket=self._bucket.id,
+                block_public_acls=True,
+                ignore_public_acls=True,
+                block_public_policy=True,
+                restrict_public_buckets=True,
+            )
+            # Query results are only useful until clients download them (or reuse them)
+            aws.s3.BucketLifecycleConfigurationV2(
+                resource_name=f"{ATHENA_RESULTS_BUCKET_NAME}-lifecycle",
+                bucket=self._bucket.id,
+                rules=[
+                    {
+                        "id": "expire-query-results",
+                        "status": "Enabled",
+                        "filter": {},
+                        "expiration": {"days": ATHENA_RESULTS_EXPIRATION_DAYS},
+                    }
+                ],
+            )
+        return self._bucket
+
+
+def create_parquet_storage_descriptor(
+    location: str, columns: dict[str, str]
+) -> aws.glue.CatalogTableStorageDescriptorArgs:
+    """Describe the parquet files under location for a Glue table."""
+
+    return aws.glue.CatalogTableStorageDescriptorArgs(
+        location=location,
+        columns=[
+            aws.glue.CatalogTableStorageDescriptorColumnArgs(name=name, type=typ) for name, typ in columns.items()
+        ],
+        input_format=PARQUET_INPUT_FORMAT,
+        output_format=PARQUET_OUTPUT_FORMAT,
+        ser_de_info=aws.glue.CatalogTableStorageDescriptorSerDeInfoArgs(serialization_library=PARQUET_SERDE),
+    )
+
+
+def create_model_output_tables(
+    hub_name: str, database: aws.glue.CatalogDatabase, settings: AthenaSettings, opts: pulumi.ResourceOptions | None
+) -> list[aws.glue.CatalogTable]:
+    """Create the Glue tables over a hub's transformed model-output files."""
+
+    location = f"s3://{hub_name}/model-output/"
+    columns = settings.all_columns
+
+    model_output = aws.glue.CatalogTable(
+        resource_name=f"{hub_name}-model-output-table",
+        name="model_output",
+        database_name=database.name,
+        table_type="EXTERNAL_TABLE",
+        parameters={"classification": "parquet", "EXTERNAL": "TRUE"},
+        storage_descriptor=create_parquet_storage_descriptor(location, columns),
+        opts=opts,
+    )
+
+    # model_id comes from the directory name, so it's a partition key rather than a column
+    model_output_by_model = aws.glue.CatalogTable(
+        resource_name=f"{hub_name}-model-output-by-model-table",
+        name="model_output_by_model",
+        database_name=database.name,
+        table_type="EXTERNAL_TABLE",
+        parameters={
+            "classification": "parquet",
+            "EXTERNAL": "TRUE",
+            "projection.enabled": "true",
+            # model ids aren't known ahead of time, so they come from each query's WHERE clause
+            "projection.model_id.type": "injected",
+            "storage.location.template": f"{location}${{model_id}}/",
+        },
+        partition_keys=[aws.glue.CatalogTablePartitionKeyArgs(name="model_id", type="string")],
+        storage_descriptor=create_parquet_storage_descriptor(
+            location, {name: typ for name, typ in columns.items() if name != "model_id"}
+        ),
+        opts=opts,
+    )
+
+    return [model_output, model_output_by_model]
+
+
+def create_workgroup(
+    hub_name: str,
+    settings: AthenaSettings,
+    results_bucket: aws.s3.BucketV2,
+    opts: pulumi.ResourceOptions | None = None,
+) -> aws.athena.Workgroup:
+    """Create a hub's Athena workgroup."""
+
+    bytes_scanned_cutoff = None
+    if settings.bytes_scanned_cutoff_mb is not None:
+        bytes_scanned_cutoff = settings.bytes_scanned_cutoff_mb * 1024 * 1024
+
+    return aws.athena.Workgroup(
+        resource_name=f"{hub_name}-workgroup",
+        name=hub_name,
+        description=f"Queries of the {hub_name} hub's model-output data",
+        configuration=aws.athena.WorkgroupConfigurationArgs(
+            enforce_workgroup_configuration=True,
+            publish_cloudwatch_metrics_enabled=True,
+            bytes_scanned_cutoff_per_query=bytes_scanned_cutoff,
+            result_configuration=aws.athena.WorkgroupConfigurationResultConfigurationArgs(
+                output_location=results_bucket.bucket.apply(lambda bucket: f"s3://{bucket}/{hub_name}/"),
+                encryption_configuration=aws.athena.WorkgroupConfigurationResultConfigurationEncryptionConfigurationArgs(
+                    encryption_option="SSE_S3"
+                ),
+            ),
+        ),
+        force_destroy=True,
+        tags={"hub": hub_name},
+        opts=opts,
+    )
+
+
+def create_athena_infrastructure(hub_info: dict, opts: pulumi.ResourceOptions | None = None) -> dict | None:
+    """
+    Create a hub's Glue database, tables, and Athena workgroup (if the hub uses Athena), and
+    return the details that clients need to query them.
+    """
+    settings = get_athena_settings(hub_info)
+    if settings is None:
+        return None
+
+    hub_name = hub_info["hub"]
+    database = aws.glue.CatalogDatabase(
+        resource_name=f"{hub_name}-database",
+        name=get_database_name(hub_name),
+        description=f"Model-output data for the {hub_name} hub",
+        opts=opts,
+    )
+    create_model_output_tables(hub_name, database, settings, opts)
+    workgroup = create_workgroup(hub_name, settings, hub_info["athena_results"].bucket, opts)
+
+    return {
+        "database": database.name,
+        "workgroup": workgroup.name,
+        "result_reuse_minutes": settings.result_reuse_minutes,
+    }
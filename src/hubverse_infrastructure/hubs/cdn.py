@@ -0,0 +1,206 @@
+"""
+Put a CloudFront distribution in front of a hub's S3 bucket.
+
+Hub buckets are public, so dashboards and R/Python clients can read them straight from the
+regional S3 endpoint. Hubs with many readers can opt in to a CloudFront distribution in
+hubs.yaml, which serves the bucket from edge caches instead:
+
+    - hub: example-hub
+      org: hubverse-org
+      repo: example-hub
+      cdn: true
+
+Every distribution reads its bucket through origin access control and shares the same cache,
+response headers, and origin access control policies, which are only created if at least one
+hub uses a CDN. Transformed model-output files (under model-output/) are cached for a long time,
+and everything else (hub-config/ and other metadata) for a short time.
+
+CloudFront supports range requests for cached objects, so parquet readers that fetch a file's
+footer and individual row groups work without changes. CSV and JSON responses are compressed
+(parquet is already compressed, so CloudFront leaves it alone).
+
+Note: a hub that resubmits a model-output file under the same name may be served the old file
+for up to TRANSFORMED_DATA_DEFAULT_TTL seconds unless the distribution is invalidated.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import pulumi
+import pulumi_aws as aws
+
+CDN_POLICY_PREFIX = "hubverse-cdn"
+
+# Transformed model-output files only change when a team resubmits them
+TRANSFORMED_DATA_PATH_PATTERN = "model-output/*"
+TRANSFORMED_DATA_DEFAULT_TTL = 86400
+TRANSFORMED_DATA_MAX_TTL = 31536000
+
+# Hub config and other metadata can change at any time
+METADATA_DEFAULT_TTL = 60
+METADATA_MAX_TTL = 300
+
+# Response headers that browser clients need to read partial (range request) responses
+CORS_EXPOSE_HEADERS = ["Accept-Ranges", "Content-Length", "Content-Range", "ETag"]
+
+
+def get_cdn_enabled(hub_info: dict) -> bool:
+    """Return True if a hub opted in to a CloudFront distribution."""
+    cdn = hub_info.get("cdn", False)
+    if not isinstance(cdn, bool):
+        raise ValueError(f"{hub_info['hub']}: cdn must be true or false, got '{cdn}'")
+    return cdn
+
+
+def create_cache_policy(name: str, default_ttl: int, max_ttl: int) -> aws.cloudfront.CachePolicy:
+    """
+    Create a cache policy that caches objects by path only (query strings, headers, and cookies
+    don't change what S3 returns) and stores compressed variants so CSV and JSON can be served
+    compressed.
+    """
+
+    return aws.cloudfront.CachePolicy(
+        resource_name=name,
+        name=name,
+        default_ttl=default_ttl,
+        max_ttl=max_ttl,
+        min_ttl=0,
+        parameters_in_cache_key_and_forwarded_to_origin={
+            "cookies_config": {"cookie_behavior": "none"},
+            "headers_config": {"header_behavior": "none"},
+            "query_strings_config": {"query_string_behavior": "none"},
+            "enable_accept_encoding_gzip": True,
+            "enable_accept_encoding_brotli": True,
+        },
+    )
+
+
+class CdnPolicies:
+    """
+    Create the CloudFront policies that every hub distribution shares, the first time a hub
+    needs them.
+    """
+
+    def __init__(self) -> None:
+        self._origin_access_control: aws.cloudfront.OriginAccessControl | None = None
+        self._transformed_data_cache_policy: aws.cloudfront.CachePolicy | None = None
+        self._metadata_cache_policy: aws.cloudfront.CachePolicy | None = None
+        self._response_headers_policy: aws.cloudfront.ResponseHeadersPolicy | None = None
+
+    @property
+    def origin_access_control(self) -> aws.cloudfront.OriginAccessControl:
+        if self._origin_access_control is None:
+            self._origin_access_control = aws.cloudfront.OriginAccessControl(
+                resource_name=f"{CDN_POLICY_PREFIX}-origin-access-control",
+                name=f"{CDN_POLICY_PREFIX}-origin-access-control",
+                description="Signs CloudFront requests to Hubverse hub buckets",
+                origin_access_control_origin_type="s3",
+                signing_behavior="always",
+                signing_protocol="sigv4",
+            )
+        return self._origin_access_control
+
+    @property
+    def transformed_data_cache_policy(self) -> aws.cloudfront.CachePolicy:
+        if self._transformed_data_cache_policy is None:
+            self._transformed_data_cache_policy = create_cache_policy(
+                f"{CDN_POLICY_PREFIX}-transformed-data", TRANSFORMED_DATA_DEFAULT_TTL, TRANSFORMED_DATA_MAX_TTL
+            )
+        return self._transformed_data_cache_policy
+
+    @property
+    def metadata_cache_policy(self) -> aws.cloudfront.CachePolicy:
+        if self._metadata_cache_policy is None:
+            self._metadata_cache_policy = create_cache_policy(
+                f"{CDN_POLICY_PREFIX}-metadata", METADATA_DEFAULT_TTL, METADATA_MAX_TTL
+            )
+        return self._metadata_cache_policy
+
+    @property
+    def response_headers_policy(self) -> aws.cloudfront.ResponseHeadersPolicy:
+        # CloudFront answers CORS requests itself (matching the hub buckets' CORS rule), so the
+        # Origin header doesn't need to be part of the cache key
+        if self._response_headers_policy is None:
+            self._response_headers_policy = aws.cloudfront.ResponseHeadersPolicy(
+                resource_name=f"{CDN_POLICY_PREFIX}-cors",
+                name=f"{CDN_POLICY_PREFIX}-cors",
+                cors_config={
+                    "access_control_allow_credentials": False,
+                    "access_control_allow_headers": {"items": ["*"]},
+                    "access_control_allow_methods": {"items": ["GET", "HEAD", "OPTIONS"]},
+                    "access_control_allow_origins": {"items": ["*"]},
+                    "access_control_expose_headers": {"items": CORS_EXPOSE_HEADERS},
+                    "access_control_max_age_sec": 3000,
+                    "origin_override": True,
+                },
+            )
+        return self._response_headers_policy
+
+
+def get_cache_behavior_settings(
+    hub_name: str, cache_policy: aws.cloudfront.CachePolicy, cdn_policies: CdnPolicies
+) -> dict[str, Any]:
+    """Return the settings shared by all of a hub distribution's cache behaviors."""
+
+    return {
+        "target_origin_id": hub_name,
+        "viewer_protocol_policy": "redirect-to-https",
+        "allowed_methods": ["GET", "HEAD", "OPTIONS"],
+        "cached_methods": ["GET", "HEAD"],
+        "compress": True,
+        "cache_policy_id": cache_policy.id,
+        "response_headers_policy_id": cdn_policies.response_headers_policy.id,
+    }
+
+
+def create_distribution(
+    hub_name: str,
+    hub_bucket: aws.s3.Bucket,
+    cdn_policies: CdnPolicies,
+    opts: pulumi.ResourceOptions | None = None,
+) -> aws.cloudfront.Distribution:
+    """Create a CloudFront distribution that serves a hub's bucket."""
+
+    metadata_settings = get_cache_behavior_settings(hub_name, cdn_policies.metadata_cache_policy, cdn_policies)
+    transformed_data_settings = get_cache_behavior_settings(
+        hub_name, cdn_policies.transformed_data_cache_policy, cdn_policies
+    )
+
+    return aws.cloudfront.Distribution(
+        resource_name=f"{hub_name}-cdn",
+        comment=f"Serves the {hub_name} hub bucket",
+        enabled=True,
+        is_ipv6_enabled=True,
+        http_version="http2and3",
+        # edge locations in North America and Europe
+        price_class="PriceClass_100",
+        origins=[
+            aws.cloudfront.DistributionOriginArgs(
+                origin_id=hub_name,
+                domain_name=hub_bucket.bucket_regional_domain_name,
+                origin_access_control_id=cdn_policies.origin_access_control.id,
+            )
+        ],
+        default_cache_behavior=aws.cloudfront.DistributionDefaultCacheBehaviorArgs(**metadata_settings),
+        ordered_cache_behaviors=[
+            aws.cloudfront.DistributionOrderedCacheBehaviorArgs(
+                path_pattern=TRANSFORMED_DATA_PATH_PATTERN, **transformed_data_settings
+            )
+        ],
+        restrictions=aws.cloudfront.DistributionRestrictionsArgs(
+            geo_restriction=aws.cloudfront.DistributionRestrictionsGeoRestrictionArgs(restriction_type="none")
+        ),
+        viewer_certificate=aws.cloudfront.DistributionViewerCertificateArgs(cloudfront_default_certificate=True),
+        tags={"hub": hub_name},
+        opts=opts,
+    )
+
+
+def create_cdn_infrastructure(
+    hub_info: dict, hub_bucket: aws.s3.Bucket, opts: pulumi.ResourceOptions | None = None
+) -> aws.cloudfront.Distribution | None:
+    """Create a hub's CloudFront distribution (None if the hub doesn't use a CDN)."""
+    if not get_cdn_enabled(hub_info):
+        return None
+    return create_distribution(hub_info["hub"], hub_bucket, hub_info["cdn_policies"], opts)
@@ -0,0 +1,135 @@
+"""
+Choose which of a hub bucket's S3 events reach the model-output transform Lambda.
+
+By default, every object created or removed under raw/ sends an event to the transform trigger
+(the Lambda itself or the hub's queue), including files that aren't model output. Hubs can limit
+the events in hubs.yaml:
+
+    - hub: example-hub
+      org: hubverse-org
+      repo: example-hub
+      event_filters:
+        filters:                       # prefix/suffix pairs (any object that matches one is sent)
+          - prefix: raw/model-output/
+            suffix: .csv
+          - prefix: raw/model-output/
+            suffix: .parquet
+        create: true                   # send s3:ObjectCreated:* events (the default)
+        remove: true                   # send s3:ObjectRemoved:* events (the default)
+        remove_route: shared_queue     # batch remove events in the shared transform queue
+
+Remove events only delete transformed files, so they don't need to be handled right away. With
+remove_route: shared_queue, they're sent to the shared transform queue of the hub's compute
+profile, which invokes the Lambda with batches of events instead of once per removed file (the
+default, remove_route: transform, sends them to the same place as create events).
+
+S3 rejects notification configurations whose filters overlap for the same event type, so no two
+filters can have overlapping prefixes and overlapping suffixes.
+
+Event filters don't apply to hubs with the eventbridge transform_trigger, because their events
+are filtered by the EventBridge rule that all of those hubs share.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+
+CREATE_EVENTS = "s3:ObjectCreated:*"
+REMOVE_EVENTS = "s3:ObjectRemoved:*"
+
+# The prefix that the transform Lambda reads from
+RAW_PREFIX = "raw/"
+
+REMOVE_ROUTES = ("transform", "shared_queue")
+
+
+@dataclass(frozen=True)
+class EventFilter:
+    """The object keys (a prefix and an optional suffix) whose events are sent."""
+
+    prefix: str = RAW_PREFIX
+    suffix: str | None = None
+
+    def __post_init__(self):
+        if not isinstance(self.prefix, str) or not self.prefix.startswith(RAW_PREFIX):
+            raise ValueError(f"filter prefixes must start with {RAW_PREFIX}, got '{self.prefix}'")
+        if self.suffix is not None and (not isinstance(self.suffix, str) or not self.suffix):
+            raise ValueError(f"filter suffixes must be non-empty strings, got '{self.suffix}'")
+
+    def overlaps(self, other: EventFilter) -> bool:
+        """Return True if an object key could match both filters (which S3 doesn't allow)."""
+        prefixes_overlap = self.prefix.startswith(other.prefix) or other.prefix.startswith(self.prefix)
+        suffix, other_suffix = self.suffix or "", other.suffix or ""
+        suffixes_overlap = suffix.endswith(other_suffix) or other_suffix.endswith(suffix)
+        return prefixes_overlap and suffixes_overlap
+
+
+@dataclass(frozen=True)
+class EventFilterSettings:
+    """A hub's event filters."""
+
+    filters: tuple[EventFilter, ...] = (EventFilter(),)
+    create: bool = True
+    remove: bool = True
+    remove_route: str = "transform"
+
+    def __post_init__(self):
+        if not self.filters:
+            raise ValueError("filters must list at least one prefix")
+        for i, event_filter in enumerate(self.filters):
+            for other in self.filters[i + 1 :]:
+                if event_filter.overlaps(other):
+                    raise ValueError(f"filters overlap: {event_filter} and {other}")
+        if not isinstance(self.create, bool) or not isinstance(self.remove, bool):
+            raise ValueError("create and remove must be true or false")
+        if not (self.create or self.remove):
+            raise ValueError("at least one of create and remove must be true")
+        if self.remove_route not in REMOVE_ROUTES:
+            raise ValueError(f"remove_route must be one of {list(REMOVE_ROUTES)}, got '{self.remove_route}'")
+
+    @property
+    def transform_events(self) -> list[str]:
+        """The events sent to the hub's transform trigger."""
+        events = [CREATE_EVENTS] if self.create else []
+        if self.remove and not self.queues_removes:
+            events.append(REMOVE_EVENTS)
+        return events
+
+    @property
+    def queues_removes(self) -> bool:
+        """Whether remove events are sent to the shared transform queue."""
+        return self.remove and self.remove_route == "shared_queue"
+
+
+def get_event_filter_settings(hub_info: dict) -> EventFilterSettings:
+    """Return a hub's event filters (the defaults if it doesn't set any)."""
+    hub = hub_info["hub"]
+    settings = dict(hub_info.get("event_filters") or {})
+    if not settings:
+        return EventFilterSettings()
+    if (hub_info.get("transform_trigger") or {}).get("type") == "eventbridge":
+        raise ValueError(f"{hub}: event_filters can't be used with the eventbridge transform_trigger")
+
+    allowed = {field.name for field in fields(EventFilterSettings)}
+    unknown = set(settings) - allowed
+    if unknown:
+        raise ValueError(f"{hub}: unknown event_filters settings: {sorted(unknown)}")
+
+    try:
+        if "filters" in settings:
+            filter_list = settings["filters"]
+            if not isinstance(filter_list, list) or not all(isinstance(item, dict) for item in filter_list):
+                raise ValueError("filters must be a list of prefix/suffix pairs")
+            for item in filter_list:
+                unknown = set(item) - {"prefix", "suffix"}
+                if unknown:
+                    raise ValueError(f"unknown filter settings: {sorted(unknown)}")
+            settings["filters"] = tuple(EventFilter(**item) for item in filter_list)
+        return EventFilterSettings(**settings)
+    except ValueError as e:
+        raise ValueError(f"{hub}: {e}") from e
+
+
+def get_shared_queue_hub_info(hub_info: dict) -> dict:
+    """Return a hub's info with the shared queue trigger (to get the queue that its removes are sent to)."""
+    return {**hub_info, "transform_trigger": {"type": "queue", "shared": True}}
@@ -1,10 +1,64 @@
 """Code needed to provision AWS resources for a new hub."""
 
+from typing import Any
+
+import pulumi
+
+from hubverse_infrastructure.hubs.athena import create_athena_infrastructure
 from hubverse_infrastructure.hubs.iam import create_iam_infrastructure
+from hubverse_infrastructure.hubs.replication import create_replication_infrastructure
 from hubverse_infrastructure.hubs.s3 import create_s3_infrastructure
+from hubverse_infrastructure.shared.compaction import create_compaction_schedule
+
+HUB_COMPONENT_TYPE = "hubverse:hubs:HubverseHub"
+
+
+class HubverseHub(pulumi.ComponentResource):
+    """
+    A Pulumi component that groups all of a hub's AWS resources.
+
+    Every hub-specific resource is a child of this component, so a single hub's
+    resources can be previewed or updated on their own with
+    `pulumi up --target <hub urn> --target-dependents`.
+    """
+
+    def __init__(self, hub_info: dict, opts: pulumi.ResourceOptions | None = None):
+        hub_name = hub_info["hub"]
+        super().__init__(HUB_COMPONENT_TYPE, hub_name, None, opts)
+
+        # Hub resources were originally created at the top level of the stack. The alias
+        # lets Pulumi match them to their new location under this component instead of
+        # replacing them.
+        child_opts = pulumi.ResourceOptions(parent=self, aliases=[pulumi.Alias(parent=pulumi.ROOT_STACK_RESOURCE)])
+
+        instrumentation = hub_info["instrumentation"]
+        with instrumentation.phase("hub.s3", hub=hub_name):
+            self.hub_bucket = create_s3_infrastructure(hub_info, child_opts)
+        hub_info["hub_bucket"] = self.hub_bucket
+        self.cdn_distribution = hub_info["cdn_distribution"]
+        with instrumentation.phase("hub.replication", hub=hub_name):
+            self.replicas = create_replication_infrastructure(hub_info, self.hub_bucket, child_opts)
+        with instrumentation.phase("hub.athena", hub=hub_name):
+            self.athena = create_athena_infrastructure(hub_info, child_opts)
+        with instrumentation.phase("hub.iam", hub=hub_name):
+            create_iam_infrastructure(hub_info, child_opts)
+        with instrumentation.phase("hub.compaction", hub=hub_name):
+            create_compaction_schedule(hub_info, child_opts)
 
+        outputs: dict[str, Any] = {"hub_bucket": self.hub_bucket.id}
+        if self.cdn_distribution is not None:
+            outputs["cdn_hostname"] = self.cdn_distribution.domain_name
+            pulumi.export(f"{hub_name}-cdn-hostname", self.cdn_distribution.domain_name)
+        if self.athena is not None:
+            outputs["athena"] = self.athena
+            pulumi.export(f"{hub_name}-athena", self.athena)
+        if self.replicas is not None:
+            outputs["replicas"] = self.replicas
+            pulumi.export(f"{hub_name}-replicas", self.replicas)
+        self.register_outputs(outputs)
 
-def set_up_hub(hub_info: dict):
+
+def set_up_hub(hub_info: dict) -> HubverseHub:
     """
     Create all AWS instrastructure needed for a Hubverse hub.
     For simplicity, this demo uses the hub name as the bucket name,
@@ -12,6 +66,9 @@ def set_up_hub(hub_info: dict):
     a different bucket name.
     """
 
-    hub_bucket = create_s3_infrastructure(hub_info)
-    hub_info["hub_bucket"] = hub_bucket
-    create_iam_infrastructure(hub_info)
+    return HubverseHub(hub_info)
+
+
+def get_hub_urn(hub_name: str, stack: str = "hubverse", project: str = "hubverse-aws") -> str:
+    """Return the URN of a hub's HubverseHub component (the value to pass to `pulumi up --target`)."""
+    return f"urn:pulumi:{stack}::{project}::{HUB_COMPONENT_TYPE}::{hub_name}"
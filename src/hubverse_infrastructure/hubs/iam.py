@@ -1,36 +1,47 @@
+from __future__ import annotations
+
 import pulumi
 import pulumi_aws as aws
 
+from hubverse_infrastructure.hubs.event_filters import (
+    REMOVE_EVENTS,
+    EventFilterSettings,
+    get_event_filter_settings,
+    get_shared_queue_hub_info,
+)
+from hubverse_infrastructure.shared.compute_profiles import TransformFunction
+from hubverse_infrastructure.shared.policy_document import Condition, PolicyDocument, Principal, Statement
+from hubverse_infrastructure.shared.transform_queue import TransformQueue, get_queue_settings
 
-def create_trust_policy(org: str, repo: str):
-    """Create the trust policy that will used with the IAM role for Github Actions."""
+TRIGGER_TYPES = ("lambda", "queue", "eventbridge")
 
-    # retrieve information about the hubverse account's OIDC github provider
-    oidc_github = aws.iam.get_open_id_connect_provider(url="https://token.actions.githubusercontent.com")
+
+def create_trust_policy(org: str, repo: str, oidc_github: aws.iam.GetOpenIdConnectProviderResult):
+    """Create the trust policy that will used with the IAM role for Github Actions."""
 
     # Create the policy that defines who will be allowed to assume
     # a role using the OIDC provider we create for GitHub Actions.
     # The conditions specify that only Github can assume the role.
     # Furthermore, the role can only be assumed from the hub's repo,
     # and only from the main branch.
-    github_policy_document = aws.iam.get_policy_document(
+    github_policy_document = PolicyDocument(
         statements=[
-            aws.iam.GetPolicyDocumentStatementArgs(
+            Statement(
                 actions=["sts:AssumeRoleWithWebIdentity"],
                 principals=[
-                    aws.iam.GetPolicyDocumentStatementPrincipalArgs(
+                    Principal(
                         type="Federated",
                         # identifiers=[f"arn:aws:iam::{aws.get_caller_identity().account_id}:oidc-provider/token.actions.githubusercontent.com"]
                         identifiers=[oidc_github.arn],
                     )
                 ],
                 conditions=[
-                    aws.iam.GetPolicyDocumentStatementConditionArgs(
+                    Condition(
                         test="StringEquals",
                         variable=f"{oidc_github.url}:aud",
                         values=["sts.amazonaws.com"],
                     ),
-                    aws.iam.GetPolicyDocumentStatementConditionArgs(
+                    Condition(
                         test="StringEquals",
                         variable=f"{oidc_github.url}:sub",
                         values=[f"repo:{org}/{repo}:ref:refs/heads/main"],
@@ -43,7 +54,7 @@ def create_trust_policy(org: str, repo: str):
     return github_policy_document.json
 
 
-def create_github_role(hub_name: str, policy_document):
+def create_github_role(hub_name: str, policy_document, opts: pulumi.ResourceOptions | None = None):
     """Create the IAM role that will be assumed by Github Actions."""
 
     github_role = aws.iam.Role(
@@ -52,24 +63,24 @@ def create_github_role(hub_name: str, policy_document):
         description="The role assumed by CI/CD for writing data to S3.",
         tags={"hub": hub_name},
         assume_role_policy=policy_document,
+        opts=opts,
     )
 
     return github_role
 
 
-def create_bucket_write_policy(hub_name: str):
-    # Create a policy that allows put operations to the hub's
-    # S3 bucket. This will then be attached to the IAM role that
-    # GitHub actions assumes.
-    s3_write_policy = aws.iam.get_policy_document(
+def create_bucket_write_policy_document(hub_name: str) -> PolicyDocument:
+    """Create the policy document that allows writes to the hub's S3 bucket."""
+
+    return PolicyDocument(
         statements=[
-            aws.iam.GetPolicyDocumentStatementArgs(
+            Statement(
                 actions=[
                     "s3:ListBucket",
                 ],
                 resources=[f"arn:aws:s3:::{hub_name}"],
             ),
-            aws.iam.GetPolicyDocumentStatementArgs(
+            Statement(
                 actions=[
                     "s3:PutObject",
                     "s3:PutObjectAcl",
@@ -82,6 +93,13 @@ def create_bucket_write_policy(hub_name: str):
         ]
     )
 
+
+def create_bucket_write_policy(hub_name: str, opts: pulumi.ResourceOptions | None = None):
+    # Create a policy that allows put operations to the hub's
+    # S3 bucket. This will then be attached to the IAM role that
+    # GitHub actions assumes.
+    s3_write_policy = create_bucket_write_policy_document(hub_name)
+
     bucket_write_policy_name = f"{hub_name}-write-bucket-policy"
     bucket_write_policy = aws.iam.Policy(
         name=bucket_write_policy_name,
@@ -89,50 +107,178 @@ def create_bucket_write_policy(hub_name: str):
         description=f"Policy attached to {hub_name} role. It allows writing to the {hub_name} S3 bucket",
         policy=s3_write_policy.json,
         tags={"hub": hub_name},
+        opts=opts,
     )
 
     return bucket_write_policy
 
 
-def attach_bucket_write_policy(resource_name: str, role: aws.iam.Role, bucket_write_policy: aws.iam.Policy):
+def attach_bucket_write_policy(
+    resource_name: str,
+    role: aws.iam.Role,
+    bucket_write_policy: aws.iam.Policy,
+    opts: pulumi.ResourceOptions | None = None,
+):
     """Attach the S3 write policy to the role that Github Actions assumes."""
 
     # Update the role we created for Github Actions by attaching the
     # policy that allows writes to the hub's S3 bucket
-    aws.iam.RolePolicyAttachment(resource_name=resource_name, role=role.name, policy_arn=bucket_write_policy.id)
+    aws.iam.RolePolicyAttachment(
+        resource_name=resource_name, role=role.name, policy_arn=bucket_write_policy.id, opts=opts
+    )
+
+
+def create_notification_queues(
+    hub_name: str,
+    event_filters: EventFilterSettings,
+    transform_queue: TransformQueue | None,
+    remove_queue: TransformQueue | None,
+) -> list[aws.s3.BucketNotificationQueueArgs]:
+    """
+    Create the bucket notification's queue configurations: the hub's transform queue (if it uses
+    one), and the shared queue that batches remove events (if the hub's filters send them there).
+    """
+
+    queues: list[aws.s3.BucketNotificationQueueArgs] = []
+    if transform_queue is not None and event_filters.transform_events:
+        queues.extend(
+            aws.s3.BucketNotificationQueueArgs(
+                id=get_notification_id(hub_name, i),
+                queue_arn=transform_queue.queue.arn,
+                events=event_filters.transform_events,
+                filter_prefix=event_filter.prefix,
+                filter_suffix=event_filter.suffix,
+            )
+            for i, event_filter in enumerate(event_filters.filters)
+        )
+    if remove_queue is not None:
+        queues.extend(
+            aws.s3.BucketNotificationQueueArgs(
+                id=f"{hub_name}-remove-notification-args-{i}",
+                queue_arn=remove_queue.queue.arn,
+                events=[REMOVE_EVENTS],
+                filter_prefix=event_filter.prefix,
+                filter_suffix=event_filter.suffix,
+            )
+            for i, event_filter in enumerate(event_filters.filters)
+        )
+    return queues
+
+
+def get_notification_id(hub_name: str, index: int) -> str:
+    """Return the id of one of a hub's notification configurations (the first keeps its original id)."""
+    return f"{hub_name}-notification-args" if index == 0 else f"{hub_name}-notification-args-{index}"
+
+
+def get_queue_policies(*transform_queues: TransformQueue | None) -> list[aws.sqs.QueuePolicy]:
+    """Return the policies of the queues that a notification sends events to (that this stack created)."""
+    return [queue.policy for queue in transform_queues if queue is not None and queue.policy is not None]
 
 
 def create_model_output_lambda_trigger(
-    hub_name: str, hub_bucket: aws.s3.Bucket, model_output_lambda: aws.lambda_.Function
+    hub_name: str,
+    hub_bucket: aws.s3.Bucket,
+    model_output_lambda: TransformFunction,
+    event_filters: EventFilterSettings | None = None,
+    remove_queue: TransformQueue | None = None,
+    opts: pulumi.ResourceOptions | None = None,
 ) -> aws.s3.BucketNotification:
     """Create the trigger that will invoke the model output lambda when a new file is written to the hub's S3 bucket."""
 
-    allow_bucket = aws.lambda_.Permission(
-        resource_name=f"{hub_name}-allow",
-        action="lambda:InvokeFunction",
-        function=model_output_lambda.arn.apply(lambda arn: f"{arn}"),
-        principal="s3.amazonaws.com",
-        source_arn=hub_bucket.arn.apply(lambda arn: f"{arn}"),
+    event_filters = event_filters or EventFilterSettings()
+    depends_on: list[pulumi.Resource] = [*get_queue_policies(remove_queue)]
+    lambda_functions = []
+    if event_filters.transform_events:
+        allow_bucket = aws.lambda_.Permission(
+            resource_name=f"{hub_name}-allow",
+            action="lambda:InvokeFunction",
+            function=model_output_lambda.arn.apply(lambda arn: f"{arn}"),
+            principal="s3.amazonaws.com",
+            source_arn=hub_bucket.arn.apply(lambda arn: f"{arn}"),
+            opts=opts,
+        )
+        depends_on.append(allow_bucket)
+        lambda_functions = [
+            aws.s3.BucketNotificationLambdaFunctionArgs(
+                id=get_notification_id(hub_name, i),
+                lambda_function_arn=model_output_lambda.arn.apply(lambda arn: f"{arn}"),
+                events=event_filters.transform_events,
+                filter_prefix=event_filter.prefix,
+                filter_suffix=event_filter.suffix,
+            )
+            for i, event_filter in enumerate(event_filters.filters)
+        ]
+
+    bucket_notification = aws.s3.BucketNotification(
+        resource_name=f"{hub_name}-create-notification",
+        bucket=hub_bucket.id,
+        lambda_functions=lambda_functions,
+        queues=create_notification_queues(hub_name, event_filters, None, remove_queue) or None,
+        opts=pulumi.ResourceOptions.merge(opts, pulumi.ResourceOptions(depends_on=depends_on)),
     )
 
+    return bucket_notification
+
+
+def create_model_output_queue_trigger(
+    hub_name: str,
+    hub_bucket: aws.s3.Bucket,
+    transform_queue: TransformQueue,
+    event_filters: EventFilterSettings | None = None,
+    remove_queue: TransformQueue | None = None,
+    opts: pulumi.ResourceOptions | None = None,
+) -> aws.s3.BucketNotification:
+    """Create the trigger that sends new files in the hub's S3 bucket to a queue drained by the model output lambda."""
+
+    event_filters = event_filters or EventFilterSettings()
     bucket_notification = aws.s3.BucketNotification(
         resource_name=f"{hub_name}-create-notification",
         bucket=hub_bucket.id,
-        lambda_functions=[
-            aws.s3.BucketNotificationLambdaFunctionArgs(
-                id=f"{hub_name}-notification-args",
-                lambda_function_arn=model_output_lambda.arn.apply(lambda arn: f"{arn}"),
-                events=["s3:ObjectCreated:*", "s3:ObjectRemoved:*"],
-                filter_prefix="raw/",
-            )
-        ],
-        opts=pulumi.ResourceOptions(depends_on=[allow_bucket]),
+        queues=create_notification_queues(hub_name, event_filters, transform_queue, remove_queue),
+        # S3 checks that it can send messages to the queue when the notification is created
+        opts=pulumi.ResourceOptions.merge(
+            opts, pulumi.ResourceOptions(depends_on=get_queue_policies(transform_queue, remove_queue))
+        ),
+    )
+
+    return bucket_notification
+
+
+def create_model_output_eventbridge_trigger(
+    hub_name: str,
+    hub_bucket: aws.s3.Bucket,
+    opts: pulumi.ResourceOptions | None = None,
+) -> aws.s3.BucketNotification:
+    """
+    Send the hub's S3 events to EventBridge, where the shared transform rule forwards raw/ events
+    to the model output lambda.
+    """
+
+    bucket_notification = aws.s3.BucketNotification(
+        resource_name=f"{hub_name}-create-notification",
+        bucket=hub_bucket.id,
+        eventbridge=True,
+        opts=opts,
     )
 
     return bucket_notification
 
 
-def create_iam_infrastructure(hub_info: dict):
+def get_trigger_type(hub_info: dict) -> str:
+    """Return a hub's transform_trigger type (lambda by default), after validating the trigger's settings."""
+    hub = hub_info["hub"]
+    transform_trigger = hub_info.get("transform_trigger") or {}
+    trigger_type = transform_trigger.get("type", "lambda")
+    if trigger_type not in TRIGGER_TYPES:
+        raise ValueError(f"{hub}: unknown transform_trigger type '{trigger_type}'")
+    if trigger_type == "queue":
+        get_queue_settings(hub_info)
+    elif set(transform_trigger) - {"type"}:
+        raise ValueError(f"{hub}: the {trigger_type} transform_trigger does not accept other settings")
+    return trigger_type
+
+
+def create_iam_infrastructure(hub_info: dict, opts: pulumi.ResourceOptions | None = None):
     """Create the IAM infrastructure needed for a hub."""
     org = hub_info["org"]
     repo = hub_info["repo"]
@@ -140,10 +286,31 @@ def create_iam_infrastructure(hub_info: dict):
     hub_bucket = hub_info["hub_bucket"]
     model_output_lambda = hub_info["model_output_lambda"]
     model_output_lambda_role = hub_info["model_output_lambda_role"]
+    transform_permissions = hub_info["transform_permissions"]
+    account_context = hub_info["account_context"]
+    transform_queues = hub_info["transform_queues"]
+    transform_event_rules = hub_info["transform_event_rules"]
+
+    trust_policy = create_trust_policy(org, repo, account_context.oidc_github)
+    github_role = create_github_role(hub, trust_policy, opts)
+    s3_write_policy = create_bucket_write_policy(hub, opts)
+    attach_bucket_write_policy(hub, github_role, s3_write_policy, opts)
+    if transform_permissions == "per-hub":
+        attach_bucket_write_policy(
+            f"{hub}-transform-model-output-lambda", model_output_lambda_role, s3_write_policy, opts
+        )
 
-    trust_policy = create_trust_policy(org, repo)
-    github_role = create_github_role(hub, trust_policy)
-    s3_write_policy = create_bucket_write_policy(hub)
-    attach_bucket_write_policy(hub, github_role, s3_write_policy)
-    attach_bucket_write_policy(f"{hub}-transform-model-output-lambda", model_output_lambda_role, s3_write_policy)
-    create_model_output_lambda_trigger(hub, hub_bucket, model_output_lambda)
+    trigger_type = get_trigger_type(hub_info)
+    event_filters = get_event_filter_settings(hub_info)
+    remove_queue = None
+    if event_filters.queues_removes:
+        remove_queue = transform_queues.get_queue(get_shared_queue_hub_info(hub_info))
+    if trigger_type == "lambda":
+        create_model_output_lambda_trigger(hub, hub_bucket, model_output_lambda, event_filters, remove_queue, opts)
+    elif trigger_type == "queue":
+        transform_queue = transform_queues.get_queue(hub_info, opts)
+        create_model_output_queue_trigger(hub, hub_bucket, transform_queue, event_filters, remove_queue, opts)
+    else:
+        # Make sure the shared rule that forwards the hub's events to the lambda exists
+        transform_event_rules.get_rule(hub_info)
+        create_model_output_eventbridge_trigger(hub, hub_bucket, opts)
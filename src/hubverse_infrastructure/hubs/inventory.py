@@ -0,0 +1,139 @@
+"""
+Publish a daily S3 Inventory of a hub's transformed model-output files.
+
+Hub buckets are public, and hub tooling finds model-output files by listing the bucket, which
+takes a ListObjectsV2 request for every 1,000 keys. Hubs can opt in to an S3 Inventory in
+hubs.yaml:
+
+    - hub: example-hub
+      org: hubverse-org
+      repo: example-hub
+      inventory:
+        prefix: model-output/    # the objects to include (default: model-output/)
+
+S3 delivers the inventory once a day, as Parquet files, to the bucket's inventory/ prefix (the
+bucket policy lets S3 write there, and the files are public like the rest of the bucket).
+Each delivery has a manifest.json that lists its data files:
+
+    inventory/<hub>/model-output/2024-10-05T01-00Z/manifest.json
+    inventory/<hub>/model-output/data/<uuid>.parquet
+
+S3 doesn't say which delivery is the latest, so a shared Lambda (see
+shared/inventory_index_handler.py) points inventory/index.json at the latest delivery. Clients
+read that one object, then the Parquet files it lists, instead of listing the bucket. Deliveries
+(but not the index) expire after INVENTORY_EXPIRATION_DAYS.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+
+import pulumi
+import pulumi_aws as aws
+
+from hubverse_infrastructure.shared.inventory_index_handler import INVENTORY_NAME, INVENTORY_PREFIX
+from hubverse_infrastructure.shared.policy_document import Condition, Principal, Statement
+
+INVENTORY_EXPIRATION_DAYS = 14
+
+# The object details included in the inventory (the key is always included)
+INVENTORY_FIELDS = ["Size", "LastModifiedDate", "ETag"]
+
+
+@dataclass(frozen=True)
+class InventorySettings:
+    """The objects included in a hub's inventory."""
+
+    prefix: str = "model-output/"
+
+    def __post_init__(self):
+        if not isinstance(self.prefix, str) or not self.prefix.endswith("/"):
+            raise ValueError(f"prefix must be a directory (ending in /), got '{self.prefix}'")
+        if self.prefix.startswith(INVENTORY_PREFIX):
+            raise ValueError(f"prefix can't be inside {INVENTORY_PREFIX}")
+
+
+def get_inventory_settings(hub_info: dict) -> InventorySettings | None:
+    """Return a hub's inventory settings, or None if the hub doesn't use an inventory."""
+    inventory = hub_info.get("inventory")
+    if inventory is None:
+        return None
+
+    allowed = {settings_field.name for settings_field in fields(InventorySettings)}
+    unknown = set(inventory) - allowed
+    if unknown:
+        raise ValueError(f"{hub_info['hub']}: unknown inventory settings: {sorted(unknown)}")
+
+    try:
+        return InventorySettings(**inventory)
+    except ValueError as e:
+        raise ValueError(f"{hub_info['hub']}: {e}") from e
+
+
+def get_inventory_buckets(hub_list: list[dict]) -> list[str]:
+    """Return the buckets of hubs that use an inventory."""
+    return [hub_info["hub"] for hub_info in hub_list if get_inventory_settings(hub_info) is not None]
+
+
+def create_inventory_delivery_statement(bucket_name: str, source_account: str) -> Statement:
+    """Create the bucket policy statement that lets S3 deliver a bucket's inventory to its inventory/ prefix."""
+
+    return Statement(
+        sid="AllowInventoryDelivery",
+        actions=[
+            "s3:PutObject",
+        ],
+        principals=[Principal(type="Service", identifiers=["s3.amazonaws.com"])],
+        resources=[f"arn:aws:s3:::{bucket_name}/{INVENTORY_PREFIX}*"],
+        conditions=[
+            Condition(test="StringEquals", variable="aws:SourceAccount", values=[source_account]),
+            Condition(test="ArnLike", variable="aws:SourceArn", values=[f"arn:aws:s3:::{bucket_name}"]),
+            Condition(test="StringEquals", variable="s3:x-amz-acl", values=["bucket-owner-full-control"]),
+        ],
+    )
+
+
+def create_inventory_infrastructure(
+    hub_info: dict, bucket: aws.s3.Bucket, opts: pulumi.ResourceOptions | None = None
+) -> aws.s3.Inventory | None:
+    """Create a hub's daily inventory (if the hub uses one) and expire its old deliveries."""
+    settings = get_inventory_settings(hub_info)
+    if settings is None:
+        return None
+
+    hub_name = hub_info["hub"]
+    inventory = aws.s3.Inventory(
+        resource_name=f"{hub_name}-inventory",
+        bucket=bucket.id,
+        name=INVENTORY_NAME,
+        included_object_versions="Current",
+        schedule={"frequency": "Daily"},
+        filter={"prefix": settings.prefix},
+        optional_fields=INVENTORY_FIELDS,
+        destination={
+            "bucket": {
+                "bucket_arn": bucket.arn,
+                "format": "Parquet",
+                "prefix": INVENTORY_PREFIX.rstrip("/"),
+            }
+        },
+        opts=opts,
+    )
+
+    # Hub buckets are versioned, so old deliveries are removed in two steps
+    aws.s3.BucketLifecycleConfigurationV2(
+        resource_name=f"{hub_name}-inventory-expiration",
+        bucket=bucket.id,
+        rules=[
+            {
+                "id": "expire-inventory",
+                "status": "Enabled",
+                "filter": {"prefix": f"{INVENTORY_PREFIX}{hub_name}/"},
+                "expiration": {"days": INVENTORY_EXPIRATION_DAYS},
+                "noncurrent_version_expiration": {"noncurrent_days": 1},
+            }
+        ],
+        opts=opts,
+    )
+
+    return inventory
@@ -0,0 +1,285 @@
+"""
+Plan a deployment that only updates the hubs whose configuration changed.
+
+Each deployment exports a snapshot of the hub configuration it deployed as the hub_snapshot stack
+output: a fingerprint of each hub's hubs.yaml entry, plus a fingerprint of the inputs that shared
+resources depend on (the compute profiles, the transform_permissions mode, the monitoring
+settings, and the shared resources that hubs need). The planner compares the current registry
+with that snapshot:
+
+    pulumi stack output hub_snapshot --json > snapshot.json
+    python -m hubverse_infrastructure.hubs.planner --snapshot snapshot.json --output plan.json
+
+and classifies each hub as added, changed, removed, or unchanged. The plan's targets are the URNs
+of the added, changed, and removed hubs' components, to pass to Pulumi:
+
+    pulumi up --target <urn> ... --target-dependents
+
+If the shared inputs changed (or there's no usable snapshot), every hub may be affected, so the
+plan is a full update with no targets.
+
+A snapshot can also be kept as a local manifest (--write-snapshot writes the current one).
+
+For CI previews, set HUBVERSE_HUB_PLAN to the plan's path: the program then only declares the
+added and changed hubs, and the unchanged hubs keep their state from the last deployment, so the
+preview doesn't evaluate them at all. This only works with the plan's targets, so the program
+refuses to use a plan outside of a preview.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+import pulumi
+import yaml
+
+from hubverse_infrastructure.hubs.athena import get_athena_settings
+from hubverse_infrastructure.hubs.cdn import get_cdn_enabled
+from hubverse_infrastructure.hubs.event_filters import get_event_filter_settings
+from hubverse_infrastructure.hubs.hub_setup import get_hub_urn
+from hubverse_infrastructure.hubs.inventory import get_inventory_buckets
+from hubverse_infrastructure.hubs.registry import (
+    DEFAULT_CACHE_PATH,
+    DEFAULT_REGISTRY_PATH,
+    OPTIONAL_SETTINGS,
+    HubRegistry,
+)
+from hubverse_infrastructure.hubs.replication import get_replica_regions
+from hubverse_infrastructure.shared.compaction import get_compaction_buckets
+from hubverse_infrastructure.shared.compute_profiles import (
+    ComputeProfile,
+    get_compute_profile_name,
+    load_compute_profiles,
+)
+from hubverse_infrastructure.shared.monitoring import (
+    MonitoringSettings,
+    get_monitored_queue_names,
+    load_monitoring_settings,
+)
+from hubverse_infrastructure.shared.transform_events import get_eventbridge_buckets
+from hubverse_infrastructure.shared.transform_permissions import get_permissions_mode
+from hubverse_infrastructure.shared.transform_queue import get_queue_settings
+
+HUB_SNAPSHOT_OUTPUT = "hub_snapshot"
+SNAPSHOT_VERSION = 1
+PLAN_ENV_VAR = "HUBVERSE_HUB_PLAN"
+
+# The hub keys that come from the registry (the program adds other keys to each hub's dict)
+HUB_CONFIG_KEYS = ("hub", "org", "repo", *OPTIONAL_SETTINGS)
+
+# The directory with Pulumi.yaml and the stack config files
+PROJECT_DIR = Path(__file__).parents[3]
+
+
+def fingerprint(value: Any) -> str:
+    """Return a hash of a JSON-serializable value that doesn't depend on key order."""
+    return hashlib.sha256(json.dumps(value, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def get_hub_config(hub_info: dict) -> dict:
+    """Return the part of a hub's dict that came from the registry."""
+    return {key: hub_info[key] for key in HUB_CONFIG_KEYS if key in hub_info}
+
+
+def get_shared_inputs(
+    hub_list: list[dict],
+    profiles: dict[str, ComputeProfile],
+    transform_permissions: str,
+    monitoring: MonitoringSettings | None = None,
+) -> dict[str, Any]:
+    """
+    Return the inputs of the shared resources: the settings they're created from, and the parts
+    of the hub list that they depend on.
+    """
+    shared_queues = set()
+    queue_consumers = False
+    for hub in hub_list:
+        queue_settings = get_queue_settings(hub)
+        if queue_settings is not None:
+            queue_consumers = True
+        if (queue_settings is not None and queue_settings[0]) or get_event_filter_settings(hub).queues_removes:
+            queue_consumers = True
+            shared_queues.add(get_compute_profile_name(hub, profiles))
+
+    return {
+        "transform_permissions": transform_permissions,
+        "compute_profiles": {name: asdict(profile) for name, profile in sorted(profiles.items())},
+        # the transform Lambda's log retention, alarms, and alarm subscriptions
+        "monitoring": asdict(monitoring) if monitoring is not None else None,
+        # the consolidated bucket policies list every hub bucket
+        "hub_buckets": sorted(hub["hub"] for hub in hub_list) if transform_permissions == "consolidated" else None,
+        "eventbridge_buckets": get_eventbridge_buckets(hub_list, profiles),
+        "shared_queues": sorted(shared_queues),
+        "queue_consumers": queue_consumers,
+        "cdn": any(get_cdn_enabled(hub) for hub in hub_list),
+        "athena": any(get_athena_settings(hub) is not None for hub in hub_list),
+        # the compaction Lambda's policy lists the buckets it compacts
+        "compaction_buckets": get_compaction_buckets(hub_list),
+        # the inventory index schedule lists the buckets it updates
+        "inventory_buckets": get_inventory_buckets(hub_list),
+        # the transform monitoring has an alarm for each queue
+        "monitored_queues": get_monitored_queue_names(hub_list, profiles),
+        # each replica region's AWS provider is created outside of the hubs' components
+        "replica_regions": get_replica_regions(hub_list),
+    }
+
+
+def create_snapshot(hub_list: list[dict], shared_inputs: dict[str, Any]) -> dict:
+    """Return the snapshot of a deployment's hub configuration."""
+    return {
+        "version": SNAPSHOT_VERSION,
+        "shared": fingerprint(shared_inputs),
+        "hubs": {hub["hub"]: fingerprint(get_hub_config(hub)) for hub in hub_list},
+    }
+
+
+@dataclass
+class HubPlan:
+    """The hubs that a deployment needs to update."""
+
+    added: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    unchanged: list[str] = field(default_factory=list)
+    # Why every hub needs to be updated (empty if the targets are enough)
+    full_update_reasons: list[str] = field(default_factory=list)
+    targets: list[str] = field(default_factory=list)
+
+    @property
+    def full_update(self) -> bool:
+        return bool(self.full_update_reasons)
+
+    @property
+    def has_changes(self) -> bool:
+        return self.full_update or bool(self.targets)
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "full_update": self.full_update}
+
+
+def plan_deployment(
+    snapshot: dict | None, current: dict, stack: str = "hubverse", project: str = "hubverse-aws"
+) -> HubPlan:
+    """Compare the current snapshot with the last deployment's, and return the plan."""
+    plan = HubPlan()
+    current_hubs = current["hubs"]
+    if snapshot is None:
+        plan.added = sorted(current_hubs)
+        plan.full_update_reasons.append("there's no snapshot of the last deployment")
+        return plan
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        plan.full_update_reasons.append(f"the last deployment's snapshot has version {snapshot.get('version')}")
+
+    deployed_hubs = snapshot.get("hubs", {})
+    for hub_name, hub_fingerprint in sorted(current_hubs.items()):
+        if hub_name not in deployed_hubs:
+            plan.added.append(hub_name)
+        elif deployed_hubs[hub_name] != hub_fingerprint:
+            plan.changed.append(hub_name)
+        else:
+            plan.unchanged.append(hub_name)
+    plan.removed = sorted(set(deployed_hubs) - set(current_hubs))
+
+    if snapshot.get("shared") != current["shared"]:
+        plan.full_update_reasons.append("the shared infrastructure's inputs changed")
+    if not plan.full_update:
+        plan.targets = [
+            get_hub_urn(hub_name, stack=stack, project=project)
+            for hub_name in sorted(plan.added + plan.changed + plan.removed)
+        ]
+    return plan
+
+
+def load_snapshot(path: Path | str) -> dict | None:
+    """
+    Load a snapshot from a local manifest or from `pulumi stack output --json` (either all of the
+    stack's outputs or just the hub_snapshot output). Returns None if the file doesn't exist.
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+    snapshot = json.loads(path.read_text())
+    if isinstance(snapshot, dict) and HUB_SNAPSHOT_OUTPUT in snapshot:
+        snapshot = snapshot[HUB_SNAPSHOT_OUTPUT]
+    # a stack that was deployed before snapshots were exported
+    return snapshot or None
+
+
+def load_planned_hubs() -> set[str] | None:
+    """
+    Return the hubs to declare in a preview limited by a plan (HUBVERSE_HUB_PLAN), or None to
+    declare every hub.
+    """
+    path = os.environ.get(PLAN_ENV_VAR)
+    if not path:
+        return None
+    if not pulumi.runtime.is_dry_run():
+        raise ValueError(f"{PLAN_ENV_VAR} can only be used with pulumi preview")
+    plan = json.loads(Path(path).read_text())
+    if plan["full_update"]:
+        return None
+    return set(plan["added"]) | set(plan["changed"])
+
+
+def read_stack_config(stack: str, project: str) -> dict:
+    """Return the project's settings from a stack's config file (Pulumi.<stack>.yaml)."""
+    path = PROJECT_DIR / f"Pulumi.{stack}.yaml"
+    if not path.exists():
+        return {}
+    config = (yaml.safe_load(path.read_text()) or {}).get("config") or {}
+    prefix = f"{project}:"
+    return {key.removeprefix(prefix): value for key, value in config.items() if key.startswith(prefix)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plan a deployment that only updates the hubs that changed.")
+    parser.add_argument("--snapshot", type=Path, help="the last deployment's snapshot (a manifest or stack output)")
+    parser.add_argument("--registry", help="hubs.yaml or a directory of admin.json files (default: the stack's)")
+    parser.add_argument("--stack", default="hubverse", help="Pulumi stack name (default: %(default)s)")
+    parser.add_argument("--project", default="hubverse-aws", help="Pulumi project name (default: %(default)s)")
+    parser.add_argument("--output", type=Path, help="write the plan to this JSON file")
+    parser.add_argument("--write-snapshot", type=Path, help="write the current snapshot to this manifest")
+    args = parser.parse_args()
+
+    config = read_stack_config(args.stack, args.project)
+    registry = HubRegistry.load_cached(
+        args.registry or config.get("hub_registry") or DEFAULT_REGISTRY_PATH,
+        config.get("hub_registry_cache") or DEFAULT_CACHE_PATH,
+    )
+    hub_list = registry.to_hub_list()
+    profiles = load_compute_profiles(config.get("compute_profiles"))
+    shared_inputs = get_shared_inputs(
+        hub_list,
+        profiles,
+        get_permissions_mode(config.get("transform_permissions")),
+        load_monitoring_settings(config.get("monitoring")),
+    )
+    current = create_snapshot(hub_list, shared_inputs)
+
+    plan = plan_deployment(
+        load_snapshot(args.snapshot) if args.snapshot else None, current, stack=args.stack, project=args.project
+    )
+    if args.output:
+        args.output.write_text(json.dumps(plan.to_dict(), indent=2) + "\n")
+    if args.write_snapshot:
+        args.write_snapshot.write_text(json.dumps(current, indent=2) + "\n")
+
+    for change in ("added", "changed", "removed"):
+        print(f"{change}: {', '.join(getattr(plan, change)) or '-'}")
+    print(f"unchanged: {len(plan.unchanged)} hubs")
+    if plan.full_update:
+        print(f"full update: {'; '.join(plan.full_update_reasons)}")
+    elif plan.targets:
+        print(" ".join(f"--target {target}" for target in plan.targets) + " --target-dependents")
+    else:
+        print("no changes")
+
+
+if __name__ == "__main__":
+    main()
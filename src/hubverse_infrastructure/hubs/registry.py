@@ -0,0 +1,349 @@
+"""
+The registry of cloud-enabled hubs.
+
+Hubs are listed in hubs.yaml:
+
+    hubs:
+    - hub: example-hub
+      org: hubverse-org
+      repo: example-hub
+      cdn: true
+
+or read from a directory of hub admin.json files (for example, copies of each hub's
+hub-config/admin.json), which name the hub's bucket in their cloud section:
+
+    {
+      "repository": {"host": "github", "owner": "hubverse-org", "name": "example-hub"},
+      "cloud": {"enabled": true, "host": {"name": "aws", "storage_service": "s3", "storage_location": "example-hub"}}
+    }
+
+Hubs whose admin.json doesn't enable the cloud are skipped. The optional hub settings (cdn,
+athena, ...) can only be set in hubs.yaml.
+
+Loading validates every hub (including the contents of its optional settings) and reports all of
+the problems it finds at once. Parsed files are
+cached by the hash of their contents, so reloading a registry only parses the files that changed.
+The program and the deployment planner keep the cache in .pulumi/hub-registry-cache.json (or the
+path in the hub_registry_cache stack setting).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+from hubverse_infrastructure.hubs.athena import get_athena_settings
+from hubverse_infrastructure.hubs.event_filters import get_event_filter_settings
+from hubverse_infrastructure.hubs.iam import get_trigger_type
+from hubverse_infrastructure.hubs.inventory import get_inventory_settings
+from hubverse_infrastructure.hubs.replication import get_replication_settings
+from hubverse_infrastructure.shared.compaction import get_compaction_settings
+
+DEFAULT_REGISTRY_PATH = Path(__file__).parent / "hubs.yaml"
+# (relative to the Pulumi project directory, where Pulumi runs the program)
+DEFAULT_CACHE_PATH = Path(".pulumi") / "hub-registry-cache.json"
+
+# S3 bucket naming rules (the hub name is the bucket name)
+BUCKET_NAME_PATTERN = re.compile(r"^[a-z0-9][a-z0-9.-]{1,61}[a-z0-9]$")
+GITHUB_OWNER_PATTERN = re.compile(r"^[A-Za-z0-9](?:[A-Za-z0-9-]{0,38})$")
+GITHUB_REPO_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,100}$")
+
+# Optional hub settings and their allowed types (the modules that use them validate their contents)
+OPTIONAL_SETTINGS: dict[str, type | tuple[type, ...]] = {
+    "compute_profile": str,
+    "transform_trigger": dict,
+    "cdn": bool,
+    "athena": dict,
+    "shard": int,
+    "event_filters": dict,
+    "compaction": dict,
+    "replication": dict,
+    "inventory": dict,
+}
+
+# The functions that validate the contents of optional hub settings (they raise ValueError)
+SETTING_VALIDATORS: dict[str, Callable[[dict], Any]] = {
+    "transform_trigger": get_trigger_type,
+    "athena": get_athena_settings,
+    "event_filters": get_event_filter_settings,
+    "compaction": get_compaction_settings,
+    "replication": get_replication_settings,
+    "inventory": get_inventory_settings,
+}
+
+# The C YAML parser is much faster, but it isn't available in every PyYAML build
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+@dataclass(frozen=True)
+class HubConfig:
+    """A cloud-enabled hub: its bucket name, GitHub repository, and optional settings."""
+
+    hub: str
+    org: str
+    repo: str
+    settings: dict[str, Any] = field(default_factory=dict)
+    source: str = ""
+
+    def to_hub_info(self) -> dict:
+        """
+        Return the hub as a new hub_info dict (the program adds shared resources to hub_info, so
+        each run gets its own copy).
+        """
+        return {"hub": self.hub, "org": self.org, "repo": self.repo, **self.settings}
+
+
+def validate_hub(entry: Any, source: str) -> tuple[HubConfig | None, list[str]]:
+    """Validate one hub entry, returning the hub (if it's valid) and a list of problems."""
+
+    if not isinstance(entry, dict):
+        return None, [f"{source}: expected a mapping with hub, org, and repo, got {type(entry).__name__}"]
+
+    name = entry.get("hub")
+    if isinstance(name, str):
+        source = f"{source} ({name})"
+
+    errors = []
+    for key in ("hub", "org", "repo"):
+        if key not in entry:
+            errors.append(f"{source}: missing {key}")
+        elif not isinstance(entry[key], str):
+            errors.append(f"{source}: {key} must be a string, got {type(entry[key]).__name__}")
+    if errors:
+        return None, errors
+
+    if not BUCKET_NAME_PATTERN.match(entry["hub"]) or ".." in entry["hub"]:
+        errors.append(
+            f"{source}: hub '{entry['hub']}' isn't a valid S3 bucket name "
+            "(3-63 lowercase letters, numbers, dots, and dashes)"
+        )
+    if not GITHUB_OWNER_PATTERN.match(entry["org"]):
+        errors.append(f"{source}: org '{entry['org']}' isn't a valid GitHub organization or user name")
+    if not GITHUB_REPO_PATTERN.match(entry["repo"]):
+        errors.append(f"{source}: repo '{entry['repo']}' isn't a valid GitHub repository name")
+
+    settings = {key: value for key, value in entry.items() if key not in ("hub", "org", "repo")}
+    unknown = set(settings) - set(OPTIONAL_SETTINGS)
+    if unknown:
+        errors.append(f"{source}: unknown hub settings: {sorted(unknown)} (allowed: {sorted(OPTIONAL_SETTINGS)})")
+    for key, value in settings.items():
+        expected = OPTIONAL_SETTINGS.get(key)
+        # bool is a subclass of int, so `shard: true` would otherwise pass as shard 1
+        wrong_bool = isinstance(value, bool) and expected is not bool
+        if expected is not None and value is not None and (not isinstance(value, expected) or wrong_bool):
+            errors.append(f"{source}: {key} has the wrong type ({type(value).__name__})")
+    if errors:
+        return None, errors
+
+    hub_info = {"hub": entry["hub"], **settings}
+    for key, validate in SETTING_VALIDATORS.items():
+        if settings.get(key) is None:
+            continue
+        try:
+            validate(hub_info)
+        except (TypeError, ValueError) as e:
+            errors.append(f"{source}: {str(e).removeprefix(entry['hub'] + ': ')}")
+
+    if errors:
+        return None, errors
+    return HubConfig(hub=entry["hub"], org=entry["org"], repo=entry["repo"], settings=settings, source=source), []
+
+
+def hub_entry_from_admin_json(admin: Any, source: str) -> dict | None:
+    """
+    Return the hub entry described by a hub's admin.json, or None if the hub isn't cloud-enabled.
+    """
+    if not isinstance(admin, dict):
+        raise ValueError(f"{source}: expected a JSON object")
+    cloud = admin.get("cloud") or {}
+    if not cloud.get("enabled", False):
+        return None
+
+    host = cloud.get("host") or {}
+    repository = admin.get("repository") or {}
+    if host.get("name", "aws") != "aws":
+        raise ValueError(f"{source}: cloud.host.name must be aws, got '{host.get('name')}'")
+    entry = {
+        "hub": host.get("storage_location"),
+        "org": repository.get("owner"),
+        "repo": repository.get("name"),
+    }
+    missing = {
+        "hub": "cloud.host.storage_location",
+        "org": "repository.owner",
+        "repo": "repository.name",
+    }
+    for key, path in missing.items():
+        if entry[key] is None:
+            raise ValueError(f"{source}: missing {path}")
+    return entry
+
+
+class RegistryCache:
+    """
+    Parsed registry files, keyed by the hash of their contents.
+
+    The cache can be saved to (and loaded from) a JSON file, so that later runs only parse the
+    files that changed.
+    """
+
+    def __init__(self, path: Path | str | None = None):
+        self.path = Path(path) if path is not None else None
+        self.entries: dict[str, Any] = {}
+        self.used: set[str] = set()
+        self.hits = 0
+        self.misses = 0
+        if self.path is not None and self.path.exists():
+            try:
+                self.entries = json.loads(self.path.read_text())
+            except (OSError, ValueError):
+                # a damaged cache is only a missed optimization
+                self.entries = {}
+
+    def parse(self, content: bytes, parser) -> Any:
+        """Return parser(content), reusing the result for content that was parsed before."""
+        key = hashlib.sha256(content).hexdigest()
+        self.used.add(key)
+        if key in self.entries:
+            self.hits += 1
+            return self.entries[key]
+        self.misses += 1
+        parsed = parser(content)
+        self.entries[key] = parsed
+        return parsed
+
+    def save(self):
+        """Save the files parsed (or reused) since the cache was created, dropping the rest."""
+        if self.path is None:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps({key: self.entries[key] for key in sorted(self.used)}))
+        except (OSError, TypeError):
+            # neither is a cache that can't be written (or a YAML value that JSON can't store)
+            pass
+
+
+def parse_yaml(content: bytes) -> Any:
+    return yaml.load(content, Loader=YamlLoader)
+
+
+def parse_admin_json(content: bytes) -> Any:
+    return json.loads(content)
+
+
+class HubRegistry:
+    """The validated hubs, indexed by name."""
+
+    def __init__(self, hubs: list[HubConfig]):
+        self.hubs = list(hubs)
+        self._by_name: dict[str, HubConfig] = {}
+
+        errors = []
+        for hub in self.hubs:
+            if hub.hub in self._by_name:
+                errors.append(
+                    f"{hub.source}: duplicate hub bucket '{hub.hub}' (also in {self._by_name[hub.hub].source})"
+                )
+            else:
+                self._by_name[hub.hub] = hub
+        if errors:
+            raise ValueError("invalid hub registry:\n" + "\n".join(errors))
+
+    @classmethod
+    def from_entries(cls, entries: list[tuple[Any, str]]) -> HubRegistry:
+        """Create a registry from (entry, source) pairs, reporting every invalid entry."""
+        hubs = []
+        errors = []
+        for entry, source in entries:
+            hub, hub_errors = validate_hub(entry, source)
+            errors.extend(hub_errors)
+            if hub is not None:
+                hubs.append(hub)
+        if errors:
+            raise ValueError("invalid hub registry:\n" + "\n".join(errors))
+        return cls(hubs)
+
+    @classmethod
+    def from_yaml(cls, path: Path | str, cache: RegistryCache | None = None) -> HubRegistry:
+        """Load the hubs listed in a hubs.yaml file."""
+        path = Path(path)
+        cache = cache or RegistryCache()
+        document = cache.parse(path.read_bytes(), parse_yaml)
+        if not isinstance(document, dict) or not isinstance(document.get("hubs"), list):
+            raise ValueError(f"{path}: expected a hubs list")
+        return cls.from_entries([(entry, f"{path.name}: hubs[{i}]") for i, entry in enumerate(document["hubs"])])
+
+    @classmethod
+    def from_admin_directory(cls, path: Path | str, cache: RegistryCache | None = None) -> HubRegistry:
+        """Load the cloud-enabled hubs from the admin.json files in a directory (and its subdirectories)."""
+        path = Path(path)
+        cache = cache or RegistryCache()
+        entries = []
+        errors = []
+        for admin_path in sorted(path.glob("**/admin.json")):
+            source = str(admin_path.relative_to(path))
+            try:
+                admin = cache.parse(admin_path.read_bytes(), parse_admin_json)
+            except ValueError as e:
+                errors.append(f"{source}: invalid JSON: {e}")
+                continue
+            try:
+                entry = hub_entry_from_admin_json(admin, source)
+            except ValueError as e:
+                errors.append(str(e))
+                continue
+            if entry is not None:
+                entries.append((entry, source))
+        if errors:
+            raise ValueError("invalid hub registry:\n" + "\n".join(errors))
+        return cls.from_entries(entries)
+
+    @classmethod
+    def load(cls, path: Path | str = DEFAULT_REGISTRY_PATH, cache: RegistryCache | None = None) -> HubRegistry:
+        """Load a registry from a hubs.yaml file or a directory of admin.json files."""
+        path = Path(path)
+        if path.is_dir():
+            return cls.from_admin_directory(path, cache)
+        return cls.from_yaml(path, cache)
+
+    @classmethod
+    def load_cached(
+        cls, path: Path | str = DEFAULT_REGISTRY_PATH, cache_path: Path | str = DEFAULT_CACHE_PATH
+    ) -> HubRegistry:
+        """Load a registry, reusing (and then saving) the parsed files in the cache at cache_path."""
+        cache = RegistryCache(cache_path)
+        registry = cls.load(path, cache)
+        cache.save()
+        return registry
+
+    def __iter__(self) -> Iterator[HubConfig]:
+        return iter(self.hubs)
+
+    def __len__(self) -> int:
+        return len(self.hubs)
+
+    def __contains__(self, hub_name: object) -> bool:
+        return hub_name in self._by_name
+
+    def get(self, hub_name: str) -> HubConfig:
+        """Return a hub by name."""
+        try:
+            return self._by_name[hub_name]
+        except KeyError:
+            raise KeyError(f"unknown hub '{hub_name}'") from None
+
+    @property
+    def names(self) -> list[str]:
+        return [hub.hub for hub in self.hubs]
+
+    def to_hub_list(self) -> list[dict]:
+        """Return the hubs as hub_info dicts for create_hubverse_infrastructure."""
+        return [hub.to_hub_info() for hub in self.hubs]
@@ -0,0 +1,241 @@
+"""
+Replicate a hub's transformed data to read-only buckets in other AWS regions.
+
+Hub buckets are in the Hubverse account's region, so readers on other continents pay for the
+distance on every request. Hubs with many such readers can opt in to replicas in hubs.yaml:
+
+    - hub: example-hub
+      org: hubverse-org
+      repo: example-hub
+      replication:
+        regions:                   # the regions to replicate to
+          - eu-west-1
+          - ap-southeast-2
+        prefixes:                  # the prefixes to replicate (default: model-output/)
+          - model-output/
+
+Each region gets a <hub>-<region> bucket with the same public-read policy and CORS rules as the
+hub's bucket. S3 replication copies new versions of objects under the prefixes (including
+delete markers, so files that the transform removes are removed from the replicas too). The
+raw/ prefix is never replicated, because only the transform reads it.
+
+The replica buckets and their URLs are exported as the <hub>-replicas stack output.
+
+Note: replication only copies objects written after it's turned on. To copy a hub's existing
+transformed files, run an S3 Batch Replication job for the hub's bucket.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, fields
+
+import pulumi
+import pulumi_aws as aws
+
+from hubverse_infrastructure.hubs.s3 import create_bucket, make_bucket_public
+from hubverse_infrastructure.shared.policy_document import PolicyDocument, Principal, Statement
+
+REGION_PATTERN = re.compile(r"^[a-z]{2}(-gov)?-[a-z]+-\d$")
+
+# S3 bucket names and IAM role names can't be longer than these
+MAX_BUCKET_NAME_LENGTH = 63
+MAX_ROLE_NAME_LENGTH = 64
+
+# The prefix that hubs upload untransformed files to
+RAW_PREFIX = "raw/"
+
+
+@dataclass(frozen=True)
+class ReplicationSettings:
+    """The regions and prefixes that a hub's bucket is replicated to."""
+
+    regions: tuple[str, ...] = ()
+    prefixes: tuple[str, ...] = ("model-output/",)
+
+    def __post_init__(self):
+        if not self.regions:
+            raise ValueError("regions must list at least one region")
+        for region in self.regions:
+            if not isinstance(region, str) or not REGION_PATTERN.match(region):
+                raise ValueError(f"'{region}' isn't an AWS region")
+        if len(set(self.regions)) != len(self.regions):
+            raise ValueError("regions can't be listed more than once")
+        if not self.prefixes:
+            raise ValueError("prefixes must list at least one prefix")
+        for prefix in self.prefixes:
+            if not isinstance(prefix, str) or not prefix.endswith("/") or prefix.startswith(RAW_PREFIX):
+                raise ValueError(f"prefixes must be directories (ending in /) outside of {RAW_PREFIX}, got '{prefix}'")
+
+
+def get_replication_settings(hub_info: dict) -> ReplicationSettings | None:
+    """Return a hub's replication settings, or None if the hub doesn't use replicas."""
+    replication = hub_info.get("replication")
+    if replication is None:
+        return None
+
+    hub = hub_info["hub"]
+    allowed = {settings_field.name for settings_field in fields(ReplicationSettings)}
+    unknown = set(replication) - allowed
+    if unknown:
+        raise ValueError(f"{hub}: unknown replication settings: {sorted(unknown)}")
+
+    settings = {key: tuple(value) if isinstance(value, list) else value for key, value in replication.items()}
+    try:
+        return ReplicationSettings(**settings)
+    except ValueError as e:
+        raise ValueError(f"{hub}: {e}") from e
+
+
+def get_replica_regions(hub_list: list[dict]) -> list[str]:
+    """Return the regions that any hub replicates to."""
+    regions: set[str] = set()
+    for hub_info in hub_list:
+        settings = get_replication_settings(hub_info)
+        if settings is not None:
+            regions.update(settings.regions)
+    return sorted(regions)
+
+
+def get_replica_bucket_name(hub_name: str, region: str) -> str:
+    """Return the name of a hub's replica bucket in a region."""
+    return f"{hub_name}-{region}"
+
+
+class ReplicaProviders:
+    """Create an AWS provider for each replica region the first time a hub needs it."""
+
+    def __init__(self) -> None:
+        self._providers: dict[str, aws.Provider] = {}
+
+    def get_provider(self, region: str) -> aws.Provider:
+        if region not in self._providers:
+            self._providers[region] = aws.Provider(resource_name=f"hubverse-{region}", region=region)
+        return self._providers[region]
+
+
+def create_replication_policy_document(hub_name: str, replica_bucket_names: list[str]) -> PolicyDocument:
+    """Create the policy document that lets S3 copy a hub's objects to its replica buckets."""
+
+    return PolicyDocument(
+        statements=[
+            Statement(
+                actions=[
+                    "s3:GetReplicationConfiguration",
+                    "s3:ListBucket",
+                ],
+                resources=[f"arn:aws:s3:::{hub_name}"],
+            ),
+            Statement(
+                actions=[
+                    "s3:GetObjectVersionForReplication",
+                    "s3:GetObjectVersionAcl",
+                    "s3:GetObjectVersionTagging",
+                ],
+                resources=[f"arn:aws:s3:::{hub_name}/*"],
+            ),
+            Statement(
+                actions=[
+                    "s3:ReplicateObject",
+                    "s3:ReplicateDelete",
+                    "s3:ReplicateTags",
+                ],
+                resources=[f"arn:aws:s3:::{bucket_name}/*" for bucket_name in replica_bucket_names],
+            ),
+        ]
+    )
+
+
+def create_replication_role(
+    hub_name: str, replica_bucket_names: list[str], opts: pulumi.ResourceOptions | None = None
+) -> aws.iam.Role:
+    """Create the IAM role that S3 assumes to replicate a hub's bucket."""
+
+    trust_policy_document = PolicyDocument(
+        statements=[
+            Statement(
+                actions=["sts:AssumeRole"],
+                principals=[Principal(type="Service", identifiers=["s3.amazonaws.com"])],
+            )
+        ]
+    )
+    role = aws.iam.Role(
+        resource_name=f"{hub_name}-replication",
+        name=f"{hub_name}-replication",
+        description=f"The role that S3 assumes to replicate the {hub_name} bucket",
+        assume_role_policy=trust_policy_document.json,
+        tags={"hub": hub_name},
+        opts=opts,
+    )
+    aws.iam.RolePolicy(
+        resource_name=f"{hub_name}-replication-policy",
+        role=role.id,
+        policy=create_replication_policy_document(hub_name, replica_bucket_names).json,
+        opts=opts,
+    )
+    return role
+
+
+def create_replication_infrastructure(
+    hub_info: dict, bucket: aws.s3.Bucket, opts: pulumi.ResourceOptions | None = None
+) -> dict | None:
+    """
+    Create a hub's replica buckets and the replication rules that copy its transformed data to
+    them (if the hub uses replicas), and return the replicas' bucket names and URLs by region.
+    """
+    settings = get_replication_settings(hub_info)
+    if settings is None:
+        return None
+
+    hub_name = hub_info["hub"]
+    if hub_info["account_context"].region in settings.regions:
+        raise ValueError(f"{hub_name}: regions can't include the hub bucket's region")
+    if len(f"{hub_name}-replication") > MAX_ROLE_NAME_LENGTH:
+        raise ValueError(f"{hub_name}: hub name is too long for a replication role")
+
+    replicas = {}
+    replica_buckets = []
+    for region in settings.regions:
+        replica_name = get_replica_bucket_name(hub_name, region)
+        if len(replica_name) > MAX_BUCKET_NAME_LENGTH:
+            raise ValueError(f"{hub_name}: hub name is too long for a replica bucket in {region}")
+
+        replica_opts = pulumi.ResourceOptions.merge(
+            opts, pulumi.ResourceOptions(provider=hub_info["replica_providers"].get_provider(region))
+        )
+        replica_bucket = create_bucket(hub_name, replica_opts, bucket_name=replica_name)
+        make_bucket_public(replica_bucket, replica_name, replica_opts)
+        replica_buckets.append(replica_bucket)
+        replicas[region] = {
+            "bucket": replica_name,
+            "url": f"https://{replica_name}.s3.{region}.amazonaws.com",
+        }
+
+    role = create_replication_role(hub_name, [replica["bucket"] for replica in replicas.values()], opts)
+
+    # S3 applies the rule with the highest priority when rules overlap, so every rule needs its own
+    rules: list[aws.s3.BucketReplicationConfigRuleArgs] = []
+    for region, replica_bucket in zip(settings.regions, replica_buckets):
+        for prefix in settings.prefixes:
+            rules.append(
+                aws.s3.BucketReplicationConfigRuleArgs(
+                    id=f"{prefix.rstrip('/')}-{region}",
+                    status="Enabled",
+                    priority=len(rules),
+                    filter=aws.s3.BucketReplicationConfigRuleFilterArgs(prefix=prefix),
+                    delete_marker_replication=aws.s3.BucketReplicationConfigRuleDeleteMarkerReplicationArgs(
+                        status="Enabled"
+                    ),
+                    destination=aws.s3.BucketReplicationConfigRuleDestinationArgs(bucket=replica_bucket.arn),
+                )
+            )
+    aws.s3.BucketReplicationConfig(
+        resource_name=f"{hub_name}-replication",
+        bucket=bucket.id,
+        role=role.arn,
+        rules=rules,
+        # S3 checks that the replica buckets are versioned when the rules are created
+        opts=pulumi.ResourceOptions.merge(opts, pulumi.ResourceOptions(depends_on=[bucket, *replica_buckets])),
+    )
+
+    return replicas
@@ -1,16 +1,30 @@
+from __future__ import annotations
+
+import pulumi
 import pulumi_aws as aws
 from pulumi import ResourceOptions  # type: ignore
 
+from hubverse_infrastructure.hubs.cdn import create_cdn_infrastructure
+from hubverse_infrastructure.hubs.inventory import (
+    create_inventory_delivery_statement,
+    create_inventory_infrastructure,
+    get_inventory_settings,
+)
+from hubverse_infrastructure.shared.policy_document import Condition, PolicyDocument, Principal, Statement
+from hubverse_infrastructure.shared.transform_permissions import create_transform_access_statement
+
 
-def create_bucket(hub_name: str) -> aws.s3.Bucket:
+def create_bucket(hub_name: str, opts: ResourceOptions | None = None, bucket_name: str | None = None) -> aws.s3.Bucket:
     """
     Create a new S3 bucket for a hub.
-    (for simplicity, in this demo we're setting the bucket name to the hub name)
+    (for simplicity, in this demo we're setting the bucket name to the hub name,
+    unless a bucket_name is given, as it is for the hub's replica buckets)
     """
 
+    bucket_name = bucket_name or hub_name
     hub_bucket = aws.s3.Bucket(
-        hub_name,
-        bucket=hub_name,
+        bucket_name,
+        bucket=bucket_name,
         tags={"hub": hub_name},
         versioning={"enabled": True},
         # allow bucket access via http
@@ -23,67 +37,135 @@ def create_bucket(hub_name: str) -> aws.s3.Bucket:
             "allowed_origins": ["*"],
             "expose_headers": [],
             "max_age_seconds": 3000,
-        }]
+        }],
+        opts=opts,
     )
 
     return hub_bucket
 
 
-def make_bucket_public(bucket: aws.s3.Bucket, bucket_name: str):
+def create_public_read_policy_document(
+    bucket_name: str,
+    cdn_distribution_arn: str | None = None,
+    inventory_source_account: str | None = None,
+    transform_role_arn: str | None = None,
+) -> PolicyDocument:
     """
-    Make the specified S3 bucket public.
-    Note that we're passing in the bucket_name rather than derviving it from the
-    Pulumi object, because doing so is a complete nightmare and not well-supported
-    in their Python SDK.
+    Create the bucket policy document that allows anonymous public reads of a bucket
+    (and reads by the hub's CloudFront distribution, if it has one, inventory
+    deliveries from S3, if the hub uses an inventory, and access by the transform
+    Lambda role, if transform_permissions is bucket-policy).
     """
 
-    # By default, new S3 buckets do not allow public access. Updating
-    # those settings will allow us to create a bucket policy for public access.
-    hub_bucket_public_access_block = aws.s3.BucketPublicAccessBlock(
-        resource_name=f"{bucket_name}-public-access-block",
-        bucket=bucket.id,
-        block_public_acls=True,
-        ignore_public_acls=True,
-        block_public_policy=False,
-        restrict_public_buckets=False,
-    )
+    cdn_statements = []
+    if cdn_distribution_arn is not None:
+        cdn_statements.append(
+            Statement(
+                sid="AllowCloudFrontServicePrincipalReadOnly",
+                actions=[
+                    "s3:GetObject",
+                ],
+                principals=[Principal(type="Service", identifiers=["cloudfront.amazonaws.com"])],
+                resources=[f"arn:aws:s3:::{bucket_name}/*"],
+                conditions=[
+                    Condition(test="StringEquals", variable="AWS:SourceArn", values=[cdn_distribution_arn]),
+                ],
+            )
+        )
 
-    # Create an S3 policy that allows public read access.
-    s3_policy = aws.iam.get_policy_document(
+    inventory_statements = []
+    if inventory_source_account is not None:
+        inventory_statements.append(create_inventory_delivery_statement(bucket_name, inventory_source_account))
+
+    transform_statements = []
+    if transform_role_arn is not None:
+        transform_statements.append(create_transform_access_statement(bucket_name, transform_role_arn))
+
+    return PolicyDocument(
         statements=[
-            aws.iam.GetPolicyDocumentStatementArgs(
+            Statement(
                 sid="PublicReadGetObject",
                 actions=[
                     "s3:GetObject",
                 ],
-                principals=[aws.iam.GetPolicyDocumentStatementPrincipalArgs(type="*", identifiers=["*"])],
+                principals=[Principal(type="*", identifiers=["*"])],
                 resources=[f"arn:aws:s3:::{bucket_name}/*"],
             ),
-            aws.iam.GetPolicyDocumentStatementArgs(
+            Statement(
                 sid="PublicListBucket",
                 actions=[
                     "s3:ListBucket",
                 ],
-                principals=[aws.iam.GetPolicyDocumentStatementPrincipalArgs(type="*", identifiers=["*"])],
+                principals=[Principal(type="*", identifiers=["*"])],
                 resources=[f"arn:aws:s3:::{bucket_name}"],
             ),
+            *cdn_statements,
+            *inventory_statements,
+            *transform_statements,
         ]
     )
 
+
+def make_bucket_public(
+    bucket: aws.s3.Bucket,
+    bucket_name: str,
+    opts: ResourceOptions | None = None,
+    cdn_distribution: aws.cloudfront.Distribution | None = None,
+    inventory_source_account: str | None = None,
+    transform_role_arn: pulumi.Output[str] | None = None,
+):
+    """
+    Make the specified S3 bucket public.
+    Note that we're passing in the bucket_name rather than derviving it from the
+    Pulumi object, because doing so is a complete nightmare and not well-supported
+    in their Python SDK.
+    """
+
+    # By default, new S3 buckets do not allow public access. Updating
+    # those settings will allow us to create a bucket policy for public access.
+    hub_bucket_public_access_block = aws.s3.BucketPublicAccessBlock(
+        resource_name=f"{bucket_name}-public-access-block",
+        bucket=bucket.id,
+        block_public_acls=True,
+        ignore_public_acls=True,
+        block_public_policy=False,
+        restrict_public_buckets=False,
+        opts=opts,
+    )
+
+    # Create an S3 policy that allows public read access.
+    s3_policy: str | pulumi.Output[str]
+    if cdn_distribution is None and transform_role_arn is None:
+        s3_policy = create_public_read_policy_document(bucket_name, None, inventory_source_account).json
+    else:
+        cdn_distribution_arn = cdn_distribution.arn if cdn_distribution is not None else None
+        s3_policy = pulumi.Output.all(cdn_distribution_arn, transform_role_arn).apply(
+            lambda arns: create_public_read_policy_document(bucket_name, arns[0], inventory_source_account, arns[1]).json
+        )
+
     # Apply the public read policy to the bucket.
     aws.s3.BucketPolicy(
         resource_name=f"{bucket_name}-read-bucket-policy",
         bucket=bucket.id,
-        policy=s3_policy.json,
+        policy=s3_policy,
         # The dependency below ensures that the bucket's public access block has
         # already been updated to allow public access. Otherwise, trying to
         # apply the "everyone can read" policy will throw a 403.
-        opts=ResourceOptions(depends_on=[hub_bucket_public_access_block]),
+        opts=ResourceOptions.merge(opts, ResourceOptions(depends_on=[hub_bucket_public_access_block])),
     )
 
 
-def create_s3_infrastructure(hub_info: dict) -> aws.s3.Bucket:
+def create_s3_infrastructure(hub_info: dict, opts: ResourceOptions | None = None) -> aws.s3.Bucket:
     hub_name = hub_info["hub"]
-    bucket = create_bucket(hub_name)
-    make_bucket_public(bucket, hub_name)
+    bucket = create_bucket(hub_name, opts)
+    cdn_distribution = create_cdn_infrastructure(hub_info, bucket, opts)
+    hub_info["cdn_distribution"] = cdn_distribution
+    inventory_source_account = None
+    if get_inventory_settings(hub_info) is not None:
+        inventory_source_account = hub_info["account_context"].account_id
+    transform_role_arn = None
+    if hub_info["transform_permissions"] == "bucket-policy":
+        transform_role_arn = hub_info["model_output_lambda_role"].arn
+    make_bucket_public(bucket, hub_name, opts, cdn_distribution, inventory_source_account, transform_role_arn)
+    create_inventory_infrastructure(hub_info, bucket, opts)
     return bucket
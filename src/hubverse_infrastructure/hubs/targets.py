@@ -0,0 +1,28 @@
+"""
+Print the Pulumi URN to target when previewing or updating a single hub.
+
+For example:
+
+    python -m hubverse_infrastructure.hubs.targets flusight-forecast
+
+prints the URN of the flusight-forecast HubverseHub component, which can be used with
+`pulumi preview --target <urn> --target-dependents` (or `pulumi up`) to limit the
+operation to that hub's resources.
+"""
+
+import argparse
+
+from hubverse_infrastructure.hubs.hub_setup import get_hub_urn
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("hub", help="the hub name (the hub key in hubs.yaml)")
+    parser.add_argument("--stack", default="hubverse", help="Pulumi stack name (default: %(default)s)")
+    parser.add_argument("--project", default="hubverse-aws", help="Pulumi project name (default: %(default)s)")
+    args = parser.parse_args()
+    print(get_hub_urn(args.hub, stack=args.stack, project=args.project))
+
+
+if __name__ == "__main__":
+    main()
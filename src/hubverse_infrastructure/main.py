@@ -1,24 +1,65 @@
 """An Python Pulumi program that generates Hubverse resources in AWS."""
 
-import yaml
+import pulumi
 
-from hubverse_infrastructure.hubs.hub_setup import set_up_hub
-from hubverse_infrastructure.shared.hubverse_transforms import create_transform_infrastructure
+from hubverse_infrastructure.hubs.planner import load_planned_hubs
+from hubverse_infrastructure.hubs.registry import DEFAULT_CACHE_PATH, DEFAULT_REGISTRY_PATH, HubRegistry
+from hubverse_infrastructure.program import create_hubverse_infrastructure
+from hubverse_infrastructure.shared.account_context import get_account_context
+from hubverse_infrastructure.shared.compute_profiles import load_compute_profiles
+from hubverse_infrastructure.shared.instrumentation import Instrumentation
+from hubverse_infrastructure.shared.monitoring import load_monitoring_settings
+from hubverse_infrastructure.shared.sharding import load_shard_settings
 
-# First, create infrastructure components that are shared across hubs.
-model_output_lambda, model_output_lambda_role = create_transform_infrastructure()
 
-
-# Then, create hub-specific infrastructure.
 def get_hubs() -> list[dict]:
-    """Get the list of cloud-enabled hubs."""
-    with open("hubs/hubs.yaml", "r") as file:
-        hubs = yaml.safe_load(file).get("hubs")
-    return hubs
+    """
+    Get the list of cloud-enabled hubs from hubs.yaml (or from the hub_registry config value, which
+    can name another hubs.yaml or a directory of hub admin.json files).
+
+    Parsed files are cached in .pulumi/ (or at the hub_registry_cache config value), so later runs
+    only parse the files that changed.
+    """
+    config = pulumi.Config()
+    registry = HubRegistry.load_cached(
+        config.get("hub_registry") or DEFAULT_REGISTRY_PATH, config.get("hub_registry_cache") or DEFAULT_CACHE_PATH
+    )
+    return registry.to_hub_list()
+
+
+# Opt-in timing of the program (see instrumentation.py)
+instrumentation = Instrumentation.from_config(pulumi.Config())
+
+# Account-level details (account id, region, GitHub OIDC provider) are looked up
+# once and shared by the shared infrastructure and every hub.
+account_context = get_account_context(instrumentation)
 
+# Transform Lambda compute profiles that hubs can choose in hubs.yaml
+compute_profiles = load_compute_profiles(pulumi.Config().get_object("compute_profiles"))
+
+# How the transform Lambda role gets access to hub buckets ("bucket-policy", "consolidated", or "per-hub")
+transform_permissions = pulumi.Config().get("transform_permissions")
+
+# The transform Lambda's dashboard and alarm thresholds (None if monitoring is off)
+monitoring = load_monitoring_settings(pulumi.Config().get_object("monitoring"))
+
+# Which part of a sharded deployment this stack creates (None if all hubs are in this stack)
+shard_settings = load_shard_settings(pulumi.Config())
+
+# In a CI preview limited by a deployment plan, only the hubs that changed (see planner.py)
+planned_hubs = load_planned_hubs()
 
 hub_list = get_hubs()
-for hub in hub_list:
-    hub["model_output_lambda"] = model_output_lambda
-    hub["model_output_lambda_role"] = model_output_lambda_role
-    set_up_hub(hub)
+create_hubverse_infrastructure(
+    hub_list,
+    account_context,
+    compute_profiles,
+    transform_permissions,
+    instrumentation,
+    shard_settings,
+    planned_hubs,
+    monitoring,
+)
+
+account_context.report()
+instrumentation.finish()
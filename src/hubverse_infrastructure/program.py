@@ -0,0 +1,156 @@
+"""
+The Hubverse Pulumi program.
+
+main.py is the entry point that Pulumi runs. The program itself lives here so that
+tests and benchmarks can run it against Pulumi mocks without importing main.py.
+"""
+
+import pulumi
+
+from hubverse_infrastructure.hubs.athena import AthenaResults
+from hubverse_infrastructure.hubs.cdn import CdnPolicies
+from hubverse_infrastructure.hubs.hub_setup import set_up_hub
+from hubverse_infrastructure.hubs.inventory import get_inventory_buckets
+from hubverse_infrastructure.hubs.planner import HUB_SNAPSHOT_OUTPUT, create_snapshot, get_shared_inputs
+from hubverse_infrastructure.hubs.replication import ReplicaProviders
+from hubverse_infrastructure.shared.account_context import AccountContext
+from hubverse_infrastructure.shared.compaction import CompactionLambda, get_compaction_buckets
+from hubverse_infrastructure.shared.compute_profiles import (
+    ComputeProfile,
+    get_compute_profile_name,
+    load_compute_profiles,
+)
+from hubverse_infrastructure.shared.hubverse_transforms import create_transform_infrastructure
+from hubverse_infrastructure.shared.instrumentation import HUB_PHASE, Instrumentation
+from hubverse_infrastructure.shared.inventory_index import create_inventory_index
+from hubverse_infrastructure.shared.monitoring import (
+    MonitoringSettings,
+    create_transform_monitoring,
+    get_monitored_queue_names,
+)
+from hubverse_infrastructure.shared.sharding import (
+    SHARED_INFRASTRUCTURE_OUTPUT,
+    ShardSettings,
+    SharedInfrastructure,
+    get_shard_hubs,
+    prepare_shared_infrastructure,
+    reference_shared_infrastructure,
+)
+from hubverse_infrastructure.shared.transform_events import TransformEventRules, get_eventbridge_buckets
+from hubverse_infrastructure.shared.transform_permissions import (
+    create_consolidated_bucket_policies,
+    get_permissions_mode,
+)
+from hubverse_infrastructure.shared.transform_queue import TransformQueues
+
+
+def create_hubverse_infrastructure(
+    hub_list: list[dict],
+    account_context: AccountContext,
+    compute_profiles: dict[str, ComputeProfile] | None = None,
+    transform_permissions: str | None = None,
+    instrumentation: Instrumentation | None = None,
+    shard_settings: ShardSettings | None = None,
+    planned_hubs: set[str] | None = None,
+    monitoring: MonitoringSettings | None = None,
+):
+    """
+    Create the shared Hubverse infrastructure and the infrastructure for each hub in hub_list.
+
+    In a sharded deployment (see sharding.py), the shared stack only creates the shared
+    infrastructure, and each hub shard only creates the infrastructure for its own hubs.
+
+    planned_hubs limits a preview to the hubs that a deployment plan (see planner.py) targets.
+
+    monitoring adds a dashboard and alarms for the transform Lambda (see monitoring.py).
+    """
+
+    instrumentation = instrumentation or Instrumentation()
+    instrumentation.start()
+    transform_permissions = get_permissions_mode(transform_permissions)
+
+    with instrumentation.phase("shared"):
+        if shard_settings is not None and not shard_settings.is_shared:
+            shared = reference_shared_infrastructure(
+                shard_settings.shared_stack,  # type: ignore[arg-type]
+                account_context,
+                compute_profiles or load_compute_profiles(None),
+                transform_permissions,
+            )
+        else:
+            shared = create_shared_infrastructure(
+                hub_list, account_context, compute_profiles, transform_permissions, monitoring
+            )
+
+    if shard_settings is not None and shard_settings.is_shared:
+        with instrumentation.phase("shared"):
+            pulumi.export(SHARED_INFRASTRUCTURE_OUTPUT, prepare_shared_infrastructure(hub_list, shared))
+        return
+
+    shared_inputs = get_shared_inputs(hub_list, shared.profiles, transform_permissions, monitoring)
+    if shard_settings is not None:
+        hub_list = get_shard_hubs(hub_list, shard_settings)
+
+    # The deployed hub configuration, which the planner compares with the next deployment's
+    pulumi.export(HUB_SNAPSHOT_OUTPUT, create_snapshot(hub_list, shared_inputs))
+    if planned_hubs is not None:
+        hub_list = [hub for hub in hub_list if hub["hub"] in planned_hubs]
+
+    # Then, create hub-specific infrastructure.
+    # (providers for the regions of hubs' replica buckets belong to the stack that uses them)
+    replica_providers = ReplicaProviders()
+    for hub in hub_list:
+        hub["model_output_lambda"] = shared.model_output_lambdas[get_compute_profile_name(hub, shared.profiles)]
+        hub["model_output_lambda_role"] = shared.model_output_lambda_role
+        hub["transform_permissions"] = shared.transform_permissions
+        hub["account_context"] = account_context
+        hub["transform_queues"] = shared.transform_queues
+        hub["transform_event_rules"] = shared.transform_event_rules
+        hub["cdn_policies"] = shared.cdn_policies
+        hub["athena_results"] = shared.athena_results
+        hub["compaction_lambda"] = shared.compaction_lambda
+        hub["replica_providers"] = replica_providers
+        hub["instrumentation"] = instrumentation
+        with instrumentation.phase(HUB_PHASE, hub=hub["hub"]):
+            set_up_hub(hub)
+
+
+def create_shared_infrastructure(
+    hub_list: list[dict],
+    account_context: AccountContext,
+    compute_profiles: dict[str, ComputeProfile] | None,
+    transform_permissions: str,
+    monitoring: MonitoringSettings | None = None,
+) -> SharedInfrastructure:
+    """Create the infrastructure components that are shared across hubs."""
+
+    # (one transform Lambda per compute profile)
+    model_output_lambdas, model_output_lambda_role = create_transform_infrastructure(account_context, compute_profiles)
+    profiles = {name: model_output_lambda.profile for name, model_output_lambda in model_output_lambdas.items()}
+    # Give the transform Lambdas access to the hub buckets (unless each hub grants access itself)
+    if transform_permissions == "consolidated":
+        create_consolidated_bucket_policies([hub["hub"] for hub in hub_list], model_output_lambda_role)
+    # The Lambda that points hubs' inventory indexes at their latest inventories (if a hub uses one)
+    create_inventory_index(get_inventory_buckets(hub_list), account_context)
+    # Dashboards and alarms for the transform Lambdas and the queues that hubs use
+    if monitoring is not None:
+        create_transform_monitoring(
+            model_output_lambdas, get_monitored_queue_names(hub_list, profiles), monitoring, account_context
+        )
+
+    return SharedInfrastructure(
+        model_output_lambdas=model_output_lambdas,
+        model_output_lambda_role=model_output_lambda_role,
+        profiles=profiles,
+        transform_permissions=transform_permissions,
+        # SQS queues for hubs that batch their transform events (created as hubs need them)
+        transform_queues=TransformQueues(model_output_lambda_role, account_context),
+        # The EventBridge rules shared by hubs that route their transform events through EventBridge
+        transform_event_rules=TransformEventRules(get_eventbridge_buckets(hub_list, profiles)),
+        # CloudFront policies shared by hubs that use a CDN (created if a hub needs them)
+        cdn_policies=CdnPolicies(),
+        # The private bucket for Athena query results (created if a hub uses Athena)
+        athena_results=AthenaResults(),
+        # The Lambda that compacts hubs' transformed files (created if a hub uses compaction)
+        compaction_lambda=CompactionLambda(get_compaction_buckets(hub_list), account_context),
+    )
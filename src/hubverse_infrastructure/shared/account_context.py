@@ -0,0 +1,72 @@
+"""Look up the AWS account details shared by every hub once per Pulumi program run."""
+
+from __future__ import annotations
+
+import functools
+from collections.abc import Callable
+from typing import Any
+
+import pulumi
+import pulumi_aws as aws
+
+from hubverse_infrastructure.shared.instrumentation import Instrumentation
+
+GITHUB_OIDC_URL = "https://token.actions.githubusercontent.com"
+
+
+class AccountContext:
+    """
+    Memoized AWS account information (account id, region, GitHub OIDC provider).
+
+    Each value is fetched with a provider invoke the first time it's requested and
+    cached for the rest of the program run. Invokes are blocking round trips to the
+    AWS provider plugin, so resolving them once (instead of once per hub) keeps
+    previews fast as the number of hubs grows.
+    """
+
+    def __init__(self, oidc_url: str = GITHUB_OIDC_URL, instrumentation: Instrumentation | None = None):
+        self.oidc_url = oidc_url
+        self.instrumentation = instrumentation or Instrumentation()
+        self.lookups = 0
+        self.invokes = 0
+        self._cache: dict[str, Any] = {}
+
+    def _resolve(self, key: str, invoke: Callable[[], Any]) -> Any:
+        self.lookups += 1
+        if key not in self._cache:
+            self.invokes += 1
+            self._cache[key] = self.instrumentation.time_invoke(key, invoke)
+        return self._cache[key]
+
+    @property
+    def account_id(self) -> str:
+        """The id of the AWS account that Pulumi is deploying to."""
+        return self._resolve("account_id", lambda: aws.get_caller_identity().account_id)
+
+    @property
+    def region(self) -> str:
+        """The default region of the AWS provider."""
+        return self._resolve("region", lambda: aws.get_region().name)
+
+    @property
+    def oidc_github(self) -> aws.iam.GetOpenIdConnectProviderResult:
+        """The hubverse account's OIDC provider for GitHub Actions."""
+        return self._resolve("oidc_github", lambda: aws.iam.get_open_id_connect_provider(url=self.oidc_url))
+
+    @property
+    def invokes_saved(self) -> int:
+        """Number of provider invokes avoided by returning cached values."""
+        return self.lookups - self.invokes
+
+    def report(self):
+        """Log how many provider invokes were made and how many were saved by memoization."""
+        pulumi.log.info(
+            f"Account context: {self.invokes} provider invokes for {self.lookups} lookups "
+            f"({self.invokes_saved} invokes saved)"
+        )
+
+
+@functools.cache
+def get_account_context(instrumentation: Instrumentation | None = None) -> AccountContext:
+    """Return the account context shared by the whole program run."""
+    return AccountContext(instrumentation=instrumentation)
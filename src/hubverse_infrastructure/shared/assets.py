@@ -0,0 +1,121 @@
+"""
+Seed the shared assets (such as the transform Lambda's code package) that Pulumi resources expect
+to find in S3.
+
+Pulumi doesn't manage these objects: they're deployed by other repositories (for example,
+hubverse-transform deploys the Lambda package). The first time the infrastructure is created,
+though, the objects don't exist yet, so the program uploads placeholders:
+
+    bootstrapper = AssetBootstrapper("hubverse-assets")
+    bootstrapper.seed([Asset(key="lambda/package.zip", content=placeholder_zip)])
+
+Each asset is checked with a HeadObject request (which doesn't download the object). Uploaded
+assets record the SHA-256 hash of their content in the object's metadata, so an asset that
+replaces existing objects (replace=True) is only uploaded when its content changes. Assets are
+checked and uploaded concurrently, using one S3 client that's shared by the whole program run.
+
+boto3 is slow to import, so it's imported the first time a client is needed (which never
+happens during a preview).
+"""
+
+from __future__ import annotations
+
+import base64
+import functools
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+# The metadata key that records the hash of an uploaded asset
+HASH_METADATA_KEY = "content-sha256"
+
+# The number of assets checked and uploaded at the same time (and the size of the client's
+# connection pool)
+MAX_WORKERS = 8
+
+
+@functools.cache
+def get_s3_client() -> Any:
+    """Return the S3 client shared by the program run (boto3 clients are thread-safe)."""
+    import boto3
+    from botocore.config import Config
+
+    return boto3.client(
+        "s3",
+        config=Config(max_pool_connections=MAX_WORKERS, retries={"max_attempts": 5, "mode": "standard"}),
+    )
+
+
+@dataclass(frozen=True)
+class Asset:
+    """
+    An object to seed in the asset bucket.
+
+    By default, an asset is only uploaded if its key doesn't exist, so that placeholders never
+    replace the objects that are deployed later. Assets with replace=True are uploaded whenever
+    their content differs from the existing object.
+    """
+
+    key: str
+    content: bytes
+    content_type: str = "application/octet-stream"
+    replace: bool = False
+
+    @property
+    def sha256(self) -> str:
+        return hashlib.sha256(self.content).hexdigest()
+
+
+class AssetBootstrapper:
+    """Seed assets in an S3 bucket, skipping those that already exist (or haven't changed)."""
+
+    def __init__(self, bucket: str, client: Any = None, max_workers: int = MAX_WORKERS):
+        self.bucket = bucket
+        self.client = client if client is not None else get_s3_client()
+        self.max_workers = max_workers
+
+    def head(self, key: str) -> dict | None:
+        """Return an object's metadata, or None if the object doesn't exist."""
+        from botocore.exceptions import ClientError
+
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            # HeadObject responses don't have a body, so a missing object is reported as a bare 404
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def seed_asset(self, asset: Asset) -> str:
+        """
+        Upload an asset if it's needed, returning what happened: "created", "updated", "exists"
+        (an existing object that isn't replaced), or "unchanged".
+        """
+        try:
+            existing = self.head(asset.key)
+            if existing is not None:
+                if not asset.replace:
+                    return "exists"
+                if existing.get("Metadata", {}).get(HASH_METADATA_KEY) == asset.sha256:
+                    return "unchanged"
+
+            digest = hashlib.sha256(asset.content).digest()
+            self.client.put_object(
+                Bucket=self.bucket,
+                Key=asset.key,
+                Body=asset.content,
+                ContentType=asset.content_type,
+                ChecksumSHA256=base64.b64encode(digest).decode(),
+                Metadata={HASH_METADATA_KEY: digest.hex()},
+            )
+        except Exception as e:
+            raise Exception(f"Error when seeding asset: {self.bucket}/{asset.key}") from e
+        return "created" if existing is None else "updated"
+
+    def seed(self, assets: list[Asset]) -> dict[str, str]:
+        """Seed assets concurrently, returning what happened to each one (keyed by asset key)."""
+        if len(assets) == 1:
+            return {assets[0].key: self.seed_asset(assets[0])}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return dict(zip([asset.key for asset in assets], executor.map(self.seed_asset, assets)))
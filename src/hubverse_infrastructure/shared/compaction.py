@@ -0,0 +1,187 @@
+"""
+Create the scheduled compaction of hubs' transformed model-output files.
+
+The transform Lambda writes one small parquet file per submission. Hubs can opt in to a scheduled
+compaction that merges them into larger files under compacted/model-output/ (see
+compaction_handler.py, which is the compaction Lambda's code):
+
+    - hub: example-hub
+      org: hubverse-org
+      repo: example-hub
+      compaction:
+        schedule: cron(0 6 ? * MON *)    # an EventBridge Scheduler expression (default: rate(1 day))
+        target_file_size_mb: 256         # the size of the compacted files (default: 128, at most 256)
+
+One compaction Lambda serves every hub. Its role can only read model-output/ and write
+compacted/ in the buckets of hubs that use compaction. Each hub gets an EventBridge Scheduler
+schedule that invokes the Lambda with the hub's bucket and settings (see scheduled_function.py).
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, fields
+
+import pulumi
+import pulumi_aws as aws
+
+from hubverse_infrastructure.shared import compaction_handler
+from hubverse_infrastructure.shared.account_context import AccountContext
+from hubverse_infrastructure.shared.policy_document import Condition, PolicyDocument, Statement
+from hubverse_infrastructure.shared.scheduled_function import ScheduledFunction, create_scheduled_function
+
+COMPACTION_LAMBDA_NAME = "hubverse-compact-model-output"
+SCHEDULER_ROLE_NAME = "hubverse-compaction-scheduler-role"
+
+# The AWS SDK for pandas layer, which provides pyarrow to the compaction Lambda
+PANDAS_LAYER = "arn:aws:lambda:{region}:336392948345:layer:AWSSDKPandas-Python312:16"
+
+COMPACTION_LAMBDA_MEMORY_MB = 3008
+
+# The compaction Lambda holds a part's source files, their decoded tables (several times the size
+# of the compressed files), and the merged file in memory at once, so compacted files have to be
+# much smaller than its memory
+MAX_TARGET_FILE_SIZE_MB = 256
+
+# EventBridge Scheduler schedule names can't be longer than 64 characters
+MAX_SCHEDULE_NAME_LENGTH = 64
+
+
+@dataclass(frozen=True)
+class CompactionSettings:
+    """A hub's compaction schedule and target file size."""
+
+    schedule: str = "rate(1 day)"
+    target_file_size_mb: int = 128
+
+    def __post_init__(self):
+        if not isinstance(self.schedule, str) or not self.schedule.startswith(("rate(", "cron(", "at(")):
+            raise ValueError(f"schedule must be a rate(), cron(), or at() expression, got '{self.schedule}'")
+        if not 1 <= self.target_file_size_mb <= MAX_TARGET_FILE_SIZE_MB:
+            raise ValueError(
+                f"target_file_size_mb must be between 1 and {MAX_TARGET_FILE_SIZE_MB}, got {self.target_file_size_mb}"
+            )
+
+
+def get_compaction_settings(hub_info: dict) -> CompactionSettings | None:
+    """Return a hub's compaction settings, or None if the hub doesn't use compaction."""
+    compaction = hub_info.get("compaction")
+    if compaction is None:
+        return None
+
+    allowed = {settings_field.name for settings_field in fields(CompactionSettings)}
+    unknown = set(compaction) - allowed
+    if unknown:
+        raise ValueError(f"{hub_info['hub']}: unknown compaction settings: {sorted(unknown)}")
+
+    try:
+        return CompactionSettings(**compaction)
+    except ValueError as e:
+        raise ValueError(f"{hub_info['hub']}: {e}") from e
+
+
+def get_compaction_buckets(hub_list: list[dict]) -> list[str]:
+    """Return the buckets of hubs that use compaction."""
+    return [hub_info["hub"] for hub_info in hub_list if get_compaction_settings(hub_info) is not None]
+
+
+def create_compaction_policy_document(buckets: list[str]) -> PolicyDocument:
+    """Create the compaction Lambda's policy document (which only covers the buckets that it compacts)."""
+
+    source_prefix = compaction_handler.SOURCE_PREFIX
+    target_prefix = compaction_handler.TARGET_PREFIX
+    return PolicyDocument(
+        statements=[
+            Statement(
+                sid="ListHubBuckets",
+                actions=["s3:ListBucket"],
+                resources=[f"arn:aws:s3:::{bucket}" for bucket in buckets],
+                conditions=[
+                    Condition(
+                        test="StringLike", variable="s3:prefix", values=[f"{source_prefix}*", f"{target_prefix}*"]
+                    )
+                ],
+            ),
+            Statement(
+                sid="ReadModelOutput",
+                actions=["s3:GetObject"],
+                resources=[
+                    f"arn:aws:s3:::{bucket}/{prefix}*"
+                    for bucket in buckets
+                    for prefix in (source_prefix, target_prefix)
+                ],
+            ),
+            Statement(
+                sid="WriteCompactedModelOutput",
+                actions=["s3:PutObject", "s3:DeleteObject"],
+                resources=[f"arn:aws:s3:::{bucket}/{target_prefix}*" for bucket in buckets],
+            ),
+            Statement(
+                sid="WriteLogs",
+                actions=["logs:CreateLogGroup", "logs:CreateLogStream", "logs:PutLogEvents"],
+                resources=["arn:aws:logs:*:*:*"],
+            ),
+        ]
+    )
+
+
+class CompactionLambda:
+    """Create the compaction Lambda the first time a hub needs it."""
+
+    def __init__(self, buckets: list[str], account_context: AccountContext):
+        self.buckets = buckets
+        self.account_context = account_context
+        self._function: ScheduledFunction | None = None
+
+    @property
+    def function(self) -> ScheduledFunction:
+        if self._function is None:
+            self._function = create_scheduled_function(
+                name=COMPACTION_LAMBDA_NAME,
+                description="Merges hubs' small transformed model-output files into larger ones",
+                handler=compaction_handler,
+                policy_document=create_compaction_policy_document(self.buckets),
+                account_context=self.account_context,
+                memory_size=COMPACTION_LAMBDA_MEMORY_MB,
+                timeout=900,
+                layers=[PANDAS_LAYER.format(region=self.account_context.region)],
+                scheduler_role_name=SCHEDULER_ROLE_NAME,
+            )
+        return self._function
+
+
+def create_compaction_schedule(
+    hub_info: dict, opts: pulumi.ResourceOptions | None = None
+) -> aws.scheduler.Schedule | None:
+    """Create the schedule that compacts a hub's transformed files (if the hub uses compaction)."""
+    settings = get_compaction_settings(hub_info)
+    if settings is None:
+        return None
+
+    hub = hub_info["hub"]
+    compaction_function = hub_info["compaction_lambda"].function
+    schedule_name = f"hubverse-compact-{hub}"
+    if len(schedule_name) > MAX_SCHEDULE_NAME_LENGTH:
+        raise ValueError(f"{hub}: hub name is too long for a compaction schedule")
+
+    return aws.scheduler.Schedule(
+        resource_name=f"{hub}-compaction",
+        name=schedule_name,
+        description=f"Compacts the {hub} hub's transformed model-output files",
+        schedule_expression=settings.schedule,
+        flexible_time_window={"mode": "FLEXIBLE", "maximum_window_in_minutes": 60},
+        target={
+            "arn": compaction_function.function.arn,
+            "role_arn": compaction_function.scheduler_role.arn,
+            "input": json.dumps(
+                {
+                    "bucket": hub,
+                    "source_prefix": compaction_handler.SOURCE_PREFIX,
+                    "target_prefix": compaction_handler.TARGET_PREFIX,
+                    "target_file_size_bytes": settings.target_file_size_mb * 1024 * 1024,
+                }
+            ),
+            "retry_policy": {"maximum_retry_attempts": 2},
+        },
+        opts=compaction_function.schedule_options(opts),
+    )
@@ -0,0 +1,178 @@
+"""
+The compaction Lambda: merge a hub's small transformed model-output files into larger ones.
+
+The transform Lambda writes one parquet file per submission, so a hub's model-output/<model_id>/
+directories fill up with small files. Compaction reads each directory's parquet files and writes
+them, merged into files of about the target size, to the same directory under compacted/:
+
+    model-output/team1-model/2024-10-05-team1-model.parquet   ->  compacted/model-output/team1-model/part-00000.parquet
+    model-output/team1-model/2024-10-12-team1-model.parquet
+
+The original files aren't changed, so a resubmitted or removed submission is still handled by the
+transform Lambda, and the next compaction picks up the change. Each compacted directory has a
+_manifest.json that records the files it was made from; directories whose files haven't changed
+since the last compaction are skipped.
+
+This module is the Lambda's whole package, so it only imports boto3 (and pyarrow, from the
+Lambda's layer, when it merges files). To run it against a bucket from the command line:
+
+    python -m hubverse_infrastructure.shared.compaction_handler example-hub --target-file-size-mb 64
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import json
+from collections.abc import Callable
+from typing import Any
+
+SOURCE_PREFIX = "model-output/"
+TARGET_PREFIX = "compacted/model-output/"
+MANIFEST_NAME = "_manifest.json"
+DEFAULT_TARGET_FILE_SIZE_BYTES = 128 * 1024 * 1024
+
+
+def merge_parquet(files: list[bytes]) -> bytes:
+    """Merge parquet files into one (columns missing from some files are filled with nulls)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    tables = [pq.read_table(io.BytesIO(content)) for content in files]
+    merged = io.BytesIO()
+    pq.write_table(pa.concat_tables(tables, promote_options="default"), merged, compression="zstd")
+    return merged.getvalue()
+
+
+def list_directories(client: Any, bucket: str, prefix: str) -> dict[str, list[dict]]:
+    """Return the parquet files under prefix, grouped by directory and sorted by key."""
+    directories: dict[str, list[dict]] = {}
+    for page in client.get_paginator("list_objects_v2").paginate(Bucket=bucket, Prefix=prefix):
+        for obj in page.get("Contents", []):
+            key = obj["Key"]
+            if key.endswith(".parquet"):
+                directories.setdefault(key.rsplit("/", 1)[0] + "/", []).append(obj)
+    return {directory: sorted(files, key=lambda obj: obj["Key"]) for directory, files in sorted(directories.items())}
+
+
+def plan_parts(files: list[dict], target_file_size: int) -> list[list[dict]]:
+    """Group files (in order) into parts of about target_file_size bytes."""
+    parts: list[list[dict]] = []
+    part_size = 0
+    for obj in files:
+        if not parts or part_size + obj["Size"] > target_file_size:
+            parts.append([])
+            part_size = 0
+        parts[-1].append(obj)
+        part_size += obj["Size"]
+    return parts
+
+
+def get_fingerprint(files: list[dict]) -> str:
+    """Return a hash of a directory's files (their keys and ETags)."""
+    return hashlib.sha256(json.dumps([[obj["Key"], obj["ETag"]] for obj in files]).encode()).hexdigest()
+
+
+def read_manifest(client: Any, bucket: str, key: str) -> dict | None:
+    try:
+        return json.loads(client.get_object(Bucket=bucket, Key=key)["Body"].read())
+    except client.exceptions.NoSuchKey:
+        return None
+
+
+def compact_directory(
+    client: Any,
+    bucket: str,
+    files: list[dict],
+    target_directory: str,
+    target_file_size: int,
+    merge: Callable[[list[bytes]], bytes],
+) -> dict:
+    """Compact one directory's files, unless they haven't changed since the last compaction."""
+    manifest_key = f"{target_directory}{MANIFEST_NAME}"
+    fingerprint = get_fingerprint(files)
+    manifest = read_manifest(client, bucket, manifest_key)
+    if manifest is not None and manifest["fingerprint"] == fingerprint:
+        return {"status": "unchanged", "files": len(files), "parts": len(manifest["parts"])}
+
+    part_keys = []
+    for i, part in enumerate(plan_parts(files, target_file_size)):
+        contents = [client.get_object(Bucket=bucket, Key=obj["Key"])["Body"].read() for obj in part]
+        part_key = f"{target_directory}part-{i:05d}.parquet"
+        client.put_object(Bucket=bucket, Key=part_key, Body=merge(contents))
+        part_keys.append(part_key)
+
+    # parts left over from a compaction that had more of them
+    for old_key in (manifest or {}).get("parts", []):
+        if old_key not in part_keys:
+            client.delete_object(Bucket=bucket, Key=old_key)
+
+    # written last, so an interrupted compaction is redone on the next run
+    new_manifest = {"fingerprint": fingerprint, "sources": [obj["Key"] for obj in files], "parts": part_keys}
+    client.put_object(Bucket=bucket, Key=manifest_key, Body=json.dumps(new_manifest, indent=2).encode())
+    return {"status": "compacted", "files": len(files), "parts": len(part_keys)}
+
+
+def compact_bucket(
+    client: Any,
+    bucket: str,
+    source_prefix: str = SOURCE_PREFIX,
+    target_prefix: str = TARGET_PREFIX,
+    target_file_size: int = DEFAULT_TARGET_FILE_SIZE_BYTES,
+    merge: Callable[[list[bytes]], bytes] = merge_parquet,
+) -> dict:
+    """Compact every directory under source_prefix, returning what happened to each one."""
+    directories = {}
+    for directory, files in list_directories(client, bucket, source_prefix).items():
+        target_directory = target_prefix + directory.removeprefix(source_prefix)
+        directories[directory] = compact_directory(client, bucket, files, target_directory, target_file_size, merge)
+
+    # directories whose files were all removed
+    for directory in list_directories_with_manifests(client, bucket, target_prefix):
+        source_directory = source_prefix + directory.removeprefix(target_prefix)
+        if source_directory not in directories:
+            manifest_key = f"{directory}{MANIFEST_NAME}"
+            manifest = read_manifest(client, bucket, manifest_key) or {}
+            for key in [*manifest.get("parts", []), manifest_key]:
+                client.delete_object(Bucket=bucket, Key=key)
+            directories[source_directory] = {"status": "removed", "files": 0, "parts": 0}
+
+    return {"bucket": bucket, "directories": directories}
+
+
+def list_directories_with_manifests(client: Any, bucket: str, prefix: str) -> list[str]:
+    directories = []
+    for page in client.get_paginator("list_objects_v2").paginate(Bucket=bucket, Prefix=prefix):
+        for obj in page.get("Contents", []):
+            if obj["Key"].endswith(f"/{MANIFEST_NAME}"):
+                directories.append(obj["Key"].removesuffix(MANIFEST_NAME))
+    return directories
+
+
+def lambda_handler(event: dict, context: Any) -> dict:
+    """Compact the bucket named in the event (which the hub's compaction schedule sends)."""
+    import boto3
+
+    result = compact_bucket(
+        boto3.client("s3"),
+        event["bucket"],
+        source_prefix=event.get("source_prefix", SOURCE_PREFIX),
+        target_prefix=event.get("target_prefix", TARGET_PREFIX),
+        target_file_size=event.get("target_file_size_bytes", DEFAULT_TARGET_FILE_SIZE_BYTES),
+    )
+    print(json.dumps(result))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact a hub bucket's transformed model-output files.")
+    parser.add_argument("bucket")
+    parser.add_argument("--target-file-size-mb", type=int, default=DEFAULT_TARGET_FILE_SIZE_BYTES // (1024 * 1024))
+    args = parser.parse_args()
+    event = {"bucket": args.bucket, "target_file_size_bytes": args.target_file_size_mb * 1024 * 1024}
+    lambda_handler(event, None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Named compute profiles for the model-output transform Lambda.
+
+Each profile gets its own transform Lambda function, so hubs with large model-output files can
+get more memory and storage without every hub paying for them. Profiles are declared in the
+stack's Pulumi config:
+
+    config:
+      hubverse-aws:compute_profiles:
+        large:
+          memory_size: 4096
+          ephemeral_storage: 4096
+          architecture: x86_64
+          reserved_concurrency: 20
+          provisioned_concurrency: 2
+
+and hubs choose a profile in hubs.yaml:
+
+    - hub: example-hub
+      org: hubverse-org
+      repo: example-hub
+      compute_profile: large
+
+Hubs without a compute_profile use the "default" profile, which keeps the settings of the
+original (pre-profile) transform Lambda unless it's overridden in the config.
+
+Note: the transform Lambda's code is deployed by the hubverse-transform repository, which must
+update every profile's function (and, for profiles with provisioned concurrency, publish a new
+version and point the profile's alias at it). Profiles that use arm64 need an arm64 build of
+the Lambda package.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, fields
+
+import pulumi_aws as aws
+
+DEFAULT_PROFILE_NAME = "default"
+ARCHITECTURES = ("x86_64", "arm64")
+PROFILE_NAME_PATTERN = re.compile(r"^[a-z0-9]+(-[a-z0-9]+)*$")
+
+
+@dataclass(frozen=True)
+class ComputeProfile:
+    """Lambda settings for one compute profile."""
+
+    name: str = DEFAULT_PROFILE_NAME
+    memory_size: int = 500
+    timeout: int = 600
+    architecture: str = "x86_64"
+    ephemeral_storage: int = 512
+    reserved_concurrency: int | None = None
+    provisioned_concurrency: int | None = None
+
+    def __post_init__(self):
+        if not PROFILE_NAME_PATTERN.match(self.name):
+            raise ValueError(f"compute profile names must be lowercase letters, numbers, and dashes: '{self.name}'")
+        if not 128 <= self.memory_size <= 10240:
+            raise ValueError(f"{self.name}: memory_size must be between 128 and 10240 MB, got {self.memory_size}")
+        if not 1 <= self.timeout <= 900:
+            raise ValueError(f"{self.name}: timeout must be between 1 and 900 seconds, got {self.timeout}")
+        if self.architecture not in ARCHITECTURES:
+            raise ValueError(f"{self.name}: architecture must be one of {ARCHITECTURES}, got '{self.architecture}'")
+        if not 512 <= self.ephemeral_storage <= 10240:
+            raise ValueError(
+                f"{self.name}: ephemeral_storage must be between 512 and 10240 MB, got {self.ephemeral_storage}"
+            )
+        if self.reserved_concurrency is not None and self.reserved_concurrency < 0:
+            raise ValueError(f"{self.name}: reserved_concurrency can't be negative")
+        if self.provisioned_concurrency is not None:
+            if self.provisioned_concurrency < 1:
+                raise ValueError(f"{self.name}: provisioned_concurrency must be at least 1")
+            if self.reserved_concurrency is not None and self.provisioned_concurrency > self.reserved_concurrency:
+                raise ValueError(f"{self.name}: provisioned_concurrency can't be more than reserved_concurrency")
+
+    def function_name(self, base_name: str) -> str:
+        """The name of this profile's transform function (the default profile keeps the original name)."""
+        if self.name == DEFAULT_PROFILE_NAME:
+            return base_name
+        return f"{base_name}-{self.name}"
+
+
+@dataclass(frozen=True)
+class TransformFunction:
+    """A compute profile's transform Lambda function (and its alias, if it uses provisioned concurrency)."""
+
+    profile: ComputeProfile
+    function: aws.lambda_.Function
+    alias: aws.lambda_.Alias | None = None
+
+    @property
+    def arn(self):
+        """The ARN that triggers should invoke (the alias, so that provisioned concurrency is used)."""
+        if self.alias is not None:
+            return self.alias.arn
+        return self.function.arn
+
+
+def load_compute_profiles(config: dict | None) -> dict[str, ComputeProfile]:
+    """
+    Create compute profiles from the compute_profiles Pulumi config value.
+
+    The default profile is always included.
+    """
+    config = config or {}
+    allowed = {field.name for field in fields(ComputeProfile)} - {"name"}
+    profiles = {DEFAULT_PROFILE_NAME: ComputeProfile()}
+    for name, settings in config.items():
+        settings = settings or {}
+        unknown = set(settings) - allowed
+        if unknown:
+            raise ValueError(f"{name}: unknown compute profile settings: {sorted(unknown)}")
+        profiles[name] = ComputeProfile(name=name, **settings)
+    return profiles
+
+
+def get_compute_profile_name(hub_info: dict, profiles: dict[str, ComputeProfile]) -> str:
+    """Return the name of a hub's compute profile."""
+    name = hub_info.get("compute_profile", DEFAULT_PROFILE_NAME)
+    if name not in profiles:
+        raise ValueError(f"{hub_info['hub']}: unknown compute_profile '{name}' (available: {sorted(profiles)})")
+    return name
@@ -1,55 +1,61 @@
 """Create the AWS infrastructure needed to run Hubverse model-output transformations as Lambda functions."""
+
+from __future__ import annotations
+
 import io
-from zipfile import ZipFile
+from zipfile import ZipFile, ZipInfo
 
-import boto3
 import pulumi
 import pulumi_aws as aws
-from botocore.exceptions import ClientError
-from cloudpathlib import CloudPath
 from pulumi import ResourceOptions  # type: ignore
 
+from hubverse_infrastructure.shared.account_context import AccountContext
+from hubverse_infrastructure.shared.assets import Asset, AssetBootstrapper
+from hubverse_infrastructure.shared.compute_profiles import ComputeProfile, TransformFunction, load_compute_profiles
+from hubverse_infrastructure.shared.policy_document import Condition, PolicyDocument, Principal, Statement
 
-def create_bucket(bucket_name: str) -> aws.s3.BucketV2:
-    """
-    Create the S3 bucket used to store shared Hubverse assets and give the AWS Lambda service read access to it.
-    """
+# The default compute profile's transform function (other profiles add their name to it)
+TRANSFORM_LAMBDA_NAME = "hubverse-transform-model-output"
 
-    hubverse_asset_bucket = aws.s3.BucketV2(bucket_name, bucket=bucket_name, tags={"hub": "hubverse"})
 
-    # Create an S3 policy that allows the AWS Lambda service to read from the bucket
-    # (this is a permissive read policy because it applies to any lambda function, but the Hubverse
-    # deals in open source data and code, so we can leave keep it open for simplicity).
-    s3_policy_document = aws.iam.get_policy_document(
+def create_asset_bucket_policy_document(bucket_name: str) -> PolicyDocument:
+    """Create the bucket policy document that gives the AWS Lambda service read access to the asset bucket."""
+
+    return PolicyDocument(
         statements=[
-            aws.iam.GetPolicyDocumentStatementArgs(
+            Statement(
                 sid="ReadAssetBucket",
                 actions=[
                     "s3:GetObject",
                     "s3:GetObjectAcl",
                 ],
-                principals=[
-                    aws.iam.GetPolicyDocumentStatementPrincipalArgs(
-                        type="Service", identifiers=["lambda.amazonaws.com"]
-                    ),
-                ],
+                principals=[Principal(type="Service", identifiers=["lambda.amazonaws.com"])],
                 resources=[f"arn:aws:s3:::{bucket_name}/*"],
             ),
-            aws.iam.GetPolicyDocumentStatementArgs(
+            Statement(
                 sid="ListAssetBucket",
                 actions=[
                     "s3:ListBucket",
                 ],
-                principals=[
-                    aws.iam.GetPolicyDocumentStatementPrincipalArgs(
-                        type="Service", identifiers=["lambda.amazonaws.com"]
-                    ),
-                ],
+                principals=[Principal(type="Service", identifiers=["lambda.amazonaws.com"])],
                 resources=[f"arn:aws:s3:::{bucket_name}"],
             ),
         ]
     )
 
+
+def create_bucket(bucket_name: str) -> aws.s3.BucketV2:
+    """
+    Create the S3 bucket used to store shared Hubverse assets and give the AWS Lambda service read access to it.
+    """
+
+    hubverse_asset_bucket = aws.s3.BucketV2(bucket_name, bucket=bucket_name, tags={"hub": "hubverse"})
+
+    # Create an S3 policy that allows the AWS Lambda service to read from the bucket
+    # (this is a permissive read policy because it applies to any lambda function, but the Hubverse
+    # deals in open source data and code, so we can leave keep it open for simplicity).
+    s3_policy_document = create_asset_bucket_policy_document(bucket_name)
+
     # Apply the policy to the bucket.
     aws.s3.BucketPolicy(
         resource_name=f"{bucket_name}-read-bucket-policy",
@@ -61,15 +67,12 @@ def create_bucket(bucket_name: str) -> aws.s3.BucketV2:
     return hubverse_asset_bucket
 
 
-def create_cloudwatch_write_policy(policy_name: str) -> aws.iam.Policy:
-    """
-    Create a policy that allows write access to AWS CloudWatch logs
-    (we'll need to attach this to the Lambda execution role)
-    """
+def create_cloudwatch_write_policy_document() -> PolicyDocument:
+    """Create the policy document that allows writing to AWS CloudWatch logs."""
 
-    cloudwatch_write_policy_document = aws.iam.get_policy_document(
+    return PolicyDocument(
         statements=[
-            aws.iam.GetPolicyDocumentStatementArgs(
+            Statement(
                 actions=[
                     "logs:PutLogEvents",
                     "logs:CreateLogGroup",
@@ -80,6 +83,15 @@ def create_cloudwatch_write_policy(policy_name: str) -> aws.iam.Policy:
         ]
     )
 
+
+def create_cloudwatch_write_policy(policy_name: str) -> aws.iam.Policy:
+    """
+    Create a policy that allows write access to AWS CloudWatch logs
+    (we'll need to attach this to the Lambda execution role)
+    """
+
+    cloudwatch_write_policy_document = create_cloudwatch_write_policy_document()
+
     cloudwatch_write_policy_name = policy_name
     cloudwatch_write_policy = aws.iam.Policy(
         name=cloudwatch_write_policy_name,
@@ -92,40 +104,52 @@ def create_cloudwatch_write_policy(policy_name: str) -> aws.iam.Policy:
     return cloudwatch_write_policy
 
 
-def create_lambda_execution_permissions(lambda_name: str) -> aws.iam.Role:
-    """
-    Create IAM role that the hubverse-transform lambda will assume and attach the necessary permissions.
-    """
-
-    # Because getting ARNs from Pulumi resources is terrible, the code below manually constructs the ARN
-    # of the hubverse-transform lambda function. To do that, we need the current AWS account id and its
-    # default region.
-    aws_account = aws.get_caller_identity().account_id
-    aws_region = aws.get_region().name
+def create_lambda_role_policy_document(lambda_names: list[str], aws_region: str, aws_account: str) -> PolicyDocument:
+    """Create the trust policy document that limits the Lambda execution role to the named functions."""
 
-    # Create the role used by the lambda function, and limit its use to hubverse-transform lambda function
-    lambda_role_document = aws.iam.get_policy_document(
+    return PolicyDocument(
         statements=[
-            aws.iam.GetPolicyDocumentStatementArgs(
+            Statement(
                 effect="Allow",
                 principals=[
-                    aws.iam.GetPolicyDocumentStatementPrincipalArgs(
+                    Principal(
                         type="Service",
                         identifiers=["lambda.amazonaws.com"],
                     )
                 ],
                 actions=["sts:AssumeRole"],
                 conditions=[
-                    aws.iam.GetPolicyDocumentStatementConditionArgs(
+                    Condition(
                         test="StringEquals",
                         variable="aws:SourceArn",
-                        values=[f"arn:aws:lambda:{aws_region}:{aws_account}:function:{lambda_name}"],
+                        values=[
+                            f"arn:aws:lambda:{aws_region}:{aws_account}:function:{lambda_name}"
+                            for lambda_name in lambda_names
+                        ],
                     ),
                 ],
             )
         ]
     )
 
+
+def create_lambda_execution_permissions(
+    lambda_name: str, function_names: list[str], account_context: AccountContext
+) -> aws.iam.Role:
+    """
+    Create IAM role that the hubverse-transform lambda functions (one per compute profile) will assume
+    and attach the necessary permissions.
+    """
+
+    # Because getting ARNs from Pulumi resources is terrible, the code below manually constructs the ARN
+    # of the hubverse-transform lambda function. To do that, we need the current AWS account id and its
+    # default region.
+    aws_account = account_context.account_id
+    aws_region = account_context.region
+
+    # Create the role used by the lambda functions, and limit its use to hubverse-transform lambda functions
+    lambda_role_document = create_lambda_role_policy_document(function_names, aws_region, aws_account)
+
     lambda_role = aws.iam.Role(
         name=f"{lambda_name}-role",
         resource_name=f"{lambda_name}-role",
@@ -144,19 +168,21 @@ def create_lambda_execution_permissions(lambda_name: str) -> aws.iam.Role:
 
 
 def create_transform_lambda(
-    lambda_name: str, package_location: CloudPath, lambda_role: aws.iam.Role, hubverse_asset_bucket: aws.s3.BucketV2
-) -> aws.lambda_.Function:
+    lambda_name: str,
+    package_bucket: str,
+    package_key: str,
+    lambda_role: aws.iam.Role,
+    hubverse_asset_bucket: aws.s3.BucketV2,
+    profile: ComputeProfile,
+) -> TransformFunction:
     """
-    Create the scaffolding for the Lambda function that transforms a model-output file.
+    Create the scaffolding for the Lambda function that transforms a model-output file, sized
+    according to a compute profile.
     """
 
-    s3_bucket = package_location.drive
-    s3_key = package_location.key  # type: ignore
-
-    # Using arn.apply below ensures that the create_lambda_package_placeholder doesn't run
-    # until the hubverse_asset_bucket exists (because a bucket's arn isn't available until
-    # the bucket has been physically created on AWS).
-    hubverse_asset_bucket.arn.apply(lambda _: create_lambda_package_placeholder(s3_bucket, s3_key))
+    # Provisioned concurrency only applies to a published version, so profiles that use it
+    # publish a version and are invoked through an alias.
+    use_alias = profile.provisioned_concurrency is not None
 
     transform_lambda = aws.lambda_.Function(
         name=lambda_name,
@@ -166,15 +192,43 @@ def create_transform_lambda(
         handler="lambda_function.lambda_handler",
         package_type="Zip",
         runtime="python3.12",
-        s3_bucket=s3_bucket,
-        s3_key=s3_key,
+        s3_bucket=package_bucket,
+        s3_key=package_key,
         tags={"hub": "hubverse"},
-        memory_size=500,
-        timeout=600,
+        memory_size=profile.memory_size,
+        timeout=profile.timeout,
+        architectures=[profile.architecture],
+        ephemeral_storage={"size": profile.ephemeral_storage},
+        reserved_concurrent_executions=profile.reserved_concurrency,
+        publish=use_alias,
         opts=ResourceOptions(depends_on=[hubverse_asset_bucket]),
     )
 
-    return transform_lambda
+    if not use_alias:
+        return TransformFunction(profile=profile, function=transform_lambda)
+
+    alias = aws.lambda_.Alias(
+        resource_name=f"{lambda_name}-live",
+        name="live",
+        function_name=transform_lambda.name,
+        function_version=transform_lambda.version,
+    )
+    aws.lambda_.ProvisionedConcurrencyConfig(
+        resource_name=f"{lambda_name}-provisioned-concurrency",
+        function_name=transform_lambda.name,
+        qualifier=alias.name,
+        provisioned_concurrent_executions=profile.provisioned_concurrency,
+    )
+
+    return TransformFunction(profile=profile, function=transform_lambda, alias=alias)
+
+
+def create_placeholder_zip() -> bytes:
+    """Return the placeholder Lambda package (with a fixed timestamp, so that its hash never changes)."""
+    placeholder_zip = io.BytesIO()
+    with ZipFile(placeholder_zip, "w") as zip_file:
+        zip_file.writestr(ZipInfo("placeholder", date_time=(1980, 1, 1, 0, 0, 0)), b"lambda function placeholder")
+    return placeholder_zip.getvalue()
 
 
 def create_lambda_package_placeholder(s3_bucket: str, s3_key: str):
@@ -192,38 +246,46 @@ def create_lambda_package_placeholder(s3_bucket: str, s3_key: str):
     # AWS infrastructure. However, if the code package (which is deployed by the hubverse-transform
     # repo) doesn't exist yet, we need to create a placeholder zip file. It's a chicken-and-egg problem
     # that should only occur until the hubverse-transform deployment pipeline is up and running)
+    # The placeholder never replaces an existing package.
+    AssetBootstrapper(s3_bucket).seed(
+        [Asset(key=s3_key, content=create_placeholder_zip(), content_type="application/zip")]
+    )
+
 
-    s3 = boto3.resource("s3")
-    lambda_package = s3.Object(s3_bucket, s3_key)
-    try:
-        lambda_package.get()
-    except ClientError as e:
-        if e.response.get("Error", {}).get("Code") == "NoSuchKey":
-            placeholder_zip = io.BytesIO()
-            zip_file = ZipFile(placeholder_zip, "w")
-            zip_file.writestr("placeholder", b"lambda function placeholder")
-            zip_file.close()
-            placeholder_zip.seek(0)
-            lambda_package.put(Body=placeholder_zip)
-        else:
-            raise Exception(f"Boto error when checking for existing lambda package: {s3_bucket}/{s3_key}") from e
-    except Exception as e:
-        raise Exception(f"Error when checking for existing lambda package: {s3_bucket}/{s3_key}") from e
-
-
-def create_transform_infrastructure() -> tuple[aws.lambda_.Function, aws.iam.Role]:
+def create_transform_infrastructure(
+    account_context: AccountContext, compute_profiles: dict[str, ComputeProfile] | None = None
+) -> tuple[dict[str, TransformFunction], aws.iam.Role]:
     """
-    Create all AWS infrastructure required to support the lambda function that will
-    operate on cloud-based model-output files.
+    Create all AWS infrastructure required to support the lambda functions (one per compute
+    profile) that will operate on cloud-based model-output files.
     """
     bucket_name = "hubverse-assets"
-    lambda_name = "hubverse-transform-model-output"
-    lambda_package_location = "s3://hubverse-assets/lambda/hubverse-transform-model-output.zip"
-    lambda_package_path = CloudPath(lambda_package_location)  # type: ignore
+    lambda_name = TRANSFORM_LAMBDA_NAME
+    lambda_package_key = "lambda/hubverse-transform-model-output.zip"
+
+    if compute_profiles is None:
+        compute_profiles = load_compute_profiles(None)
 
     bucket = create_bucket(bucket_name)
-    model_output_lambda_role = create_lambda_execution_permissions(lambda_name)
-    model_output_lambda = create_transform_lambda(lambda_name, lambda_package_path, model_output_lambda_role, bucket)
 
-    # return the lambda's role so we can attach hub-specific policies to it
-    return model_output_lambda, model_output_lambda_role
+    # Using arn.apply below ensures that the create_lambda_package_placeholder doesn't run
+    # until the hubverse_asset_bucket exists (because a bucket's arn isn't available until
+    # the bucket has been physically created on AWS).
+    bucket.arn.apply(lambda _: create_lambda_package_placeholder(bucket_name, lambda_package_key))
+
+    function_names = [profile.function_name(lambda_name) for profile in compute_profiles.values()]
+    model_output_lambda_role = create_lambda_execution_permissions(lambda_name, function_names, account_context)
+    model_output_lambdas = {
+        name: create_transform_lambda(
+            profile.function_name(lambda_name),
+            bucket_name,
+            lambda_package_key,
+            model_output_lambda_role,
+            bucket,
+            profile,
+        )
+        for name, profile in compute_profiles.items()
+    }
+
+    # return the lambdas' role so we can attach hub-specific policies to it
+    return model_output_lambdas, model_output_lambda_role
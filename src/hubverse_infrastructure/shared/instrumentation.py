@@ -0,0 +1,239 @@
+"""
+Opt-in timing of the Pulumi program, to find out where deploy time goes as the hub list grows.
+
+Instrumentation is off by default. Turn it on with the instrumentation Pulumi config value:
+
+    config:
+      hubverse-aws:instrumentation: true
+
+or with the HUBVERSE_INSTRUMENTATION environment variable (for a single run):
+
+    HUBVERSE_INSTRUMENTATION=1 pulumi preview
+
+When it's on, the program records how long each phase takes (the shared infrastructure and each
+hub's S3, Athena, and IAM resources), how many provider invokes it makes and how long they take,
+and how many resources it registers (by type and by hub). It writes everything to a JSON report
+(hubverse-instrumentation.json, or the path in HUBVERSE_INSTRUMENTATION_REPORT) and exports a
+summary as the instrumentation stack output.
+
+The durations cover the program's evaluation: the time spent declaring resources and waiting for
+invokes. Pulumi creates and updates resources after the program declares them, so the time
+spent waiting on AWS isn't included.
+
+To compare two reports (for example, before and after adding hubs):
+
+    python -m hubverse_infrastructure.shared.instrumentation old.json new.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import os
+import time
+from collections import Counter, defaultdict
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Any
+
+import pulumi
+
+ENABLE_ENV_VAR = "HUBVERSE_INSTRUMENTATION"
+REPORT_ENV_VAR = "HUBVERSE_INSTRUMENTATION_REPORT"
+DEFAULT_REPORT_PATH = "hubverse-instrumentation.json"
+REPORT_VERSION = 1
+
+# The phase that covers all of a hub's resources (the hub's other phases are part of it)
+HUB_PHASE = "hub"
+
+# The number of slowest hubs included in the stack output summary
+SUMMARY_HUB_COUNT = 10
+
+
+class Instrumentation:
+    """
+    Durations, invokes, and resource counts recorded while the program runs.
+
+    A disabled Instrumentation (the default) records nothing, so the program can call it
+    unconditionally.
+    """
+
+    def __init__(self, enabled: bool = False, report_path: Path | str | None = None):
+        self.enabled = enabled
+        self.report_path = Path(report_path) if report_path is not None else None
+        self.phases: dict[str, list[float]] = defaultdict(list)
+        self.hubs: dict[str, dict[str, float]] = defaultdict(dict)
+        self.invokes: dict[str, list[float]] = defaultdict(list)
+        self.resource_types: Counter[str] = Counter()
+        self.hub_resources: Counter[str] = Counter()
+        self._current_hub: str | None = None
+        self._start = time.perf_counter()
+
+    @classmethod
+    def from_config(cls, config: pulumi.Config) -> Instrumentation:
+        """Create the program's instrumentation from the Pulumi config and the environment."""
+        enabled = config.get_bool("instrumentation") or os.environ.get(ENABLE_ENV_VAR, "") not in ("", "0", "false")
+        report_path = os.environ.get(REPORT_ENV_VAR) or DEFAULT_REPORT_PATH
+        return cls(enabled=enabled, report_path=report_path)
+
+    def start(self):
+        """Start recording (resources are counted from this point on)."""
+        if not self.enabled:
+            return
+        self._start = time.perf_counter()
+        pulumi.runtime.register_stack_transformation(self._count_resource)
+
+    def _count_resource(self, args: pulumi.ResourceTransformationArgs) -> None:
+        self.resource_types[args.type_] += 1
+        if self._current_hub is not None:
+            self.hub_resources[self._current_hub] += 1
+        # leave the resource unchanged
+        return None
+
+    def phase(self, name: str, hub: str | None = None) -> contextlib.AbstractContextManager:
+        """
+        Return a context manager that times a phase of the program. Phases with a hub are also
+        recorded under that hub, and the resources registered during them are counted for it.
+        """
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self._timed_phase(name, hub)
+
+    @contextlib.contextmanager
+    def _timed_phase(self, name: str, hub: str | None) -> Iterator[None]:
+        previous_hub = self._current_hub
+        if hub is not None:
+            self._current_hub = hub
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            self.phases[name].append(duration)
+            if hub is not None:
+                self.hubs[hub][name] = self.hubs[hub].get(name, 0) + duration
+            self._current_hub = previous_hub
+
+    def time_invoke(self, name: str, invoke: Callable[[], Any]) -> Any:
+        """Call a provider invoke, recording how long it takes."""
+        if not self.enabled:
+            return invoke()
+        start = time.perf_counter()
+        try:
+            return invoke()
+        finally:
+            self.invokes[name].append(time.perf_counter() - start)
+
+    def report(self) -> dict:
+        """Return everything that was recorded."""
+        return {
+            "version": REPORT_VERSION,
+            "total_seconds": round(time.perf_counter() - self._start, 4),
+            "hub_count": len(self.hubs),
+            "phases": {name: summarize_durations(durations) for name, durations in sorted(self.phases.items())},
+            "hubs": {
+                hub: {
+                    "seconds": round(phases.get(HUB_PHASE, sum(phases.values())), 4),
+                    "phases": {name: round(seconds, 4) for name, seconds in phases.items()},
+                    "resources": self.hub_resources[hub],
+                }
+                for hub, phases in self.hubs.items()
+            },
+            "invokes": {name: summarize_durations(durations) for name, durations in sorted(self.invokes.items())},
+            "resources": {
+                "total": sum(self.resource_types.values()),
+                "by_type": dict(sorted(self.resource_types.items())),
+            },
+        }
+
+    def summary(self, report: dict | None = None) -> dict:
+        """Return a small version of the report for the stack output."""
+        report = report or self.report()
+        slowest = sorted(report["hubs"].items(), key=lambda item: item[1]["seconds"], reverse=True)
+        return {
+            "total_seconds": report["total_seconds"],
+            "hub_count": report["hub_count"],
+            "phase_seconds": {name: phase["total_seconds"] for name, phase in report["phases"].items()},
+            "invoke_count": sum(invoke["count"] for invoke in report["invokes"].values()),
+            "invoke_seconds": round(sum(invoke["total_seconds"] for invoke in report["invokes"].values()), 4),
+            "resource_count": report["resources"]["total"],
+            "slowest_hubs": {hub: details["seconds"] for hub, details in slowest[:SUMMARY_HUB_COUNT]},
+        }
+
+    def finish(self):
+        """Write the JSON report and export the summary stack output (if instrumentation is on)."""
+        if not self.enabled:
+            return
+        report = self.report()
+        if self.report_path is not None:
+            self.report_path.write_text(json.dumps(report, indent=2) + "\n")
+        pulumi.export("instrumentation", self.summary(report))
+
+
+def summarize_durations(durations: list[float]) -> dict:
+    return {
+        "count": len(durations),
+        "total_seconds": round(sum(durations), 4),
+        "max_seconds": round(max(durations), 4),
+    }
+
+
+def compare_reports(old: dict, new: dict, hub_count: int = SUMMARY_HUB_COUNT) -> list[str]:
+    """Return the lines of a comparison between two instrumentation reports."""
+
+    def change(old_value: float, new_value: float) -> str:
+        line = f"{old_value:>10.3f} {new_value:>10.3f} {new_value - old_value:>+10.3f}"
+        if old_value:
+            line += f" {(new_value - old_value) / old_value:>+8.0%}"
+        return line
+
+    header = f"{'':<40} {'old':>10} {'new':>10} {'change':>10}"
+    lines = [header, f"{'total seconds':<40} {change(old['total_seconds'], new['total_seconds'])}"]
+    lines.append(
+        f"{'hubs':<40} {old['hub_count']:>10} {new['hub_count']:>10} {new['hub_count'] - old['hub_count']:>+10}"
+    )
+    old_resources, new_resources = old["resources"]["total"], new["resources"]["total"]
+    lines.append(f"{'resources':<40} {old_resources:>10} {new_resources:>10} {new_resources - old_resources:>+10}")
+
+    for section in ("phases", "invokes"):
+        lines.append("")
+        lines.append(f"{section} (total seconds)")
+        for name in sorted(set(old[section]) | set(new[section])):
+            old_seconds = old[section].get(name, {}).get("total_seconds", 0)
+            new_seconds = new[section].get(name, {}).get("total_seconds", 0)
+            lines.append(f"  {name:<38} {change(old_seconds, new_seconds)}")
+
+    # the hubs whose time changed the most
+    hubs = set(old["hubs"]) | set(new["hubs"])
+    changes = {
+        hub: new["hubs"].get(hub, {}).get("seconds", 0) - old["hubs"].get(hub, {}).get("seconds", 0) for hub in hubs
+    }
+    if changes:
+        lines.append("")
+        lines.append("hubs with the largest changes (seconds)")
+        for hub in sorted(changes, key=lambda hub: abs(changes[hub]), reverse=True)[:hub_count]:
+            old_seconds = old["hubs"].get(hub, {}).get("seconds", 0)
+            new_seconds = new["hubs"].get(hub, {}).get("seconds", 0)
+            lines.append(f"  {hub:<38} {change(old_seconds, new_seconds)}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare two Hubverse instrumentation reports.",
+    )
+    parser.add_argument("old", type=Path, help="the earlier report")
+    parser.add_argument("new", type=Path, help="the later report")
+    parser.add_argument(
+        "--hubs", type=int, default=SUMMARY_HUB_COUNT, help="number of changed hubs to show (default: %(default)s)"
+    )
+    args = parser.parse_args()
+
+    old = json.loads(args.old.read_text())
+    new = json.loads(args.new.read_text())
+    print("\n".join(compare_reports(old, new, args.hubs)))
+
+
+if __name__ == "__main__":
+    main()
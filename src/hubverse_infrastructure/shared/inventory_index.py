@@ -0,0 +1,90 @@
+"""
+Create the Lambda that keeps hubs' inventory/index.json pointed at their latest S3 Inventory.
+
+Hubs that opt in to an inventory (see hubs/inventory.py) get a new delivery every day. One
+Lambda (see inventory_index_handler.py, which is its code) serves every such hub: an EventBridge
+Scheduler schedule (see scheduled_function.py) invokes it every few hours with the list of
+inventory buckets, and it updates the index of each bucket that has a new delivery. The Lambda's role can only list and read
+inventory/ and write inventory/index.json in those buckets.
+
+The Lambda and its schedule are shared resources, so in a sharded deployment the shared stack
+creates them and hub stacks don't refer to them.
+"""
+
+from __future__ import annotations
+
+import json
+
+import pulumi_aws as aws
+
+from hubverse_infrastructure.shared import inventory_index_handler
+from hubverse_infrastructure.shared.account_context import AccountContext
+from hubverse_infrastructure.shared.policy_document import Condition, PolicyDocument, Statement
+from hubverse_infrastructure.shared.scheduled_function import create_scheduled_function
+
+INDEX_LAMBDA_NAME = "hubverse-inventory-index"
+
+# S3 delivers inventories once a day at varying times, so the index is checked more often
+INDEX_SCHEDULE = "rate(6 hours)"
+
+
+def create_inventory_index_policy_document(buckets: list[str]) -> PolicyDocument:
+    """Create the inventory index Lambda's policy document (which only covers inventory buckets)."""
+
+    inventory_prefix = inventory_index_handler.INVENTORY_PREFIX
+    return PolicyDocument(
+        statements=[
+            Statement(
+                sid="ListInventories",
+                actions=["s3:ListBucket"],
+                resources=[f"arn:aws:s3:::{bucket}" for bucket in buckets],
+                conditions=[Condition(test="StringLike", variable="s3:prefix", values=[f"{inventory_prefix}*"])],
+            ),
+            Statement(
+                sid="ReadInventories",
+                actions=["s3:GetObject"],
+                resources=[f"arn:aws:s3:::{bucket}/{inventory_prefix}*" for bucket in buckets],
+            ),
+            Statement(
+                sid="WriteInventoryIndex",
+                actions=["s3:PutObject"],
+                resources=[f"arn:aws:s3:::{bucket}/{inventory_index_handler.INDEX_KEY}" for bucket in buckets],
+            ),
+            Statement(
+                sid="WriteLogs",
+                actions=["logs:CreateLogGroup", "logs:CreateLogStream", "logs:PutLogEvents"],
+                resources=["arn:aws:logs:*:*:*"],
+            ),
+        ]
+    )
+
+
+def create_inventory_index(buckets: list[str], account_context: AccountContext) -> aws.scheduler.Schedule | None:
+    """Create the inventory index Lambda and its schedule (if any hub uses an inventory)."""
+    if not buckets:
+        return None
+
+    index_function = create_scheduled_function(
+        name=INDEX_LAMBDA_NAME,
+        description="Points hubs' inventory/index.json at their latest S3 Inventory",
+        handler=inventory_index_handler,
+        policy_document=create_inventory_index_policy_document(buckets),
+        account_context=account_context,
+        memory_size=256,
+        timeout=300,
+    )
+
+    return aws.scheduler.Schedule(
+        resource_name=INDEX_LAMBDA_NAME,
+        name=INDEX_LAMBDA_NAME,
+        description="Updates hubs' inventory indexes",
+        schedule_expression=INDEX_SCHEDULE,
+        flexible_time_window={"mode": "OFF"},
+        target={
+            "arn": index_function.function.arn,
+            "role_arn": index_function.scheduler_role.arn,
+            "input": json.dumps({"buckets": buckets}),
+            "retry_policy": {"maximum_retry_attempts": 2},
+        },
+        opts=index_function.schedule_options(),
+    )
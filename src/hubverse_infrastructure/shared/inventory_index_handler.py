@@ -0,0 +1,136 @@
+"""
+The inventory index Lambda: point each hub's inventory/index.json at its latest S3 Inventory.
+
+S3 delivers a hub's inventory to a new, dated directory every day:
+
+    inventory/<hub>/model-output/2024-10-05T01-00Z/manifest.json
+    inventory/<hub>/model-output/2024-10-05T01-00Z/manifest.checksum
+
+so clients would have to list the deliveries to find the latest one. This Lambda finds the latest
+complete delivery (S3 writes manifest.checksum last) and copies the parts of its manifest that
+clients need to inventory/index.json:
+
+    {
+      "bucket": "example-hub",
+      "manifest": "inventory/example-hub/model-output/2024-10-05T01-00Z/manifest.json",
+      "created": "1728090000000",
+      "format": "Parquet",
+      "schema": "message s3.inventory { ... }",
+      "files": [{"key": "inventory/example-hub/model-output/data/....parquet", "size": 12345}]
+    }
+
+This module is the Lambda's whole package, so it only imports boto3. To update a bucket's index
+from the command line:
+
+    python -m hubverse_infrastructure.shared.inventory_index_handler example-hub
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+from typing import Any
+
+INVENTORY_PREFIX = "inventory/"
+INVENTORY_NAME = "model-output"
+INDEX_KEY = f"{INVENTORY_PREFIX}index.json"
+
+# The names of the directories that S3 delivers inventories to
+DELIVERY_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}-\d{2}Z$")
+
+
+def get_manifest_prefix(bucket: str) -> str:
+    """Return the prefix that S3 writes a bucket's inventory deliveries to."""
+    return f"{INVENTORY_PREFIX}{bucket}/{INVENTORY_NAME}/"
+
+
+def find_latest_manifest(client: Any, bucket: str) -> str | None:
+    """Return the key of the manifest of a bucket's latest complete inventory delivery (if there is one)."""
+    manifest_prefix = get_manifest_prefix(bucket)
+    deliveries = []
+    for page in client.get_paginator("list_objects_v2").paginate(Bucket=bucket, Prefix=manifest_prefix, Delimiter="/"):
+        for common_prefix in page.get("CommonPrefixes", []):
+            if DELIVERY_PATTERN.match(common_prefix["Prefix"].removeprefix(manifest_prefix).rstrip("/")):
+                deliveries.append(common_prefix["Prefix"])
+
+    for delivery in sorted(deliveries, reverse=True):
+        checksum = client.list_objects_v2(Bucket=bucket, Prefix=f"{delivery}manifest.checksum", MaxKeys=1)
+        if checksum.get("KeyCount", 0):
+            return f"{delivery}manifest.json"
+    return None
+
+
+def read_index(client: Any, bucket: str) -> dict | None:
+    try:
+        return json.loads(client.get_object(Bucket=bucket, Key=INDEX_KEY)["Body"].read())
+    except client.exceptions.NoSuchKey:
+        return None
+
+
+def update_index(client: Any, bucket: str) -> dict:
+    """Point a bucket's index at its latest inventory, unless it already does."""
+    manifest_key = find_latest_manifest(client, bucket)
+    if manifest_key is None:
+        return {"status": "no inventory"}
+    index = read_index(client, bucket)
+    if index is not None and index["manifest"] == manifest_key:
+        return {"status": "unchanged", "manifest": manifest_key}
+
+    manifest = json.loads(client.get_object(Bucket=bucket, Key=manifest_key)["Body"].read())
+    index = {
+        "bucket": bucket,
+        "manifest": manifest_key,
+        "created": manifest["creationTimestamp"],
+        "format": manifest["fileFormat"],
+        "schema": manifest["fileSchema"],
+        "files": [{"key": file["key"], "size": file["size"]} for file in manifest["files"]],
+    }
+    client.put_object(
+        Bucket=bucket,
+        Key=INDEX_KEY,
+        Body=json.dumps(index, indent=2).encode(),
+        ContentType="application/json",
+        # the index changes at most once a day
+        CacheControl="max-age=300",
+    )
+    return {"status": "updated", "manifest": manifest_key}
+
+
+def update_indexes(client: Any, buckets: list[str]) -> dict[str, dict]:
+    """
+    Update the index of each bucket. A bucket that can't be updated (it's missing, its inventory
+    can't be read, or its manifest is malformed) gets an error status instead of stopping the
+    other buckets' updates.
+    """
+    results = {}
+    for bucket in buckets:
+        try:
+            results[bucket] = update_index(client, bucket)
+        except Exception as e:
+            results[bucket] = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+    return results
+
+
+def lambda_handler(event: dict, context: Any) -> dict:
+    """Update the index of every bucket named in the event (which the index schedule sends)."""
+    import boto3
+
+    result = update_indexes(boto3.client("s3"), event["buckets"])
+    print(json.dumps(result))
+    failed = [bucket for bucket, bucket_result in result.items() if bucket_result["status"] == "error"]
+    if failed:
+        # fail the invocation (after updating the other buckets) so that the Lambda's Errors metric counts it
+        raise RuntimeError(f"couldn't update the inventory index of {len(failed)} buckets: {failed}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Point hub buckets' inventory/index.json at their latest inventory.")
+    parser.add_argument("buckets", nargs="+")
+    args = parser.parse_args()
+    lambda_handler({"buckets": args.buckets}, None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+Create a CloudWatch dashboard and alarms for the model-output transform Lambda.
+
+Monitoring is off by default. Turn it on with the monitoring Pulumi config value (an empty
+mapping uses the default thresholds):
+
+    config:
+      hubverse-aws:monitoring:
+        log_retention_days: 30
+        duration_p50_threshold: 0.5       # fraction of the function's timeout
+        duration_p99_threshold: 0.8       # fraction of the function's timeout
+        throttles_threshold: 0            # throttled invocations in 5 minutes
+        errors_threshold: 0               # failed invocations in 5 minutes
+        concurrency_threshold: 0.9        # fraction of the function's reserved concurrency
+        account_concurrency: 1000         # the account's concurrency limit (for functions without reserved concurrency)
+        queue_age_threshold_seconds: 900  # the age of the oldest message in a transform queue
+        alarm_emails:
+          - hubverse-alerts@example.com
+
+Each compute profile's transform function gets alarms on its duration (p50 and p99), throttles,
+errors, and concurrent executions, and every transform queue gets an alarm on the age of its
+oldest message. Alarms notify the hubverse-transform-alarms SNS topic (and the alarm_emails
+subscribed to it). The hubverse-transform dashboard shows the same metrics.
+
+The functions' log groups get a retention period and a metric filter that turns the transform
+Lambda's structured log lines into a per-hub processing time metric. Lines are JSON objects
+with the hub and its processing time in milliseconds:
+
+    {"hub": "example-hub", "processing_time_ms": 1234}
+
+Note: Lambda creates a function's log group the first time it runs, so a log group that
+already exists has to be imported before monitoring is turned on (see the README).
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, fields
+
+import pulumi
+import pulumi_aws as aws
+
+from hubverse_infrastructure.hubs.event_filters import get_event_filter_settings
+from hubverse_infrastructure.shared.account_context import AccountContext
+from hubverse_infrastructure.shared.compute_profiles import (
+    ComputeProfile,
+    TransformFunction,
+    get_compute_profile_name,
+)
+from hubverse_infrastructure.shared.hubverse_transforms import TRANSFORM_LAMBDA_NAME
+from hubverse_infrastructure.shared.transform_queue import (
+    get_hub_queue_name,
+    get_queue_settings,
+    get_shared_queue_name,
+)
+
+ALARM_TOPIC_NAME = "hubverse-transform-alarms"
+DASHBOARD_NAME = "hubverse-transform"
+
+# The namespace and name of the per-hub processing time metric
+METRIC_NAMESPACE = "Hubverse/Transform"
+PROCESSING_TIME_METRIC = "HubProcessingTime"
+PROCESSING_TIME_PATTERN = "{ ($.hub = *) && ($.processing_time_ms = *) }"
+
+# Alarms compare each 5-minute period with their threshold
+PERIOD_SECONDS = 300
+
+# The retention periods that CloudWatch Logs accepts
+LOG_RETENTION_DAYS = (
+    1,
+    3,
+    5,
+    7,
+    14,
+    30,
+    60,
+    90,
+    120,
+    150,
+    180,
+    365,
+    400,
+    545,
+    731,
+    1096,
+    1827,
+    2192,
+    2557,
+    2922,
+    3288,
+    3653,
+)
+
+
+@dataclass(frozen=True)
+class MonitoringSettings:
+    """Log retention and alarm thresholds for the transform Lambda."""
+
+    log_retention_days: int = 30
+    duration_p50_threshold: float = 0.5
+    duration_p99_threshold: float = 0.8
+    throttles_threshold: int = 0
+    errors_threshold: int = 0
+    concurrency_threshold: float = 0.9
+    account_concurrency: int = 1000
+    queue_age_threshold_seconds: int = 900
+    alarm_emails: tuple[str, ...] = ()
+
+    def __post_init__(self):
+        if self.log_retention_days not in LOG_RETENTION_DAYS:
+            raise ValueError(
+                f"log_retention_days must be one of {list(LOG_RETENTION_DAYS)}, got {self.log_retention_days}"
+            )
+        for name in ("duration_p50_threshold", "duration_p99_threshold", "concurrency_threshold"):
+            if not 0 < getattr(self, name) <= 1:
+                raise ValueError(f"{name} must be a fraction between 0 and 1, got {getattr(self, name)}")
+        if self.duration_p50_threshold > self.duration_p99_threshold:
+            raise ValueError("duration_p50_threshold can't be more than duration_p99_threshold")
+        if self.throttles_threshold < 0 or self.errors_threshold < 0:
+            raise ValueError("throttles_threshold and errors_threshold can't be negative")
+        if self.account_concurrency < 1:
+            raise ValueError(f"account_concurrency must be at least 1, got {self.account_concurrency}")
+        if self.queue_age_threshold_seconds < 60:
+            raise ValueError(f"queue_age_threshold_seconds must be at least 60, got {self.queue_age_threshold_seconds}")
+
+    def concurrency_limit(self, profile: ComputeProfile) -> float:
+        """The number of concurrent executions that a profile's concurrency alarm goes off at."""
+        limit = profile.reserved_concurrency or self.account_concurrency
+        return self.concurrency_threshold * limit
+
+
+def load_monitoring_settings(config: dict | None) -> MonitoringSettings | None:
+    """Create the monitoring settings from the monitoring Pulumi config value (None if monitoring is off)."""
+    if config is None:
+        return None
+
+    allowed = {settings_field.name for settings_field in fields(MonitoringSettings)}
+    unknown = set(config) - allowed
+    if unknown:
+        raise ValueError(f"monitoring: unknown settings: {sorted(unknown)}")
+
+    settings = dict(config)
+    if "alarm_emails" in settings:
+        settings["alarm_emails"] = tuple(settings["alarm_emails"])
+    try:
+        return MonitoringSettings(**settings)
+    except ValueError as e:
+        raise ValueError(f"monitoring: {e}") from e
+
+
+def get_monitored_queue_names(hub_list: list[dict], profiles: dict[str, ComputeProfile]) -> list[str]:
+    """Return the names of the transform queues that the hubs use."""
+    queue_names = set()
+    for hub in hub_list:
+        queue_settings = get_queue_settings(hub)
+        if queue_settings is not None and not queue_settings[0]:
+            queue_names.add(get_hub_queue_name(hub["hub"]))
+        if (queue_settings is not None and queue_settings[0]) or get_event_filter_settings(hub).queues_removes:
+            queue_names.add(get_shared_queue_name(get_compute_profile_name(hub, profiles)))
+    return sorted(queue_names)
+
+
+def create_dashboard_body(function_names: list[str], queue_names: list[str], region: str) -> str:
+    """Create the transform dashboard's widgets."""
+
+    def widget(title: str, metrics: list[list], stat: str = "Sum") -> dict:
+        return {
+            "type": "metric",
+            "width": 12,
+            "height": 6,
+            "properties": {
+                "title": title,
+                "region": region,
+                "stat": stat,
+                "period": PERIOD_SECONDS,
+                "metrics": metrics,
+            },
+        }
+
+    def function_metrics(metric: str) -> list[list]:
+        return [["AWS/Lambda", metric, "FunctionName", name] for name in function_names]
+
+    widgets = [
+        widget("Duration (p50)", function_metrics("Duration"), stat="p50"),
+        widget("Duration (p99)", function_metrics("Duration"), stat="p99"),
+        widget("Invocations", function_metrics("Invocations")),
+        widget("Errors and throttles", function_metrics("Errors") + function_metrics("Throttles")),
+        widget("Concurrent executions", function_metrics("ConcurrentExecutions"), stat="Maximum"),
+        widget(
+            "Processing time by hub (p99)",
+            [[{"expression": f"SEARCH('{{{METRIC_NAMESPACE},hub}} MetricName=\"{PROCESSING_TIME_METRIC}\"', 'p99')"}]],
+            stat="p99",
+        ),
+    ]
+    if queue_names:
+        widgets.append(
+            widget(
+                "Age of oldest queued event (seconds)",
+                [["AWS/SQS", "ApproximateAgeOfOldestMessage", "QueueName", name] for name in queue_names],
+                stat="Maximum",
+            )
+        )
+    return json.dumps({"widgets": widgets})
+
+
+def create_transform_monitoring(
+    model_output_lambdas: dict[str, TransformFunction],
+    queue_names: list[str],
+    settings: MonitoringSettings,
+    account_context: AccountContext,
+) -> aws.cloudwatch.Dashboard:
+    """Create the transform Lambda's log retention, metric filters, alarms, and dashboard."""
+
+    topic = aws.sns.Topic(resource_name=ALARM_TOPIC_NAME, name=ALARM_TOPIC_NAME, tags={"hub": "hubverse"})
+    for i, email in enumerate(settings.alarm_emails):
+        aws.sns.TopicSubscription(
+            resource_name=f"{ALARM_TOPIC_NAME}-email-{i}", topic=topic.arn, protocol="email", endpoint=email
+        )
+
+    def create_alarm(alarm_name: str, description: str, threshold: float, **metric):
+        aws.cloudwatch.MetricAlarm(
+            resource_name=alarm_name,
+            name=alarm_name,
+            alarm_description=description,
+            comparison_operator="GreaterThanThreshold",
+            threshold=threshold,
+            period=PERIOD_SECONDS,
+            evaluation_periods=1,
+            treat_missing_data="notBreaching",
+            alarm_actions=[topic.arn],
+            ok_actions=[topic.arn],
+            tags={"hub": "hubverse"},
+            **metric,
+        )
+
+    function_names = []
+    for transform_function in model_output_lambdas.values():
+        profile = transform_function.profile
+        function_name = profile.function_name(TRANSFORM_LAMBDA_NAME)
+        function_names.append(function_name)
+
+        log_group = aws.cloudwatch.LogGroup(
+            resource_name=f"{function_name}-logs",
+            name=f"/aws/lambda/{function_name}",
+            retention_in_days=settings.log_retention_days,
+            tags={"hub": "hubverse"},
+        )
+        aws.cloudwatch.LogMetricFilter(
+            resource_name=f"{function_name}-processing-time",
+            name=f"{function_name}-processing-time",
+            log_group_name=log_group.name,
+            pattern=PROCESSING_TIME_PATTERN,
+            metric_transformation={
+                "namespace": METRIC_NAMESPACE,
+                "name": PROCESSING_TIME_METRIC,
+                "value": "$.processing_time_ms",
+                "dimensions": {"hub": "$.hub"},
+                "unit": "Milliseconds",
+            },
+        )
+
+        lambda_metric = {"namespace": "AWS/Lambda", "dimensions": {"FunctionName": function_name}}
+        timeout_ms = profile.timeout * 1000
+        for percentile, threshold in (
+            ("p50", settings.duration_p50_threshold),
+            ("p99", settings.duration_p99_threshold),
+        ):
+            create_alarm(
+                f"{function_name}-duration-{percentile}",
+                f"The {percentile} duration of {function_name} is over {threshold:.0%} of its timeout",
+                threshold * timeout_ms,
+                metric_name="Duration",
+                extended_statistic=percentile,
+                **lambda_metric,
+            )
+        create_alarm(
+            f"{function_name}-throttles",
+            f"{function_name} is throttling invocations",
+            settings.throttles_threshold,
+            metric_name="Throttles",
+            statistic="Sum",
+            **lambda_metric,
+        )
+        create_alarm(
+            f"{function_name}-errors",
+            f"{function_name} invocations are failing (including timeouts)",
+            settings.errors_threshold,
+            metric_name="Errors",
+            statistic="Sum",
+            **lambda_metric,
+        )
+        create_alarm(
+            f"{function_name}-concurrency",
+            f"{function_name} is close to its concurrency limit",
+            settings.concurrency_limit(profile),
+            metric_name="ConcurrentExecutions",
+            statistic="Maximum",
+            **lambda_metric,
+        )
+
+    for queue_name in queue_names:
+        create_alarm(
+            f"{queue_name}-age",
+            f"Transform events are waiting in {queue_name}",
+            settings.queue_age_threshold_seconds,
+            metric_name="ApproximateAgeOfOldestMessage",
+            namespace="AWS/SQS",
+            dimensions={"QueueName": queue_name},
+            statistic="Maximum",
+        )
+
+    dashboard = aws.cloudwatch.Dashboard(
+        resource_name=DASHBOARD_NAME,
+        dashboard_name=DASHBOARD_NAME,
+        dashboard_body=create_dashboard_body(function_names, queue_names, account_context.region),
+    )
+    pulumi.export("monitoring", {"alarm_topic": topic.arn, "dashboard": DASHBOARD_NAME})
+    return dashboard
@@ -0,0 +1,135 @@
+"""
+Build IAM policy documents locally.
+
+aws.iam.get_policy_document is a provider invoke: every call is a blocking round trip
+to the AWS provider plugin. The classes here produce the same JSON as that invoke
+(same key order, list handling, and indentation) without leaving the Python process.
+"""
+
+import json
+from dataclasses import dataclass, field
+from typing import Any
+
+POLICY_VERSION = "2012-10-17"
+
+
+@dataclass(frozen=True)
+class Principal:
+    """A principal (or set of principals) that a statement applies to."""
+
+    type: str
+    identifiers: list[str]
+
+
+@dataclass(frozen=True)
+class Condition:
+    """A condition that must be met for a statement to apply."""
+
+    test: str
+    variable: str
+    values: list[str]
+
+
+@dataclass(frozen=True)
+class Statement:
+    """A single statement in an IAM policy document."""
+
+    actions: list[str] = field(default_factory=list)
+    resources: list[str] = field(default_factory=list)
+    principals: list[Principal] = field(default_factory=list)
+    conditions: list[Condition] = field(default_factory=list)
+    effect: str = "Allow"
+    sid: str = ""
+
+    def to_dict(self) -> dict[str, Any]:
+        statement: dict[str, Any] = {}
+        if self.sid:
+            statement["Sid"] = self.sid
+        statement["Effect"] = self.effect
+        if self.actions:
+            statement["Action"] = _collapse(self.actions)
+        if self.resources:
+            statement["Resource"] = _collapse(self.resources)
+        if self.principals:
+            statement["Principal"] = _principals_to_json(self.principals)
+        if self.conditions:
+            statement["Condition"] = _conditions_to_json(self.conditions)
+        return statement
+
+
+@dataclass(frozen=True)
+class PolicyDocument:
+    """
+    An IAM policy document.
+
+    The json property is equivalent to the json attribute returned by
+    aws.iam.get_policy_document for the same statements.
+    """
+
+    statements: list[Statement]
+    version: str = POLICY_VERSION
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"Version": self.version, "Statement": [statement.to_dict() for statement in self.statements]}
+
+    @property
+    def json(self) -> str:
+        return _dumps(self.to_dict(), indent=2)
+
+    @property
+    def minified_json(self) -> str:
+        return _dumps(self.to_dict(), separators=(",", ":"))
+
+
+def create_service_trust_policy_document(service: str, source_account: str) -> PolicyDocument:
+    """Create the trust policy document that lets an AWS service (in this account) assume a role."""
+
+    return PolicyDocument(
+        statements=[
+            Statement(
+                actions=["sts:AssumeRole"],
+                principals=[Principal(type="Service", identifiers=[service])],
+                conditions=[Condition(test="StringEquals", variable="aws:SourceAccount", values=[source_account])],
+            )
+        ]
+    )
+
+
+def _collapse(values: list[str]) -> str | list[str]:
+    """
+    Mirror the provider's handling of string sets: a single value is rendered as a
+    plain string and multiple values are de-duplicated and sorted in reverse order.
+    """
+    unique = sorted(set(values), reverse=True)
+    if len(unique) == 1:
+        return unique[0]
+    return unique
+
+
+def _principals_to_json(principals: list[Principal]) -> str | dict[str, str | list[str]]:
+    # The provider renders an "everyone" principal as a bare "*" rather than {"*": "*"}
+    # (IAM rejects {"AWS": "*"} in trust policies, so the two are not interchangeable).
+    if len(principals) == 1 and principals[0].type == "*" and principals[0].identifiers == ["*"]:
+        return "*"
+
+    grouped: dict[str, list[str]] = {}
+    for principal in principals:
+        grouped.setdefault(principal.type, []).extend(principal.identifiers)
+    return {principal_type: _collapse(identifiers) for principal_type, identifiers in sorted(grouped.items())}
+
+
+def _conditions_to_json(conditions: list[Condition]) -> dict[str, dict[str, str | list[str]]]:
+    grouped: dict[str, dict[str, list[str]]] = {}
+    for condition in conditions:
+        grouped.setdefault(condition.test, {}).setdefault(condition.variable, []).extend(condition.values)
+    return {
+        test: {variable: _collapse(values) for variable, values in sorted(variables.items())}
+        for test, variables in sorted(grouped.items())
+    }
+
+
+def _dumps(document: dict[str, Any], **kwargs) -> str:
+    # The provider serializes with Go's encoding/json, which leaves non-ASCII characters
+    # alone but escapes HTML-sensitive characters.
+    rendered = json.dumps(document, ensure_ascii=False, **kwargs)
+    return rendered.replace("<", "\\u003c").replace(">", "\\u003e").replace("&", "\\u0026")
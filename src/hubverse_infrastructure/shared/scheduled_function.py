@@ -0,0 +1,117 @@
+"""
+Create a Lambda function that EventBridge Scheduler invokes.
+
+The compaction and inventory index Lambdas (see compaction.py and inventory_index.py) each run one
+module of this package on a schedule. Each function's role only has the access in its policy
+document, and the scheduler assumes its own role to invoke the function, so the function's
+resource policy doesn't grow with every schedule.
+
+The policy documents list every bucket that a function serves, and IAM limits the size of a
+role's inline policies, so the program fails before a deployment would.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Any
+
+import pulumi
+import pulumi_aws as aws
+
+from hubverse_infrastructure.shared.account_context import AccountContext
+from hubverse_infrastructure.shared.policy_document import (
+    PolicyDocument,
+    Statement,
+    create_service_trust_policy_document,
+)
+
+# IAM's size limit for all of a role's inline policies together (which doesn't count whitespace)
+MAX_INLINE_POLICY_SIZE = 10240
+
+
+@dataclass(frozen=True)
+class ScheduledFunction:
+    """A Lambda function and the role that EventBridge Scheduler assumes to invoke it."""
+
+    function: Any
+    scheduler_role: Any
+    # (None when another stack created the function, so its policy already exists)
+    scheduler_policy: aws.iam.RolePolicy | None = None
+
+    def schedule_options(self, opts: pulumi.ResourceOptions | None = None) -> pulumi.ResourceOptions:
+        """Return the options for a schedule that invokes the function (once the scheduler is allowed to)."""
+        depends_on = [self.scheduler_policy] if self.scheduler_policy is not None else []
+        return pulumi.ResourceOptions.merge(opts, pulumi.ResourceOptions(depends_on=depends_on))
+
+
+def create_scheduled_function(
+    name: str,
+    description: str,
+    handler: ModuleType,
+    policy_document: PolicyDocument,
+    account_context: AccountContext,
+    memory_size: int,
+    timeout: int,
+    layers: list[str] | None = None,
+    scheduler_role_name: str | None = None,
+) -> ScheduledFunction:
+    """
+    Create a Lambda function that runs a handler module's lambda_handler, its role, and the role
+    that EventBridge Scheduler assumes to invoke it.
+    """
+    policy_size = len(policy_document.minified_json)
+    if policy_size > MAX_INLINE_POLICY_SIZE:
+        raise ValueError(
+            f"the {name} Lambda's policy is {policy_size} characters (it lists every bucket that the Lambda serves), "
+            f"but IAM limits a role's inline policies to {MAX_INLINE_POLICY_SIZE}"
+        )
+
+    account_id = account_context.account_id
+    role = aws.iam.Role(
+        resource_name=f"{name}-role",
+        name=f"{name}-role",
+        description=f"The role assumed by the {name} Lambda",
+        assume_role_policy=create_service_trust_policy_document("lambda.amazonaws.com", account_id).json,
+        tags={"hub": "hubverse"},
+    )
+    role_policy = aws.iam.RolePolicy(
+        resource_name=f"{name}-policy",
+        role=role.id,
+        policy=policy_document.json,
+    )
+
+    module_name = handler.__name__.rsplit(".", 1)[-1]
+    function = aws.lambda_.Function(
+        resource_name=name,
+        name=name,
+        description=description,
+        role=role.arn,
+        # the handler module is the whole package
+        code=pulumi.AssetArchive({f"{module_name}.py": pulumi.FileAsset(str(handler.__file__))}),
+        handler=f"{module_name}.lambda_handler",
+        runtime="python3.12",
+        layers=layers,
+        memory_size=memory_size,
+        timeout=timeout,
+        tags={"hub": "hubverse"},
+        opts=pulumi.ResourceOptions(depends_on=[role_policy]),
+    )
+
+    scheduler_role_name = scheduler_role_name or f"{name}-scheduler-role"
+    scheduler_role = aws.iam.Role(
+        resource_name=scheduler_role_name,
+        name=scheduler_role_name,
+        description=f"The role that EventBridge Scheduler assumes to invoke the {name} Lambda",
+        assume_role_policy=create_service_trust_policy_document("scheduler.amazonaws.com", account_id).json,
+        tags={"hub": "hubverse"},
+    )
+    scheduler_policy = aws.iam.RolePolicy(
+        resource_name=f"{scheduler_role_name}-policy",
+        role=scheduler_role.id,
+        policy=function.arn.apply(
+            lambda arn: PolicyDocument(statements=[Statement(actions=["lambda:InvokeFunction"], resources=[arn])]).json
+        ),
+    )
+
+    return ScheduledFunction(function=function, scheduler_role=scheduler_role, scheduler_policy=scheduler_policy)
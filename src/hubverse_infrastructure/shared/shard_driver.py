@@ -0,0 +1,150 @@
+"""
+Preview or update a sharded Hubverse deployment (see sharding.py) with the Pulumi Automation API.
+
+The shared stack runs first, because the hub stacks refer to its outputs. Then the hub stacks
+run in parallel, each in its own process, so a deployment takes about as long as its largest
+shard instead of as long as all of its hubs:
+
+    python -m hubverse_infrastructure.shared.shard_driver preview --org hubverse --shards 4
+    python -m hubverse_infrastructure.shared.shard_driver up --org hubverse --shards 4 --workers 2
+
+Stacks are named {prefix}-shared and {prefix}-0 to {prefix}-{shards - 1}, and are created if they
+don't exist. The driver sets each stack's sharding config, so the stacks' own config files only
+need the settings that every stack shares (such as aws:region).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from hubverse_infrastructure.shared.sharding import SHARED_SHARD
+
+PROJECT_NAME = "hubverse-aws"
+DEFAULT_STACK_PREFIX = "hubverse"
+DEFAULT_REGION = "us-east-1"
+OPERATIONS = ("preview", "up")
+
+# The directory with Pulumi.yaml
+PROJECT_DIR = Path(__file__).parents[3]
+
+
+def get_stack_name(org: str, prefix: str, shard: str) -> str:
+    """Return the fully qualified name of one of the deployment's stacks."""
+    return f"{org}/{PROJECT_NAME}/{prefix}-{shard}"
+
+
+def get_stack_config(org: str, prefix: str, shard: str, shard_count: int, region: str) -> dict[str, str]:
+    """Return the config values that the driver sets for a stack."""
+    config = {
+        f"{PROJECT_NAME}:shards": str(shard_count),
+        f"{PROJECT_NAME}:shard": shard,
+        "aws:region": region,
+    }
+    if shard != SHARED_SHARD:
+        config[f"{PROJECT_NAME}:shared_stack"] = get_stack_name(org, prefix, SHARED_SHARD)
+    return config
+
+
+def run_stack(stack_name: str, operation: str, config: dict[str, str]) -> dict:
+    """Preview or update a stack, returning a summary of the result."""
+    # imported here, so that the driver's other functions (and their tests) don't need the Pulumi CLI
+    from pulumi import automation
+
+    start = time.perf_counter()
+    stack = automation.create_or_select_stack(stack_name=stack_name, work_dir=str(PROJECT_DIR))
+    stack.set_all_config({key: automation.ConfigValue(value=value) for key, value in config.items()})
+    if operation == "preview":
+        change_summary = stack.preview().change_summary
+    else:
+        change_summary = stack.up().summary.resource_changes or {}
+    return {
+        "stack": stack_name,
+        "operation": operation,
+        "succeeded": True,
+        "changes": {str(change): count for change, count in change_summary.items()},
+        "seconds": round(time.perf_counter() - start, 2),
+    }
+
+
+def _run_stack_safely(runner: Callable[[str, str, dict[str, str]], dict], stack_name: str, operation: str, config):
+    """Run a stack, reporting a failure instead of raising it (so that the other shards keep running)."""
+    try:
+        return runner(stack_name, operation, config)
+    except Exception as e:  # noqa: BLE001
+        return {"stack": stack_name, "operation": operation, "succeeded": False, "error": str(e)}
+
+
+def run_shards(
+    operation: str,
+    org: str,
+    shard_count: int,
+    prefix: str = DEFAULT_STACK_PREFIX,
+    region: str = DEFAULT_REGION,
+    max_workers: int | None = None,
+    runner: Callable[[str, str, dict[str, str]], dict] = run_stack,
+) -> dict:
+    """
+    Run an operation on the shared stack and then (in up to max_workers processes) on every hub
+    shard, returning the results of all stacks. The hub shards aren't run if the shared stack fails.
+    """
+    if operation not in OPERATIONS:
+        raise ValueError(f"operation must be one of {list(OPERATIONS)}, got '{operation}'")
+
+    def stack_args(shard: str) -> tuple[str, str, dict[str, str]]:
+        return (
+            get_stack_name(org, prefix, shard),
+            operation,
+            get_stack_config(org, prefix, shard, shard_count, region),
+        )
+
+    results = [_run_stack_safely(runner, *stack_args(SHARED_SHARD))]
+    if results[0]["succeeded"]:
+        shards = [str(shard) for shard in range(shard_count)]
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_run_stack_safely, runner, *stack_args(shard)) for shard in shards]
+            results.extend(future.result() for future in futures)
+
+    return summarize_results(results, shard_count)
+
+
+def summarize_results(results: list[dict], shard_count: int) -> dict:
+    """Aggregate the results of the stacks in a deployment."""
+    changes: dict[str, int] = {}
+    for result in results:
+        for change, count in result.get("changes", {}).items():
+            changes[change] = changes.get(change, 0) + count
+    # the shared stack runs first, then the shards in parallel
+    shard_seconds = [result.get("seconds", 0) for result in results[1:]]
+    return {
+        "succeeded": len(results) == shard_count + 1 and all(result["succeeded"] for result in results),
+        "changes": changes,
+        "seconds": round(results[0].get("seconds", 0) + max(shard_seconds, default=0), 2),
+        "stacks": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preview or update a sharded Hubverse deployment.")
+    parser.add_argument("operation", choices=OPERATIONS)
+    parser.add_argument("--org", required=True, help="the Pulumi organization that owns the stacks")
+    parser.add_argument("--shards", type=int, required=True, help="the number of hub stacks")
+    parser.add_argument(
+        "--prefix", default=DEFAULT_STACK_PREFIX, help="the prefix of the stack names (default: %(default)s)"
+    )
+    parser.add_argument("--region", default=DEFAULT_REGION, help="the AWS region (default: %(default)s)")
+    parser.add_argument("--workers", type=int, help="the number of hub stacks to run at once (default: all CPUs)")
+    args = parser.parse_args()
+
+    summary = run_shards(args.operation, args.org, args.shards, args.prefix, args.region, args.workers)
+    print(json.dumps(summary, indent=2))
+    sys.exit(0 if summary["succeeded"] else 1)
+
+
+if __name__ == "__main__":
+    main()
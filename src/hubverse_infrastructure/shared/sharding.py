@@ -0,0 +1,293 @@
+"""
+Split the hubs across several Pulumi stacks.
+
+With a single stack, every preview and update evaluates every hub, and all hubs share one state
+lock. Sharding splits the program into a shared stack and several hub stacks:
+
+- The shared stack creates the infrastructure shared by every hub (the transform Lambdas and
+  their role, shared queues and EventBridge rules, CloudFront policies, and the Athena results
+  bucket). It exports them as the shared_infrastructure stack output.
+- Each hub stack (shard) creates the resources of its hubs, and refers to the shared resources
+  with a stack reference to the shared stack.
+
+Sharding is configured with the stack settings below (shard_driver.py sets them):
+
+    config:
+      hubverse-aws:shards: 4                                  # the number of hub stacks
+      hubverse-aws:shard: "2"                                 # "shared", or this stack's shard index
+      hubverse-aws:shared_stack: hubverse/hubverse-aws/hubverse-shared   # (hub stacks only)
+
+Hubs are assigned to shards by a hash of their name, so a hub stays in the same shard as hubs are
+added. A hub can be pinned to a shard in hubs.yaml instead:
+
+    - hub: example-hub
+      org: hubverse-org
+      repo: example-hub
+      shard: 0
+
+Every stack reads the whole hub list, so the shared stack creates shared resources for the hubs in
+every shard.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from typing import Any
+
+import pulumi
+
+from hubverse_infrastructure.hubs.athena import AthenaResults, get_athena_settings
+from hubverse_infrastructure.hubs.cdn import CdnPolicies, get_cdn_enabled
+from hubverse_infrastructure.hubs.event_filters import get_event_filter_settings, get_shared_queue_hub_info
+from hubverse_infrastructure.shared.account_context import AccountContext
+from hubverse_infrastructure.shared.compaction import CompactionLambda, get_compaction_settings
+from hubverse_infrastructure.shared.compute_profiles import ComputeProfile, TransformFunction, get_compute_profile_name
+from hubverse_infrastructure.shared.scheduled_function import ScheduledFunction
+from hubverse_infrastructure.shared.transform_events import TransformEventRules
+from hubverse_infrastructure.shared.transform_queue import TransformQueue, TransformQueues, get_queue_settings
+
+SHARED_SHARD = "shared"
+SHARED_INFRASTRUCTURE_OUTPUT = "shared_infrastructure"
+
+
+@dataclass(frozen=True)
+class ShardSettings:
+    """The sharding settings of a stack."""
+
+    count: int
+    shard: str
+    shared_stack: str | None = None
+
+    def __post_init__(self):
+        if self.count < 1:
+            raise ValueError(f"shards must be at least 1, got {self.count}")
+        if self.shard != SHARED_SHARD:
+            if not self.shard.isdigit() or int(self.shard) >= self.count:
+                raise ValueError(
+                    f"shard must be '{SHARED_SHARD}' or a number from 0 to {self.count - 1}, got '{self.shard}'"
+                )
+            if not self.shared_stack:
+                raise ValueError("hub shards need the name of the shared stack (shared_stack)")
+
+    @property
+    def is_shared(self) -> bool:
+        return self.shard == SHARED_SHARD
+
+
+def load_shard_settings(config: pulumi.Config) -> ShardSettings | None:
+    """Return the stack's sharding settings, or None if the stack isn't sharded."""
+    count = config.get_int("shards")
+    if count is None:
+        return None
+    return ShardSettings(count=count, shard=config.require("shard"), shared_stack=config.get("shared_stack"))
+
+
+def get_hub_shard(hub_info: dict, shard_count: int) -> int:
+    """Return the index of the shard that a hub belongs to."""
+    shard = hub_info.get("shard")
+    if shard is not None:
+        if not isinstance(shard, int) or not 0 <= shard < shard_count:
+            raise ValueError(f"{hub_info['hub']}: shard must be a number from 0 to {shard_count - 1}, got '{shard}'")
+        return shard
+    # a stable hash (Python's hash() of a string changes from run to run)
+    digest = hashlib.sha256(hub_info["hub"].encode()).digest()
+    return int.from_bytes(digest[:8], "big") % shard_count
+
+
+def get_shard_hubs(hub_list: list[dict], settings: ShardSettings) -> list[dict]:
+    """Return the hubs that belong to a hub shard."""
+    return [hub for hub in hub_list if get_hub_shard(hub, settings.count) == int(settings.shard)]
+
+
+@dataclass
+class SharedInfrastructure:
+    """The shared objects that hub resources use (created by this stack or referenced from the shared stack)."""
+
+    model_output_lambdas: dict[str, TransformFunction]
+    model_output_lambda_role: Any
+    profiles: dict[str, ComputeProfile]
+    transform_permissions: str
+    transform_queues: TransformQueues
+    transform_event_rules: TransformEventRules
+    cdn_policies: CdnPolicies
+    athena_results: AthenaResults
+    compaction_lambda: CompactionLambda
+
+
+class ResourceReference:
+    """
+    A resource created by the shared stack. Its attributes (id, name, arn, ...) are the outputs that
+    the shared stack exported for it, under path in the shared_infrastructure output.
+    """
+
+    def __init__(self, outputs: pulumi.Output[Any], *path: str):
+        self._outputs = outputs
+        self._path = path
+
+    def __getattr__(self, name: str) -> pulumi.Output[Any]:
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def get_attribute(outputs: dict) -> Any:
+            for key in self._path:
+                outputs = outputs[key]
+            return outputs[name]
+
+        # looked up when the attribute is used, so that resources a shard doesn't use can be missing
+        return self._outputs.apply(get_attribute)
+
+
+def refer_to(outputs: pulumi.Output[Any], *path: str) -> Any:
+    """
+    Return a ResourceReference (typed as Any, because it stands in for the Pulumi resource that hub
+    code expects).
+    """
+    return ResourceReference(outputs, *path)
+
+
+def reference(resource: Any, *attributes: str) -> dict[str, Any]:
+    """Return the outputs that hub stacks need to refer to a shared resource."""
+    return {attribute: getattr(resource, attribute) for attribute in ("id", *attributes)}
+
+
+def prepare_shared_infrastructure(hub_list: list[dict], shared: SharedInfrastructure) -> dict:
+    """
+    Create the shared resources that the hubs in any shard need, and return the stack output that
+    hub stacks use to refer to them.
+    """
+    outputs: dict[str, Any] = {
+        "transform_role": reference(shared.model_output_lambda_role, "name", "arn"),
+        "transform_functions": {
+            name: {
+                "function": reference(model_output_lambda.function, "name", "arn"),
+                "alias": reference(model_output_lambda.alias, "name", "arn") if model_output_lambda.alias else None,
+            }
+            for name, model_output_lambda in shared.model_output_lambdas.items()
+        },
+        "shared_queues": {},
+        "event_rules": {},
+    }
+
+    for hub in hub_list:
+        profile_name = get_compute_profile_name(hub, shared.profiles)
+        hub_info = {**hub, "model_output_lambda": shared.model_output_lambdas[profile_name]}
+
+        queue_settings = get_queue_settings(hub_info)
+        if queue_settings is not None:
+            # hub shards create their own queues, but the permission to read them is shared
+            shared.transform_queues.allow_queue_consumers()
+        if (queue_settings is not None and queue_settings[0]) or get_event_filter_settings(hub).queues_removes:
+            shared_queue = shared.transform_queues.get_queue(get_shared_queue_hub_info(hub_info))
+            if shared_queue is not None:
+                outputs["shared_queues"][profile_name] = reference(shared_queue.queue, "arn")
+        if (hub.get("transform_trigger") or {}).get("type") == "eventbridge":
+            outputs["event_rules"][profile_name] = reference(shared.transform_event_rules.get_rule(hub_info), "arn")
+        if get_cdn_enabled(hub) and "cdn" not in outputs:
+            outputs["cdn"] = {
+                "origin_access_control": reference(shared.cdn_policies.origin_access_control),
+                "transformed_data_cache_policy": reference(shared.cdn_policies.transformed_data_cache_policy),
+                "metadata_cache_policy": reference(shared.cdn_policies.metadata_cache_policy),
+                "response_headers_policy": reference(shared.cdn_policies.response_headers_policy),
+            }
+        if get_athena_settings(hub) is not None and "athena_results" not in outputs:
+            outputs["athena_results"] = reference(shared.athena_results.bucket, "bucket", "arn")
+        if get_compaction_settings(hub) is not None and "compaction" not in outputs:
+            outputs["compaction"] = {
+                "function": reference(shared.compaction_lambda.function.function, "arn"),
+                "scheduler_role": reference(shared.compaction_lambda.function.scheduler_role, "arn"),
+            }
+
+    return outputs
+
+
+class ReferencedTransformQueues(TransformQueues):
+    """Transform queues for a hub shard: hubs' own queues are created here, and shared queues are referenced."""
+
+    def __init__(self, model_output_lambda_role: Any, account_context: AccountContext, outputs: pulumi.Output[Any]):
+        super().__init__(model_output_lambda_role, account_context)
+        self.outputs = outputs
+
+    def get_queue(self, hub_info: dict, opts: pulumi.ResourceOptions | None = None) -> TransformQueue | None:
+        queue_settings = get_queue_settings(hub_info)
+        if queue_settings is not None and queue_settings[0]:
+            profile_name = hub_info["model_output_lambda"].profile.name
+            # the shared stack created the queue's policy before this stack runs
+            return TransformQueue(queue=refer_to(self.outputs, "shared_queues", profile_name), policy=None)
+        return super().get_queue(hub_info, opts)
+
+    def allow_queue_consumers(self) -> None:
+        # the shared stack gives the Lambda role access to every transform queue
+        return None
+
+
+class ReferencedTransformEventRules(TransformEventRules):
+    """The shared stack's EventBridge rules (which already include every shard's hubs)."""
+
+    def __init__(self, outputs: pulumi.Output[Any]):
+        super().__init__({})
+        self.outputs = outputs
+
+    def get_rule(self, hub_info: dict) -> Any:
+        return refer_to(self.outputs, "event_rules", hub_info["model_output_lambda"].profile.name)
+
+
+class ReferencedCdnPolicies(CdnPolicies):
+    """The shared stack's CloudFront policies."""
+
+    def __init__(self, outputs: pulumi.Output[Any]):
+        super().__init__()
+        self._origin_access_control = refer_to(outputs, "cdn", "origin_access_control")
+        self._transformed_data_cache_policy = refer_to(outputs, "cdn", "transformed_data_cache_policy")
+        self._metadata_cache_policy = refer_to(outputs, "cdn", "metadata_cache_policy")
+        self._response_headers_policy = refer_to(outputs, "cdn", "response_headers_policy")
+
+
+class ReferencedAthenaResults(AthenaResults):
+    """The shared stack's Athena results bucket."""
+
+    def __init__(self, outputs: pulumi.Output[Any]):
+        super().__init__()
+        self._bucket = refer_to(outputs, "athena_results")
+
+
+class ReferencedCompactionLambda(CompactionLambda):
+    """The shared stack's compaction Lambda."""
+
+    def __init__(self, account_context: AccountContext, outputs: pulumi.Output[Any]):
+        super().__init__([], account_context)
+        self._function = ScheduledFunction(
+            function=refer_to(outputs, "compaction", "function"),
+            scheduler_role=refer_to(outputs, "compaction", "scheduler_role"),
+        )
+
+
+def reference_shared_infrastructure(
+    shared_stack: str,
+    account_context: AccountContext,
+    profiles: dict[str, ComputeProfile],
+    transform_permissions: str,
+) -> SharedInfrastructure:
+    """Refer to the shared stack's infrastructure from a hub shard."""
+    outputs = pulumi.StackReference(shared_stack).require_output(SHARED_INFRASTRUCTURE_OUTPUT)
+
+    model_output_lambdas = {}
+    for name, profile in profiles.items():
+        function = refer_to(outputs, "transform_functions", name, "function")
+        alias = refer_to(outputs, "transform_functions", name, "alias")
+        model_output_lambdas[name] = TransformFunction(
+            profile=profile, function=function, alias=alias if profile.provisioned_concurrency else None
+        )
+    model_output_lambda_role = refer_to(outputs, "transform_role")
+
+    return SharedInfrastructure(
+        model_output_lambdas=model_output_lambdas,
+        model_output_lambda_role=model_output_lambda_role,
+        profiles=profiles,
+        transform_permissions=transform_permissions,
+        transform_queues=ReferencedTransformQueues(model_output_lambda_role, account_context, outputs),
+        transform_event_rules=ReferencedTransformEventRules(outputs),
+        cdn_policies=ReferencedCdnPolicies(outputs),
+        athena_results=ReferencedAthenaResults(outputs),
+        compaction_lambda=ReferencedCompactionLambda(account_context, outputs),
+    )
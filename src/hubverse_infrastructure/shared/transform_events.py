@@ -0,0 +1,119 @@
+"""
+Route S3 events from hub buckets to the model-output transform Lambda through Amazon EventBridge.
+
+By default, each hub gets its own Lambda permission and S3 bucket notification that targets the
+transform Lambda, so the Lambda's resource policy grows with every hub (and eventually reaches its
+size limit). Hubs can instead opt in to EventBridge in hubs.yaml:
+
+    - hub: example-hub
+      org: hubverse-org
+      repo: example-hub
+      transform_trigger:
+        type: eventbridge
+
+The hub's bucket then sends its events to the account's default event bus, and a single rule
+(shared by every EventBridge-mode hub) forwards raw/ object events from their buckets to the
+Lambda. The rule, its target, and the Lambda permission are created once no matter how many hubs
+use them (once per compute profile, if EventBridge-mode hubs use more than one profile); adding a
+hub only adds its bucket to the rule's event pattern.
+
+Note: the transform Lambda receives EventBridge "Object Created" and "Object Deleted" events rather
+than S3 event notifications.
+"""
+
+from __future__ import annotations
+
+import json
+
+import pulumi
+import pulumi_aws as aws
+
+from hubverse_infrastructure.shared.compute_profiles import (
+    DEFAULT_PROFILE_NAME,
+    ComputeProfile,
+    TransformFunction,
+    get_compute_profile_name,
+)
+
+TRANSFORM_EVENT_RULE_NAME = "hubverse-transform-model-output-events"
+
+
+def get_eventbridge_buckets(hub_list: list[dict], compute_profiles: dict[str, ComputeProfile]) -> dict[str, list[str]]:
+    """Return the bucket names of hubs that use EventBridge mode, grouped by compute profile."""
+    buckets: dict[str, list[str]] = {}
+    for hub_info in hub_list:
+        if (hub_info.get("transform_trigger") or {}).get("type") == "eventbridge":
+            profile_name = get_compute_profile_name(hub_info, compute_profiles)
+            buckets.setdefault(profile_name, []).append(hub_info["hub"])
+    return buckets
+
+
+def create_transform_event_pattern(buckets: list[str], prefix: str = "raw/") -> str:
+    """
+    Create the EventBridge event pattern that matches object events under prefix in the given
+    buckets.
+
+    Any bucket in the account can send its events to EventBridge, so each rule lists its hub
+    buckets rather than matching every bucket that isn't another profile's.
+    """
+    detail: dict = {"bucket": {"name": sorted(buckets)}, "object": {"key": [{"prefix": prefix}]}}
+
+    return json.dumps(
+        {
+            "source": ["aws.s3"],
+            "detail-type": ["Object Created", "Object Deleted"],
+            "detail": detail,
+        }
+    )
+
+
+class TransformEventRules:
+    """
+    Create the EventBridge rule that targets a compute profile's transform Lambda the first time
+    a hub needs it.
+    """
+
+    def __init__(self, eventbridge_buckets: dict[str, list[str]]):
+        self.eventbridge_buckets = eventbridge_buckets
+        self._rules: dict[str, aws.cloudwatch.EventRule] = {}
+
+    def get_rule(self, hub_info: dict) -> aws.cloudwatch.EventRule:
+        model_output_lambda = hub_info["model_output_lambda"]
+        profile_name = model_output_lambda.profile.name
+        if profile_name not in self._rules:
+            self._rules[profile_name] = self._create_rule(model_output_lambda)
+        return self._rules[profile_name]
+
+    def _create_rule(self, model_output_lambda: TransformFunction) -> aws.cloudwatch.EventRule:
+        profile_name = model_output_lambda.profile.name
+        if profile_name == DEFAULT_PROFILE_NAME:
+            rule_name = TRANSFORM_EVENT_RULE_NAME
+        else:
+            rule_name = f"{TRANSFORM_EVENT_RULE_NAME}-{profile_name}"
+        event_pattern = create_transform_event_pattern(self.eventbridge_buckets[profile_name])
+
+        rule = aws.cloudwatch.EventRule(
+            resource_name=rule_name,
+            name=rule_name,
+            description="Sends object events from hub buckets' raw/ prefix to the model-output transform Lambda",
+            event_pattern=event_pattern,
+            tags={"hub": "hubverse"},
+        )
+
+        allow_events = aws.lambda_.Permission(
+            resource_name=f"{rule_name}-allow",
+            action="lambda:InvokeFunction",
+            function=model_output_lambda.function.name,
+            qualifier=model_output_lambda.alias.name if model_output_lambda.alias else None,
+            principal="events.amazonaws.com",
+            source_arn=rule.arn,
+        )
+
+        aws.cloudwatch.EventTarget(
+            resource_name=f"{rule_name}-target",
+            rule=rule.name,
+            arn=model_output_lambda.arn,
+            opts=pulumi.ResourceOptions(depends_on=[allow_events]),
+        )
+
+        return rule
@@ -0,0 +1,129 @@
+"""
+Give the model-output transform Lambda's role access to the hub buckets.
+
+Originally, each hub's bucket write policy was attached to the Lambda role, but IAM limits the
+number of managed policies attached to a role (10 by default), so that stops working after a
+handful of hubs. The transform_permissions Pulumi config value chooses how the role gets access:
+
+    config:
+      hubverse-aws:transform_permissions: consolidated
+
+- bucket-policy (the default): each hub bucket's policy (which already allows public reads)
+  grants the role access to that bucket, so the role's own policies don't change as hubs are
+  added, and adding a hub only changes that hub's resources.
+- consolidated: a few generated policies, each covering as many hub buckets as fit in IAM's
+  policy size limit, are attached to the role. Adding a hub usually only updates the last
+  policy. This works for several hundred hubs (depending on the length of their names), but
+  every new hub changes shared resources.
+- per-hub: each hub's bucket write policy is attached to the role (the original behavior).
+"""
+
+from __future__ import annotations
+
+import pulumi
+import pulumi_aws as aws
+
+from hubverse_infrastructure.shared.policy_document import PolicyDocument, Principal, Statement
+
+PERMISSIONS_MODES = ("bucket-policy", "consolidated", "per-hub")
+DEFAULT_PERMISSIONS_MODE = "bucket-policy"
+
+CONSOLIDATED_POLICY_PREFIX = "hubverse-transform-model-output-buckets"
+
+# IAM's size limit for a managed policy (which doesn't count whitespace)
+MAX_POLICY_SIZE = 6144
+
+# IAM's default limit on managed policies attached to a role. The transform Lambda role also
+# has the CloudWatch write policy.
+MAX_ROLE_POLICY_ATTACHMENTS = 10
+MAX_CONSOLIDATED_POLICIES = MAX_ROLE_POLICY_ATTACHMENTS - 1
+
+BUCKET_ACTIONS = [
+    "s3:ListBucket",
+    "s3:PutObject",
+    "s3:PutObjectAcl",
+    "s3:GetObject",
+    "s3:GetObjectAcl",
+    "s3:DeleteObject",
+]
+
+
+def get_permissions_mode(mode: str | None) -> str:
+    """Validate the transform_permissions config value."""
+    mode = mode or DEFAULT_PERMISSIONS_MODE
+    if mode not in PERMISSIONS_MODES:
+        raise ValueError(f"transform_permissions must be one of {PERMISSIONS_MODES}, got '{mode}'")
+    return mode
+
+
+def create_buckets_policy_document(bucket_names: list[str]) -> PolicyDocument:
+    """Create the policy document that allows the transform Lambda to read and write a list of buckets."""
+
+    # One statement (rather than separate bucket and object statements, as in the per-hub
+    # policies) keeps the document small, so that each policy covers more buckets.
+    resources = []
+    for bucket_name in bucket_names:
+        resources.extend([f"arn:aws:s3:::{bucket_name}", f"arn:aws:s3:::{bucket_name}/*"])
+
+    return PolicyDocument(statements=[Statement(actions=BUCKET_ACTIONS, resources=resources)])
+
+
+def group_buckets(bucket_names: list[str]) -> list[list[str]]:
+    """
+    Split bucket names into groups whose policy documents fit in IAM's policy size limit.
+
+    Buckets keep their order, so adding a hub to the end of hubs.yaml only changes the last group.
+    """
+    groups: list[list[str]] = []
+    group: list[str] = []
+    for bucket_name in bucket_names:
+        if group and len(create_buckets_policy_document(group + [bucket_name]).minified_json) > MAX_POLICY_SIZE:
+            groups.append(group)
+            group = []
+        group.append(bucket_name)
+    if group:
+        groups.append(group)
+
+    if len(groups) > MAX_CONSOLIDATED_POLICIES:
+        raise ValueError(
+            f"{len(bucket_names)} hub buckets need {len(groups)} transform Lambda policies, but a role can only "
+            f"have {MAX_CONSOLIDATED_POLICIES} (use the bucket-policy transform_permissions mode instead)"
+        )
+    return groups
+
+
+def create_consolidated_bucket_policies(
+    bucket_names: list[str], model_output_lambda_role: aws.iam.Role, opts: pulumi.ResourceOptions | None = None
+) -> list[aws.iam.Policy]:
+    """Create and attach the policies that give the transform Lambda role access to every hub bucket."""
+
+    policies = []
+    for i, group in enumerate(group_buckets(bucket_names)):
+        policy_name = f"{CONSOLIDATED_POLICY_PREFIX}-{i}"
+        policy = aws.iam.Policy(
+            resource_name=policy_name,
+            name=policy_name,
+            description="Allows the hubverse-transform Lambda to read and write hub buckets",
+            policy=create_buckets_policy_document(group).minified_json,
+            tags={"hub": "hubverse"},
+            opts=opts,
+        )
+        aws.iam.RolePolicyAttachment(
+            resource_name=policy_name,
+            role=model_output_lambda_role.name,
+            policy_arn=policy.arn,
+            opts=opts,
+        )
+        policies.append(policy)
+    return policies
+
+
+def create_transform_access_statement(bucket_name: str, model_output_lambda_role_arn: str) -> Statement:
+    """Create the bucket policy statement that allows the transform Lambda role to read and write a hub bucket."""
+
+    return Statement(
+        sid="AllowTransformLambda",
+        actions=BUCKET_ACTIONS,
+        principals=[Principal(type="AWS", identifiers=[model_output_lambda_role_arn])],
+        resources=[f"arn:aws:s3:::{bucket_name}", f"arn:aws:s3:::{bucket_name}/*"],
+    )
@@ -0,0 +1,271 @@
+"""
+Create SQS queues that batch S3 events before they reach the model-output transform Lambda.
+
+By default, a hub's S3 bucket invokes the transform Lambda once for every file written to its
+raw/ prefix. When a round closes and many teams submit at once, that causes throttling and cold
+starts. Hubs can instead opt in to a queue in hubs.yaml:
+
+    - hub: example-hub
+      org: hubverse-org
+      repo: example-hub
+      transform_trigger:
+        type: queue
+        shared: false              # true sends events to a queue shared by all queue-mode hubs
+        batch_size: 10
+        batching_window_seconds: 30
+        max_concurrency: 5
+        max_receive_count: 5       # failed receives before a message moves to the dead-letter queue
+
+Settings other than type and shared only apply to a hub's own queue. The shared queue uses the
+defaults below (there is one shared queue for each compute profile's transform Lambda).
+
+Note: when a hub uses a queue, the transform Lambda receives SQS events that wrap the original
+S3 event notifications.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, fields
+
+import pulumi
+import pulumi_aws as aws
+
+from hubverse_infrastructure.shared.account_context import AccountContext
+from hubverse_infrastructure.shared.compute_profiles import DEFAULT_PROFILE_NAME, TransformFunction
+from hubverse_infrastructure.shared.policy_document import Condition, PolicyDocument, Principal, Statement
+
+# All transform queues share a name prefix so that one IAM policy covers every queue
+# (instead of adding a policy to the Lambda role for each hub).
+QUEUE_NAME_PREFIX = "hubverse-transform"
+SHARED_QUEUE_NAME = f"{QUEUE_NAME_PREFIX}-model-output"
+
+# SQS queue names can't be longer than 80 characters
+MAX_QUEUE_NAME_LENGTH = 80
+
+# SQS message retention for the dead-letter queue (the maximum, 14 days)
+DEAD_LETTER_RETENTION_SECONDS = 1209600
+
+
+@dataclass(frozen=True)
+class TransformQueue:
+    """
+    A transform queue and the queue policy that allows S3 to send events to it (None for a queue
+    created by another stack).
+    """
+
+    queue: aws.sqs.Queue
+    policy: aws.sqs.QueuePolicy | None
+
+
+@dataclass(frozen=True)
+class QueueSettings:
+    """Settings for a transform queue and the event source mapping that drains it."""
+
+    batch_size: int = 10
+    batching_window_seconds: int = 30
+    max_concurrency: int | None = None
+    max_receive_count: int = 5
+
+    def __post_init__(self):
+        if not 1 <= self.batch_size <= 10000:
+            raise ValueError(f"batch_size must be between 1 and 10000, got {self.batch_size}")
+        if not 0 <= self.batching_window_seconds <= 300:
+            raise ValueError(f"batching_window_seconds must be between 0 and 300, got {self.batching_window_seconds}")
+        if self.batch_size > 10 and self.batching_window_seconds < 1:
+            raise ValueError("batching_window_seconds must be at least 1 when batch_size is greater than 10")
+        if self.max_concurrency is not None and not 2 <= self.max_concurrency <= 1000:
+            raise ValueError(f"max_concurrency must be between 2 and 1000, got {self.max_concurrency}")
+        if not 1 <= self.max_receive_count <= 1000:
+            raise ValueError(f"max_receive_count must be between 1 and 1000, got {self.max_receive_count}")
+
+
+def get_queue_settings(hub_info: dict) -> tuple[bool, QueueSettings] | None:
+    """
+    Return (shared, settings) for a hub that uses a transform queue, or None if the hub's
+    bucket sends its events somewhere else.
+    """
+    hub = hub_info["hub"]
+    trigger = dict(hub_info.get("transform_trigger") or {})
+    if trigger.pop("type", "lambda") != "queue":
+        return None
+
+    shared = trigger.pop("shared", False)
+    if shared and trigger:
+        raise ValueError(f"{hub}: the shared transform queue does not accept per-hub settings: {sorted(trigger)}")
+
+    allowed = {field.name for field in fields(QueueSettings)}
+    unknown = set(trigger) - allowed
+    if unknown:
+        raise ValueError(f"{hub}: unknown transform_trigger settings: {sorted(unknown)}")
+
+    try:
+        return shared, QueueSettings(**trigger)
+    except ValueError as e:
+        raise ValueError(f"{hub}: {e}") from e
+
+
+def get_shared_queue_name(profile_name: str) -> str:
+    """Return the name of a compute profile's shared transform queue."""
+    if profile_name == DEFAULT_PROFILE_NAME:
+        return SHARED_QUEUE_NAME
+    return f"{SHARED_QUEUE_NAME}-{profile_name}"
+
+
+def get_hub_queue_name(hub: str) -> str:
+    """Return the name of a hub's own transform queue."""
+    return f"{QUEUE_NAME_PREFIX}-{hub}"
+
+
+def create_queue_policy_document(queue_arn: str, account_id: str) -> PolicyDocument:
+    """Create the queue policy document that lets S3 buckets in the Hubverse account send events to a queue."""
+
+    return PolicyDocument(
+        statements=[
+            Statement(
+                sid="AllowHubBucketNotifications",
+                actions=["sqs:SendMessage"],
+                principals=[Principal(type="Service", identifiers=["s3.amazonaws.com"])],
+                resources=[queue_arn],
+                conditions=[
+                    Condition(test="StringEquals", variable="aws:SourceAccount", values=[account_id]),
+                    Condition(test="ArnLike", variable="aws:SourceArn", values=["arn:aws:s3:::*"]),
+                ],
+            )
+        ]
+    )
+
+
+def create_queue_consumer_policy_document(aws_region: str, aws_account: str) -> PolicyDocument:
+    """Create the policy document that lets the transform Lambda read from every transform queue."""
+
+    return PolicyDocument(
+        statements=[
+            Statement(
+                actions=[
+                    "sqs:ReceiveMessage",
+                    "sqs:DeleteMessage",
+                    "sqs:GetQueueAttributes",
+                ],
+                resources=[f"arn:aws:sqs:{aws_region}:{aws_account}:{QUEUE_NAME_PREFIX}-*"],
+            )
+        ]
+    )
+
+
+class TransformQueues:
+    """
+    Create transform queues as hubs ask for them.
+
+    Each compute profile's shared queue, and the Lambda role permissions that cover all queues,
+    are only created if at least one hub uses them.
+    """
+
+    def __init__(self, model_output_lambda_role: aws.iam.Role, account_context: AccountContext):
+        self.model_output_lambda_role = model_output_lambda_role
+        self.account_context = account_context
+        self._consumer_policy: aws.iam.RolePolicy | None = None
+        self._shared_queues: dict[str, TransformQueue] = {}
+
+    def get_queue(self, hub_info: dict, opts: pulumi.ResourceOptions | None = None) -> TransformQueue | None:
+        """Return the queue that a hub's bucket should send events to (None if the hub doesn't use one)."""
+        queue_settings = get_queue_settings(hub_info)
+        if queue_settings is None:
+            return None
+
+        shared, settings = queue_settings
+        model_output_lambda = hub_info["model_output_lambda"]
+        if shared:
+            profile_name = model_output_lambda.profile.name
+            if profile_name not in self._shared_queues:
+                self._shared_queues[profile_name] = self._create_queue(
+                    get_shared_queue_name(profile_name), model_output_lambda, QueueSettings(), {"hub": "hubverse"}
+                )
+            return self._shared_queues[profile_name]
+
+        hub = hub_info["hub"]
+        queue_name = get_hub_queue_name(hub)
+        if len(f"{queue_name}-dlq") > MAX_QUEUE_NAME_LENGTH:
+            raise ValueError(f"{hub}: hub name is too long for a per-hub transform queue (use the shared queue)")
+        return self._create_queue(queue_name, model_output_lambda, settings, {"hub": hub}, opts)
+
+    def allow_queue_consumers(self) -> aws.iam.RolePolicy | None:
+        """Give the transform Lambda role access to every transform queue (once)."""
+        if self._consumer_policy is None:
+            # An inline policy, so queues don't count against the role's managed policy attachment limit
+            self._consumer_policy = aws.iam.RolePolicy(
+                resource_name=f"{SHARED_QUEUE_NAME}-consumer-policy",
+                role=self.model_output_lambda_role.id,
+                policy=create_queue_consumer_policy_document(
+                    self.account_context.region, self.account_context.account_id
+                ).json,
+            )
+        return self._consumer_policy
+
+    def _create_queue(
+        self,
+        queue_name: str,
+        model_output_lambda: TransformFunction,
+        settings: QueueSettings,
+        tags: dict[str, str],
+        opts: pulumi.ResourceOptions | None = None,
+    ) -> TransformQueue:
+        consumer_policy = self.allow_queue_consumers()
+
+        dead_letter_queue = aws.sqs.Queue(
+            resource_name=f"{queue_name}-dlq",
+            name=f"{queue_name}-dlq",
+            message_retention_seconds=DEAD_LETTER_RETENTION_SECONDS,
+            tags=tags,
+            opts=opts,
+        )
+
+        queue = aws.sqs.Queue(
+            resource_name=queue_name,
+            name=queue_name,
+            # AWS recommends a visibility timeout of at least six times the timeout of the
+            # consuming function (plus the batching window)
+            visibility_timeout_seconds=6 * model_output_lambda.profile.timeout + settings.batching_window_seconds,
+            redrive_policy=dead_letter_queue.arn.apply(
+                lambda arn: json.dumps({"deadLetterTargetArn": arn, "maxReceiveCount": settings.max_receive_count})
+            ),
+            tags=tags,
+            opts=opts,
+        )
+
+        aws.sqs.RedriveAllowPolicy(
+            resource_name=f"{queue_name}-dlq-redrive-allow-policy",
+            queue_url=dead_letter_queue.id,
+            redrive_allow_policy=queue.arn.apply(
+                lambda arn: json.dumps({"redrivePermission": "byQueue", "sourceQueueArns": [arn]})
+            ),
+            opts=opts,
+        )
+
+        account_id = self.account_context.account_id
+        queue_policy = aws.sqs.QueuePolicy(
+            resource_name=f"{queue_name}-policy",
+            queue_url=queue.id,
+            policy=queue.arn.apply(lambda arn: create_queue_policy_document(arn, account_id).json),
+            opts=opts,
+        )
+
+        scaling_config = None
+        if settings.max_concurrency is not None:
+            scaling_config = aws.lambda_.EventSourceMappingScalingConfigArgs(
+                maximum_concurrency=settings.max_concurrency
+            )
+
+        aws.lambda_.EventSourceMapping(
+            resource_name=f"{queue_name}-event-source",
+            event_source_arn=queue.arn,
+            function_name=model_output_lambda.arn,
+            batch_size=settings.batch_size,
+            maximum_batching_window_in_seconds=settings.batching_window_seconds,
+            scaling_config=scaling_config,
+            opts=pulumi.ResourceOptions.merge(
+                opts, pulumi.ResourceOptions(depends_on=[consumer_policy] if consumer_policy else [])
+            ),
+        )
+
+        return TransformQueue(queue=queue, policy=queue_policy)
@@ -0,0 +1,121 @@
+"""
+Measure the modules that the Hubverse Pulumi program imports, and how long importing them takes.
+
+The harness runs a preview of the program (against Pulumi mocks) in a child process started
+with `python -X importtime`, then parses the child's import log:
+
+    python -m tests.benchmarks.import_time --hubs 10
+
+The measured time includes the lazily-loaded pulumi_aws submodules that the program uses, but
+not the pulumi package itself (which every Pulumi program pays for).
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+import pulumi
+
+from tests.mocks import RecordingMocks
+
+# The child writes this to stderr right before it starts importing the program
+START_MARKER = "hubverse-import-benchmark-start"
+
+# Modules the program should never import during a preview
+DEFERRED_MODULES = ["boto3", "botocore", "cloudpathlib"]
+
+
+def loaded_provider_modules(modules_before: set[str]) -> list[str]:
+    """
+    Return the pulumi_aws service packages that have been loaded since modules_before (a snapshot of
+    sys.modules).
+
+    pulumi_aws registers every service package in sys.modules as a lazy module, and inspecting one
+    would load it. Loading a package imports its resource modules (pulumi_aws.s3.bucket, ...),
+    so the packages that were actually loaded are the ones with new submodules.
+    """
+    return sorted(
+        {
+            name.split(".")[1]
+            for name in set(sys.modules) - modules_before
+            if name.startswith("pulumi_aws.") and name.count(".") == 2
+        }
+    )
+
+
+def run_child(hub_count: int):
+    """Preview the program for hub_count synthetic hubs and print the modules it loaded."""
+    pulumi.runtime.set_mocks(RecordingMocks(), preview=True)
+
+    sys.stderr.write(f"{START_MARKER}\n")
+    sys.stderr.flush()
+    modules_before = set(sys.modules)
+
+    from hubverse_infrastructure.program import create_hubverse_infrastructure
+    from hubverse_infrastructure.shared.account_context import AccountContext
+
+    hub_list = [{"hub": f"benchmark-hub-{i:04d}", "org": "hubverse-org", "repo": f"hub-{i}"} for i in range(hub_count)]
+    pulumi.runtime.test(create_hubverse_infrastructure)(hub_list, AccountContext())
+
+    result = {
+        "provider_modules": loaded_provider_modules(modules_before),
+        "deferred_modules": sorted(name for name in DEFERRED_MODULES if name in sys.modules),
+    }
+    print(json.dumps(result))
+
+
+def parse_import_time(log: str) -> float:
+    """
+    Return the total import time (in milliseconds) logged by -X importtime after the start marker.
+
+    Each log line looks like "import time: <self us> | <cumulative us> | <indented module name>";
+    the cumulative times of the unindented lines add up to the total.
+    """
+    total_us = 0
+    started = False
+    for line in log.splitlines():
+        if line == START_MARKER:
+            started = True
+            continue
+        if not started or not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        if cumulative.strip() == "cumulative":
+            continue
+        if not name.startswith("  "):
+            total_us += int(cumulative)
+    return round(total_us / 1000, 1)
+
+
+def measure(hub_count: int, runs: int) -> dict:
+    """Measure the program's imports in fresh processes, keeping the fastest run."""
+    measurements = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-m", __spec__.name, "--child", "--hubs", str(hub_count)],
+            capture_output=True,
+            check=True,
+            text=True,
+        )
+        measurement = json.loads(result.stdout.splitlines()[-1])
+        measurement["import_time_ms"] = parse_import_time(result.stderr)
+        measurements.append(measurement)
+    return min(measurements, key=lambda measurement: measurement["import_time_ms"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hubs", type=int, default=10, help="number of synthetic hubs")
+    parser.add_argument("--runs", type=int, default=3, help="number of measurements (the fastest is reported)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.hubs)
+    else:
+        print(json.dumps(measure(args.hubs, args.runs)))
+
+
+if __name__ == "__main__":
+    main()
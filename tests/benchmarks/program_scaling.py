@@ -0,0 +1,62 @@
+"""
+Measure the cost of evaluating the Hubverse Pulumi program against a synthetic hub list.
+
+Run one measurement per process so that peak memory and Pulumi's global runtime state
+aren't shared between hub counts:
+
+    python -m tests.benchmarks.program_scaling --hubs 100
+"""
+
+import argparse
+import json
+import resource
+import time
+
+import pulumi
+
+from tests.mocks import RecordingMocks
+
+
+def synthetic_hubs(hub_count: int) -> list[dict]:
+    return [
+        {"hub": f"benchmark-hub-{i:04d}", "org": "hubverse-org", "repo": f"benchmark-hub-{i:04d}"}
+        for i in range(hub_count)
+    ]
+
+
+def run_benchmark(hub_count: int) -> dict:
+    """Run the Pulumi program for hub_count synthetic hubs and return its cost."""
+    mocks = RecordingMocks()
+    # preview=True keeps the lambda package placeholder from calling S3
+    pulumi.runtime.set_mocks(mocks, preview=True)
+
+    from hubverse_infrastructure.program import create_hubverse_infrastructure
+    from hubverse_infrastructure.shared.account_context import AccountContext
+
+    hub_list = synthetic_hubs(hub_count)
+
+    start = time.perf_counter()
+    pulumi.runtime.test(create_hubverse_infrastructure)(hub_list, AccountContext())
+    wall_time = time.perf_counter() - start
+
+    # ru_maxrss is reported in kilobytes on Linux
+    peak_memory_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    return {
+        "hubs": hub_count,
+        "wall_time_seconds": round(wall_time, 3),
+        "peak_memory_mb": round(peak_memory_mb, 1),
+        "resource_count": len(mocks.resources),
+        "invoke_count": sum(mocks.calls.values()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hubs", type=int, required=True, help="number of synthetic hubs to provision")
+    args = parser.parse_args()
+    print(json.dumps(run_benchmark(args.hubs)))
+
+
+if __name__ == "__main__":
+    main()
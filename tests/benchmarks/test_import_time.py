@@ -0,0 +1,62 @@
+"""
+Benchmarks for the modules the Pulumi program imports during a preview.
+
+The import time check is excluded from the default test run (run it with
+`pytest -m benchmark`); the checks on which modules are imported are deterministic and
+always run. To record a new baseline after an intentional change (for example, using a new
+pulumi_aws service), set HUBVERSE_UPDATE_BENCHMARK_BASELINE=1 when running the benchmarks.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+HARNESS = "tests.benchmarks.import_time"
+PROJECT_DIR = Path(__file__).parents[2]
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+
+
+def measure(runs: int) -> dict:
+    """Run the import harness and return its measurements."""
+    result = subprocess.run(
+        [sys.executable, "-m", HARNESS, "--hubs", "10", "--runs", str(runs)],
+        cwd=PROJECT_DIR,
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def test_preview_imports():
+    measurement = measure(runs=1)
+    baseline = json.loads(BASELINE_PATH.read_text())["imports"]
+
+    # boto3 is only needed to create the lambda package placeholder, which never happens in a preview
+    assert measurement["deferred_modules"] == []
+    # pulumi_aws service packages are slow to load, so only the ones the program uses should be
+    new_modules = set(measurement["provider_modules"]) - set(baseline["provider_modules"])
+    assert not new_modules, f"the program now loads these pulumi_aws packages: {sorted(new_modules)}"
+
+
+@pytest.mark.benchmark
+def test_import_time():
+    measurement = measure(runs=3)
+    baseline = json.loads(BASELINE_PATH.read_text())
+    if os.environ.get("HUBVERSE_UPDATE_BENCHMARK_BASELINE"):
+        baseline["imports"] = {"hubs": 10, **measurement}
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2) + "\n")
+        return
+
+    expected = baseline["imports"]["import_time_ms"]
+    limit = max(
+        expected * (1 + baseline["tolerance"]["import_time_ms"]),
+        expected + baseline["min_slack"]["import_time_ms"],
+    )
+    assert measurement["import_time_ms"] <= limit, (
+        f"import time regressed: {measurement['import_time_ms']} ms > {limit:.1f} ms (baseline {expected} ms)"
+    )
@@ -0,0 +1,71 @@
+"""
+Benchmarks for the cost of evaluating the Pulumi program as the number of hubs grows.
+
+These are excluded from the default test run. To run them:
+
+    pytest -m benchmark
+
+To record new baseline numbers after an intentional change (for example, adding a
+per-hub resource), set HUBVERSE_UPDATE_BENCHMARK_BASELINE=1 when running them.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+HARNESS = "tests.benchmarks.program_scaling"
+PROJECT_DIR = Path(__file__).parents[2]
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+HUB_COUNTS = [10, 100, 1000]
+
+
+def measure(hub_count: int) -> dict:
+    """Run the benchmark harness in a fresh process and return its measurements."""
+    result = subprocess.run(
+        [sys.executable, "-m", HARNESS, "--hubs", str(hub_count)],
+        cwd=PROJECT_DIR,
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def update_baseline(measurement: dict):
+    baseline = json.loads(BASELINE_PATH.read_text())
+    baseline["results"][str(measurement["hubs"])] = measurement
+    BASELINE_PATH.write_text(json.dumps(baseline, indent=2) + "\n")
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("hub_count", HUB_COUNTS)
+def test_program_scaling(hub_count):
+    measurement = measure(hub_count)
+    if os.environ.get("HUBVERSE_UPDATE_BENCHMARK_BASELINE"):
+        update_baseline(measurement)
+        return
+
+    baseline = json.loads(BASELINE_PATH.read_text())
+    tolerance = baseline["tolerance"]
+    expected = baseline["results"][str(hub_count)]
+
+    # Timing and memory vary from machine to machine, so they're allowed some slack (a
+    # percentage of the baseline, but never less than a fixed amount so that the small
+    # hub counts aren't dominated by noise).
+    min_slack = baseline["min_slack"]
+    for metric in ["wall_time_seconds", "peak_memory_mb"]:
+        limit = max(expected[metric] * (1 + tolerance[metric]), expected[metric] + min_slack[metric])
+        assert measurement[metric] <= limit, (
+            f"{metric} for {hub_count} hubs regressed: {measurement[metric]} > {limit:.3f} "
+            f"(baseline {expected[metric]}, tolerance {tolerance[metric]:.0%})"
+        )
+
+    # Resource and invoke counts are deterministic, so any increase is a regression.
+    for metric in ["resource_count", "invoke_count"]:
+        assert measurement[metric] <= expected[metric], (
+            f"{metric} for {hub_count} hubs increased: {measurement[metric]} > {expected[metric]}"
+        )
@@ -0,0 +1,75 @@
+import boto3
+import pulumi
+import pytest
+from moto import mock_aws
+
+from tests.mocks import RecordingMocks
+
+
+def make_hub(hub_name: str, **settings) -> dict:
+    """Return a hub's hubs.yaml entry, with the optional settings that aren't None."""
+    return {
+        "hub": hub_name,
+        "org": "hubverse-org",
+        "repo": hub_name,
+        **{name: value for name, value in settings.items() if value is not None},
+    }
+
+
+@pytest.fixture
+def run_program():
+    """Return a function that runs the Pulumi program for a hub list and returns the recording mocks."""
+
+    def run(
+        hub_list: list[dict],
+        compute_profiles: dict | None = None,
+        transform_permissions: str | None = None,
+        instrumentation=None,
+        shard_settings=None,
+        stack_outputs: dict | None = None,
+        planned_hubs: set[str] | None = None,
+        monitoring: dict | None = None,
+    ) -> RecordingMocks:
+        mocks = RecordingMocks(stack_outputs)
+        # preview=True keeps the lambda package placeholder from calling S3
+        pulumi.runtime.set_mocks(mocks, preview=True)
+
+        from hubverse_infrastructure.program import create_hubverse_infrastructure
+        from hubverse_infrastructure.shared.account_context import AccountContext
+        from hubverse_infrastructure.shared.compute_profiles import load_compute_profiles
+        from hubverse_infrastructure.shared.monitoring import load_monitoring_settings
+
+        pulumi.runtime.test(create_hubverse_infrastructure)(
+            hub_list,
+            AccountContext(instrumentation=instrumentation),
+            load_compute_profiles(compute_profiles),
+            transform_permissions,
+            instrumentation,
+            shard_settings,
+            planned_hubs,
+            load_monitoring_settings(monitoring),
+        )
+        return mocks
+
+    return run
+
+
+@pytest.fixture
+def s3_bucket() -> str:
+    """The name of the bucket that s3_client creates (a test module can override it)."""
+    return "hub-a"
+
+
+@pytest.fixture
+def s3_client(monkeypatch, s3_bucket):
+    """Return a moto S3 client with an empty bucket."""
+    for name, value in {
+        "AWS_ACCESS_KEY_ID": "testing",
+        "AWS_SECRET_ACCESS_KEY": "testing",
+        "AWS_DEFAULT_REGION": "us-east-1",
+    }.items():
+        monkeypatch.setenv(name, value)
+    with mock_aws():
+        client = boto3.client("s3")
+        client.create_bucket(Bucket=s3_bucket)
+        yield client
@@ -0,0 +1,44 @@
+"""
+Pulumi mocks shared by the tests and the benchmark harnesses.
+
+This module only imports pulumi, so the import benchmark can use it without loading anything
+that the program itself would load.
+"""
+
+from collections import Counter
+
+import pulumi
+
+# Values returned for the provider invokes the program makes, so it sees realistic account data
+CALL_RESULTS = {
+    "aws:iam/getOpenIdConnectProvider:getOpenIdConnectProvider": {
+        "arn": "arn:aws:iam::123456789012:oidc-provider/token.actions.githubusercontent.com",
+        "url": "token.actions.githubusercontent.com",
+    },
+    "aws:index/getCallerIdentity:getCallerIdentity": {"accountId": "123456789012"},
+    "aws:index/getRegion:getRegion": {"name": "us-east-1"},
+}
+
+
+class RecordingMocks(pulumi.runtime.Mocks):
+    """Pulumi mocks that record every registered resource and count provider invokes."""
+
+    def __init__(self, stack_outputs: dict | None = None):
+        self.resources: list[pulumi.runtime.MockResourceArgs] = []
+        self.calls: Counter = Counter()
+        # the outputs of every stack that the program refers to
+        self.stack_outputs = stack_outputs or {}
+
+    def new_resource(self, args: pulumi.runtime.MockResourceArgs):
+        self.resources.append(args)
+        if args.typ == "pulumi:pulumi:StackReference":
+            return [args.name, {"name": args.name, "outputs": self.stack_outputs.get(args.name, {})}]
+        return [args.name + "_id", {"arn": f"arn:mock:{args.name}", **args.inputs}]
+
+    def call(self, args: pulumi.runtime.MockCallArgs):
+        self.calls[args.token] += 1
+        return CALL_RESULTS.get(args.token, {})
+
+    def resources_of_type(self, typ: str) -> dict[str, dict]:
+        """Return the inputs of every registered resource of a type, keyed by resource name."""
+        return {resource.name: resource.inputs for resource in self.resources if resource.typ == typ}
@@ -0,0 +1,107 @@
+import pytest
+
+from hubverse_infrastructure.hubs.athena import AthenaSettings, get_athena_settings, get_database_name
+from tests.conftest import make_hub
+
+DATABASE = "aws:glue/catalogDatabase:CatalogDatabase"
+TABLE = "aws:glue/catalogTable:CatalogTable"
+WORKGROUP = "aws:athena/workgroup:Workgroup"
+BUCKET = "aws:s3/bucketV2:BucketV2"
+
+ATHENA = {
+    "columns": {"reference_date": "date", "target": "string", "horizon": "int", "location": "string"},
+    "bytes_scanned_cutoff_mb": 1024,
+    "result_reuse_minutes": 60,
+}
+
+
+def test_get_athena_settings():
+    assert get_athena_settings(make_hub("hub-a")) is None
+
+    settings = get_athena_settings(make_hub("hub-a", athena=ATHENA))
+    assert settings == AthenaSettings(**ATHENA)
+    assert list(settings.all_columns) == [
+        "reference_date",
+        "target",
+        "horizon",
+        "location",
+        "round_id",
+        "output_type",
+        "output_type_id",
+        "value",
+        "model_id",
+    ]
+
+
+def test_hub_columns_override_standard_columns():
+    settings = AthenaSettings(columns={"round_id": "date", "location": "string"})
+    assert settings.all_columns["round_id"] == "date"
+
+
+@pytest.mark.parametrize(
+    "athena, message",
+    [
+        ({"columns": {}}, "hub-a: columns must list the hub's task ID columns"),
+        ({"columns": {"location": "string"}, "bytes_scanned_cutoff_mb": 1}, "must be at least 10"),
+        ({"columns": {"location": "string"}, "result_reuse_minutes": 20000}, "must be between 1 and 10080"),
+        ({"columns": {"location": "string"}, "crawler": True}, "hub-a: unknown athena settings: \\['crawler'\\]"),
+    ],
+)
+def test_invalid_athena_settings(athena, message):
+    with pytest.raises(ValueError, match=message):
+        get_athena_settings(make_hub("hub-a", athena=athena))
+
+
+def test_get_database_name():
+    assert get_database_name("flusight-forecast") == "hubverse_flusight_forecast"
+
+
+def test_no_athena_by_default(run_program):
+    mocks = run_program([make_hub("hub-a")])
+    assert mocks.resources_of_type(DATABASE) == {}
+    assert mocks.resources_of_type(WORKGROUP) == {}
+    assert "hubverse-athena-results" not in mocks.resources_of_type(BUCKET)
+
+
+def test_athena_infrastructure(run_program):
+    mocks = run_program([make_hub("hub-a", athena=ATHENA), make_hub("hub-b", athena=ATHENA), make_hub("hub-c")])
+
+    databases = mocks.resources_of_type(DATABASE)
+    assert sorted(database["name"] for database in databases.values()) == ["hubverse_hub_a", "hubverse_hub_b"]
+    assert sorted(mocks.resources_of_type(WORKGROUP)) == ["hub-a-workgroup", "hub-b-workgroup"]
+    # one results bucket for every hub
+    assert "hubverse-athena-results" in mocks.resources_of_type(BUCKET)
+
+
+def test_partition_projection(run_program):
+    mocks = run_program([make_hub("hub-a", athena=ATHENA)])
+
+    tables = mocks.resources_of_type(TABLE)
+    model_output = tables["hub-a-model-output-table"]
+    assert "partitionKeys" not in model_output
+    assert model_output["storageDescriptor"]["location"] == "s3://hub-a/model-output/"
+
+    by_model = tables["hub-a-model-output-by-model-table"]
+    assert by_model["partitionKeys"] == [{"name": "model_id", "type": "string"}]
+    parameters = by_model["parameters"]
+    assert parameters["projection.enabled"] == "true"
+    assert parameters["projection.model_id.type"] == "injected"
+    assert parameters["storage.location.template"] == "s3://hub-a/model-output/${model_id}/"
+    # a partition key can't also be a column
+    column_names = [column["name"] for column in by_model["storageDescriptor"]["columns"]]
+    assert "model_id" not in column_names
+    assert "reference_date" in column_names
+
+
+def test_workgroup_limits(run_program):
+    mocks = run_program(
+        [make_hub("hub-a", athena=ATHENA), make_hub("hub-b", athena={"columns": {"location": "string"}})]
+    )
+
+    workgroups = mocks.resources_of_type(WORKGROUP)
+    configuration = workgroups["hub-a-workgroup"]["configuration"]
+    assert configuration["enforceWorkgroupConfiguration"] is True
+    assert configuration["bytesScannedCutoffPerQuery"] == 1024 * 1024 * 1024
+    assert configuration["resultConfiguration"]["outputLocation"] == "s3://hubverse-athena-results/hub-a/"
+
+    assert "bytesScannedCutoffPerQuery" not in workgroups["hub-b-workgroup"]["configuration"]
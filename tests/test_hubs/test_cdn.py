@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+from hubverse_infrastructure.hubs.cdn import TRANSFORMED_DATA_PATH_PATTERN
+from tests.conftest import make_hub
+
+DISTRIBUTION = "aws:cloudfront/distribution:Distribution"
+CACHE_POLICY = "aws:cloudfront/cachePolicy:CachePolicy"
+ORIGIN_ACCESS_CONTROL = "aws:cloudfront/originAccessControl:OriginAccessControl"
+RESPONSE_HEADERS_POLICY = "aws:cloudfront/responseHeadersPolicy:ResponseHeadersPolicy"
+BUCKET_POLICY = "aws:s3/bucketPolicy:BucketPolicy"
+
+
+def test_no_cdn_by_default(run_program):
+    mocks = run_program([make_hub("hub-a")])
+    assert mocks.resources_of_type(DISTRIBUTION) == {}
+    assert mocks.resources_of_type(CACHE_POLICY) == {}
+    assert mocks.resources_of_type(ORIGIN_ACCESS_CONTROL) == {}
+
+    policy = json.loads(mocks.resources_of_type(BUCKET_POLICY)["hub-a-read-bucket-policy"]["policy"])
+    assert [statement["Sid"] for statement in policy["Statement"]] == [
+        "PublicReadGetObject",
+        "PublicListBucket",
+        "AllowTransformLambda",
+    ]
+
+
+def test_cdn_distribution_per_hub(run_program):
+    mocks = run_program([make_hub("hub-a", cdn=True), make_hub("hub-b", cdn=True), make_hub("hub-c")])
+
+    distributions = mocks.resources_of_type(DISTRIBUTION)
+    assert sorted(distributions) == ["hub-a-cdn", "hub-b-cdn"]
+
+    # the policies are shared by every distribution
+    assert sorted(mocks.resources_of_type(CACHE_POLICY)) == ["hubverse-cdn-metadata", "hubverse-cdn-transformed-data"]
+    assert len(mocks.resources_of_type(ORIGIN_ACCESS_CONTROL)) == 1
+    assert len(mocks.resources_of_type(RESPONSE_HEADERS_POLICY)) == 1
+
+    distribution = distributions["hub-a-cdn"]
+    origin = distribution["origins"][0]
+    assert origin["originId"] == "hub-a"
+    assert origin["originAccessControlId"] == "hubverse-cdn-origin-access-control_id"
+
+    default_behavior = distribution["defaultCacheBehavior"]
+    assert default_behavior["cachePolicyId"] == "hubverse-cdn-metadata_id"
+    assert default_behavior["compress"] is True
+    (data_behavior,) = distribution["orderedCacheBehaviors"]
+    assert data_behavior["pathPattern"] == TRANSFORMED_DATA_PATH_PATTERN
+    assert data_behavior["cachePolicyId"] == "hubverse-cdn-transformed-data_id"
+    assert data_behavior["compress"] is True
+
+
+def test_cache_policies(run_program):
+    mocks = run_program([make_hub("hub-a", cdn=True)])
+
+    policies = mocks.resources_of_type(CACHE_POLICY)
+    data_policy = policies["hubverse-cdn-transformed-data"]
+    metadata_policy = policies["hubverse-cdn-metadata"]
+    assert data_policy["defaultTtl"] > metadata_policy["maxTtl"]
+    for policy in policies.values():
+        parameters = policy["parametersInCacheKeyAndForwardedToOrigin"]
+        assert parameters["enableAcceptEncodingGzip"] is True
+        assert parameters["enableAcceptEncodingBrotli"] is True
+
+    cors = next(iter(mocks.resources_of_type(RESPONSE_HEADERS_POLICY).values()))["corsConfig"]
+    assert "Content-Range" in cors["accessControlExposeHeaders"]["items"]
+
+
+def test_cdn_bucket_policy(run_program):
+    mocks = run_program([make_hub("hub-a", cdn=True)])
+
+    policy = json.loads(mocks.resources_of_type(BUCKET_POLICY)["hub-a-read-bucket-policy"]["policy"])
+    (statement,) = [
+        statement for statement in policy["Statement"] if statement["Sid"] == "AllowCloudFrontServicePrincipalReadOnly"
+    ]
+    assert statement["Principal"] == {"Service": "cloudfront.amazonaws.com"}
+    assert statement["Resource"] == "arn:aws:s3:::hub-a/*"
+    assert statement["Condition"] == {"StringEquals": {"AWS:SourceArn": "arn:mock:hub-a-cdn"}}
+
+
+def test_invalid_cdn_setting(run_program):
+    with pytest.raises(ValueError, match="hub-a: cdn must be true or false, got 'yes please'"):
+        run_program([make_hub("hub-a", cdn="yes please")])
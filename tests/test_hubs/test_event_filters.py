@@ -0,0 +1,132 @@
+import pytest
+
+from hubverse_infrastructure.hubs.event_filters import EventFilter, EventFilterSettings, get_event_filter_settings
+from tests.conftest import make_hub
+
+BUCKET_NOTIFICATION = "aws:s3/bucketNotification:BucketNotification"
+LAMBDA_PERMISSION = "aws:lambda/permission:Permission"
+QUEUE = "aws:sqs/queue:Queue"
+
+MODEL_OUTPUT_FILTERS = [
+    {"prefix": "raw/model-output/", "suffix": ".csv"},
+    {"prefix": "raw/model-output/", "suffix": ".parquet"},
+]
+
+
+def test_default_event_filters(run_program):
+    assert get_event_filter_settings(make_hub("hub-a")) == EventFilterSettings()
+
+    mocks = run_program([make_hub("hub-a")])
+    notification = mocks.resources_of_type(BUCKET_NOTIFICATION)["hub-a-create-notification"]
+    assert notification["lambdaFunctions"] == [
+        {
+            "id": "hub-a-notification-args",
+            "lambdaFunctionArn": "arn:mock:hubverse-transform-model-output",
+            "events": ["s3:ObjectCreated:*", "s3:ObjectRemoved:*"],
+            "filterPrefix": "raw/",
+        }
+    ]
+
+
+def test_prefix_and_suffix_filters(run_program):
+    mocks = run_program([make_hub("hub-a", event_filters={"filters": MODEL_OUTPUT_FILTERS, "remove": False})])
+
+    notification = mocks.resources_of_type(BUCKET_NOTIFICATION)["hub-a-create-notification"]
+    assert [
+        (config["id"], config["events"], config["filterPrefix"], config["filterSuffix"])
+        for config in notification["lambdaFunctions"]
+    ] == [
+        ("hub-a-notification-args", ["s3:ObjectCreated:*"], "raw/model-output/", ".csv"),
+        ("hub-a-notification-args-1", ["s3:ObjectCreated:*"], "raw/model-output/", ".parquet"),
+    ]
+    assert "queues" not in notification
+
+
+def test_removes_batched_in_shared_queue(run_program):
+    hubs = [make_hub("hub-a", event_filters={"filters": MODEL_OUTPUT_FILTERS, "remove_route": "shared_queue"})]
+    mocks = run_program(hubs)
+
+    assert set(mocks.resources_of_type(QUEUE)) == {
+        "hubverse-transform-model-output",
+        "hubverse-transform-model-output-dlq",
+    }
+    notification = mocks.resources_of_type(BUCKET_NOTIFICATION)["hub-a-create-notification"]
+    assert [config["events"] for config in notification["lambdaFunctions"]] == [["s3:ObjectCreated:*"]] * 2
+    assert [
+        (config["id"], config["queueArn"], config["events"], config["filterSuffix"])
+        for config in notification["queues"]
+    ] == [
+        (
+            "hub-a-remove-notification-args-0",
+            "arn:mock:hubverse-transform-model-output",
+            ["s3:ObjectRemoved:*"],
+            ".csv",
+        ),
+        (
+            "hub-a-remove-notification-args-1",
+            "arn:mock:hubverse-transform-model-output",
+            ["s3:ObjectRemoved:*"],
+            ".parquet",
+        ),
+    ]
+
+
+def test_only_removes_in_shared_queue(run_program):
+    mocks = run_program([make_hub("hub-a", event_filters={"create": False, "remove_route": "shared_queue"})])
+
+    # nothing invokes the Lambda directly, so the bucket doesn't need permission to
+    assert mocks.resources_of_type(LAMBDA_PERMISSION) == {}
+    notification = mocks.resources_of_type(BUCKET_NOTIFICATION)["hub-a-create-notification"]
+    assert notification["lambdaFunctions"] == []
+    assert notification["queues"][0]["events"] == ["s3:ObjectRemoved:*"]
+
+
+def test_queue_trigger_filters(run_program):
+    trigger = {"type": "queue", "batch_size": 50, "batching_window_seconds": 60}
+    mocks = run_program(
+        [make_hub("hub-a", event_filters={"filters": [{"prefix": "raw/model-output/"}]}, transform_trigger=trigger)]
+    )
+
+    notification = mocks.resources_of_type(BUCKET_NOTIFICATION)["hub-a-create-notification"]
+    assert notification["queues"] == [
+        {
+            "id": "hub-a-notification-args",
+            "queueArn": "arn:mock:hubverse-transform-hub-a",
+            "events": ["s3:ObjectCreated:*", "s3:ObjectRemoved:*"],
+            "filterPrefix": "raw/model-output/",
+        }
+    ]
+
+
+@pytest.mark.parametrize(
+    "event_filters, message",
+    [
+        ({"filters": [{"prefix": "model-output/"}]}, "hub-a: filter prefixes must start with raw/"),
+        (
+            {"filters": [{"prefix": "raw/"}, {"prefix": "raw/model-output/", "suffix": ".csv"}]},
+            "hub-a: filters overlap",
+        ),
+        ({"filters": [{"prefix": "raw/", "extension": ".csv"}]}, r"hub-a: unknown filter settings: \['extension'\]"),
+        ({"filters": []}, "hub-a: filters must list at least one prefix"),
+        ({"create": False, "remove": False}, "hub-a: at least one of create and remove must be true"),
+        ({"remove_route": "sns"}, "hub-a: remove_route must be one of"),
+        ({"deletes": False}, r"hub-a: unknown event_filters settings: \['deletes'\]"),
+    ],
+)
+def test_invalid_event_filters(event_filters, message):
+    with pytest.raises(ValueError, match=message):
+        get_event_filter_settings(make_hub("hub-a", event_filters=event_filters))
+
+
+def test_no_event_filters_with_eventbridge():
+    hub = make_hub("hub-a", event_filters={"remove": False}, transform_trigger={"type": "eventbridge"})
+    with pytest.raises(ValueError, match="hub-a: event_filters can't be used with the eventbridge transform_trigger"):
+        get_event_filter_settings(hub)
+
+
+def test_filter_overlap():
+    csv = EventFilter(prefix="raw/model-output/", suffix=".csv")
+    assert not csv.overlaps(EventFilter(prefix="raw/model-output/", suffix=".parquet"))
+    assert not csv.overlaps(EventFilter(prefix="raw/target-data/"))
+    assert csv.overlaps(EventFilter(prefix="raw/model-output/team-a/", suffix="a.csv"))
+    assert csv.overlaps(EventFilter(prefix="raw/"))
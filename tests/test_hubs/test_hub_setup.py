@@ -0,0 +1,69 @@
+import pulumi
+import pytest
+
+
+class MyMocks(pulumi.runtime.Mocks):
+    def new_resource(self, args: pulumi.runtime.MockResourceArgs):
+        return [args.name + "_id", args.inputs]
+
+    def call(self, args: pulumi.runtime.MockCallArgs):
+        return {}
+
+
+@pytest.fixture(autouse=True)
+def mocks():
+    # preview=True keeps the lambda package placeholder from calling S3
+    pulumi.runtime.set_mocks(MyMocks(), preview=True)
+
+
+from hubverse_infrastructure.hubs.hub_setup import HUB_COMPONENT_TYPE, HubverseHub, get_hub_urn, set_up_hub  # noqa
+from hubverse_infrastructure.shared.account_context import AccountContext  # noqa
+from hubverse_infrastructure.shared.hubverse_transforms import create_transform_infrastructure  # noqa
+from hubverse_infrastructure.shared.instrumentation import Instrumentation  # noqa
+from hubverse_infrastructure.shared.transform_events import TransformEventRules  # noqa
+from hubverse_infrastructure.shared.transform_queue import TransformQueues  # noqa
+
+
+def make_hub_info(hub_name: str) -> dict:
+    account_context = AccountContext()
+    model_output_lambdas, model_output_lambda_role = create_transform_infrastructure(account_context)
+    return {
+        "hub": hub_name,
+        "org": "hubverse-org",
+        "repo": hub_name,
+        "model_output_lambda": model_output_lambdas["default"],
+        "model_output_lambda_role": model_output_lambda_role,
+        "transform_permissions": "consolidated",
+        "account_context": account_context,
+        "transform_queues": TransformQueues(model_output_lambda_role, account_context),
+        "transform_event_rules": TransformEventRules({}),
+        "instrumentation": Instrumentation(),
+    }
+
+
+@pulumi.runtime.test
+def test_set_up_hub_returns_component():
+    hub = set_up_hub(make_hub_info("test-hub"))
+    assert isinstance(hub, HubverseHub)
+
+    def check_urn(urn):
+        assert urn.endswith("hubverse:hubs:HubverseHub::test-hub")
+
+    return hub.urn.apply(check_urn)
+
+
+@pulumi.runtime.test
+def test_hub_resources_are_component_children():
+    hub = set_up_hub(make_hub_info("test-hub"))
+
+    def check_urn(urn):
+        assert f"::{HUB_COMPONENT_TYPE}$aws:s3/bucket:Bucket::test-hub" in urn
+
+    return hub.hub_bucket.urn.apply(check_urn)
+
+
+def test_get_hub_urn():
+    assert get_hub_urn("test-hub") == "urn:pulumi:hubverse::hubverse-aws::hubverse:hubs:HubverseHub::test-hub"
+    assert get_hub_urn("test-hub", stack="dev", project="test") == (
+        "urn:pulumi:dev::test::hubverse:hubs:HubverseHub::test-hub"
+    )
@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+from hubverse_infrastructure.hubs.inventory import InventorySettings, get_inventory_settings
+from tests.conftest import make_hub
+
+BUCKET_POLICY = "aws:s3/bucketPolicy:BucketPolicy"
+FUNCTION = "aws:lambda/function:Function"
+INVENTORY = "aws:s3/inventory:Inventory"
+LIFECYCLE = "aws:s3/bucketLifecycleConfigurationV2:BucketLifecycleConfigurationV2"
+ROLE_POLICY = "aws:iam/rolePolicy:RolePolicy"
+SCHEDULE = "aws:scheduler/schedule:Schedule"
+
+
+def test_inventory(run_program):
+    mocks = run_program([make_hub("hub-a", inventory={}), make_hub("hub-b")])
+
+    inventories = mocks.resources_of_type(INVENTORY)
+    assert list(inventories) == ["hub-a-inventory"]
+    inventory = inventories["hub-a-inventory"]
+    assert inventory["bucket"] == "hub-a_id"
+    assert inventory["schedule"] == {"frequency": "Daily"}
+    assert inventory["filter"] == {"prefix": "model-output/"}
+    assert inventory["destination"] == {
+        "bucket": {"bucketArn": "arn:mock:hub-a", "format": "Parquet", "prefix": "inventory"}
+    }
+
+    lifecycle = mocks.resources_of_type(LIFECYCLE)["hub-a-inventory-expiration"]
+    assert lifecycle["rules"][0]["filter"] == {"prefix": "inventory/hub-a/"}
+
+
+def test_inventory_delivery_policy(run_program):
+    mocks = run_program([make_hub("hub-a", inventory={"prefix": "target-data/"}), make_hub("hub-b")])
+
+    policies = mocks.resources_of_type(BUCKET_POLICY)
+    statements = json.loads(policies["hub-a-read-bucket-policy"]["policy"])["Statement"]
+    (delivery,) = [statement for statement in statements if statement["Sid"] == "AllowInventoryDelivery"]
+    assert delivery["Principal"] == {"Service": "s3.amazonaws.com"}
+    assert delivery["Resource"] == "arn:aws:s3:::hub-a/inventory/*"
+    assert delivery["Condition"]["StringEquals"]["aws:SourceAccount"] == "123456789012"
+    assert delivery["Condition"]["ArnLike"] == {"aws:SourceArn": "arn:aws:s3:::hub-a"}
+
+    other_statements = json.loads(policies["hub-b-read-bucket-policy"]["policy"])["Statement"]
+    assert "AllowInventoryDelivery" not in [statement["Sid"] for statement in other_statements]
+
+
+def test_inventory_index(run_program):
+    mocks = run_program([make_hub("hub-a", inventory={}), make_hub("hub-b"), make_hub("hub-c", inventory={})])
+
+    function = mocks.resources_of_type(FUNCTION)["hubverse-inventory-index"]
+    assert function["handler"] == "inventory_index_handler.lambda_handler"
+    schedule = mocks.resources_of_type(SCHEDULE)["hubverse-inventory-index"]
+    assert json.loads(schedule["target"]["input"]) == {"buckets": ["hub-a", "hub-c"]}
+
+    policy = json.loads(mocks.resources_of_type(ROLE_POLICY)["hubverse-inventory-index-policy"]["policy"])
+    resources = {statement["Sid"]: statement["Resource"] for statement in policy["Statement"]}
+    assert resources["WriteInventoryIndex"] == [
+        "arn:aws:s3:::hub-c/inventory/index.json",
+        "arn:aws:s3:::hub-a/inventory/index.json",
+    ]
+
+
+def test_inventory_index_policy_size_limit(run_program):
+    with pytest.raises(ValueError, match="hubverse-inventory-index Lambda's policy .* inline policies to 10240"):
+        run_program([make_hub(f"example-hub-{i:04d}", inventory={}) for i in range(100)])
+
+
+def test_no_inventory_by_default(run_program):
+    mocks = run_program([make_hub("hub-a")])
+    assert mocks.resources_of_type(INVENTORY) == {}
+    assert mocks.resources_of_type(LIFECYCLE) == {}
+    assert "hubverse-inventory-index" not in mocks.resources_of_type(FUNCTION)
+
+
+def test_default_inventory_settings():
+    assert get_inventory_settings(make_hub("hub-a")) is None
+    assert get_inventory_settings(make_hub("hub-a", inventory={})) == InventorySettings(prefix="model-output/")
+
+
+@pytest.mark.parametrize(
+    "inventory, message",
+    [
+        ({"prefix": "model-output"}, "hub-a: prefix must be a directory"),
+        ({"prefix": "inventory/old/"}, "hub-a: prefix can't be inside inventory/"),
+        ({"format": "CSV"}, r"hub-a: unknown inventory settings: \['format'\]"),
+    ],
+)
+def test_invalid_inventory_settings(inventory, message):
+    with pytest.raises(ValueError, match=message):
+        get_inventory_settings(make_hub("hub-a", inventory=inventory))
@@ -0,0 +1,137 @@
+import json
+
+import pulumi
+import pytest
+
+from hubverse_infrastructure.hubs.hub_setup import get_hub_urn
+from hubverse_infrastructure.hubs.planner import (
+    PLAN_ENV_VAR,
+    create_snapshot,
+    get_shared_inputs,
+    load_planned_hubs,
+    load_snapshot,
+    plan_deployment,
+)
+from hubverse_infrastructure.shared.compute_profiles import load_compute_profiles
+from hubverse_infrastructure.shared.monitoring import load_monitoring_settings
+from tests.conftest import make_hub
+
+BUCKET = "aws:s3/bucket:Bucket"
+PROFILES = load_compute_profiles({"large": {"memory_size": 2048}})
+ATHENA = {"columns": {"target": "string", "location": "string"}}
+
+
+def snapshot_of(hub_list: list[dict], transform_permissions: str = "bucket-policy") -> dict:
+    return create_snapshot(hub_list, get_shared_inputs(hub_list, PROFILES, transform_permissions))
+
+
+@pytest.fixture
+def deployed_hubs() -> list[dict]:
+    """The hubs in the last deployment."""
+    return [make_hub("hub-a"), make_hub("hub-b", cdn=True), make_hub("hub-c", compute_profile="large")]
+
+
+@pytest.fixture
+def stack_outputs(deployed_hubs) -> dict:
+    """The last deployment's stack outputs (as `pulumi stack output --json` prints them)."""
+    return {"hub_snapshot": snapshot_of(deployed_hubs), "hub-b-cdn-hostname": "d111111abcdef8.cloudfront.net"}
+
+
+def test_plan_changed_hubs(deployed_hubs, stack_outputs):
+    hub_list = [
+        make_hub("hub-a", athena=ATHENA),
+        make_hub("hub-c", compute_profile="large"),
+        make_hub("hub-d", cdn=True),
+        make_hub("hub-b", cdn=True),
+    ]
+    # every hub already needs an Athena results bucket and CDN policies
+    deployed_hubs[0]["athena"] = {**ATHENA, "result_reuse_minutes": 60}
+    stack_outputs["hub_snapshot"] = snapshot_of(deployed_hubs)
+
+    plan = plan_deployment(stack_outputs["hub_snapshot"], snapshot_of(hub_list))
+    assert (plan.added, plan.changed, plan.removed, plan.unchanged) == (["hub-d"], ["hub-a"], [], ["hub-b", "hub-c"])
+    assert not plan.full_update
+    assert plan.targets == [get_hub_urn("hub-a"), get_hub_urn("hub-d")]
+
+
+def test_plan_removed_hub(deployed_hubs, stack_outputs):
+    plan = plan_deployment(stack_outputs["hub_snapshot"], snapshot_of(deployed_hubs[:2]), stack="dev")
+    assert plan.removed == ["hub-c"]
+    assert plan.targets == [get_hub_urn("hub-c", stack="dev")]
+
+
+def test_plan_without_changes(deployed_hubs, stack_outputs):
+    # registry order and key order don't matter
+    hub_list = [{"cdn": True, "repo": "hub-b", "org": "hubverse-org", "hub": "hub-b"}, *deployed_hubs[::2]]
+    plan = plan_deployment(stack_outputs["hub_snapshot"], snapshot_of(hub_list))
+    assert plan.unchanged == ["hub-a", "hub-b", "hub-c"]
+    assert plan.targets == []
+    assert not plan.has_changes
+
+
+@pytest.mark.parametrize(
+    "hub_list, transform_permissions",
+    [
+        # the first hub that needs a shared resource
+        ([make_hub("hub-a", athena=ATHENA), make_hub("hub-b", cdn=True), make_hub("hub-c")], "bucket-policy"),
+        ([make_hub("hub-a", transform_trigger={"type": "eventbridge"}), make_hub("hub-b", cdn=True)], "bucket-policy"),
+        # the first replica in a region needs the region's provider
+        (
+            [make_hub("hub-a"), make_hub("hub-b", cdn=True, replication={"regions": ["eu-west-1"]})],
+            "bucket-policy",
+        ),
+        # the consolidated bucket policies list every bucket
+        ([make_hub("hub-a"), make_hub("hub-b", cdn=True)], "consolidated"),
+    ],
+)
+def test_shared_changes_need_a_full_update(stack_outputs, hub_list, transform_permissions):
+    plan = plan_deployment(stack_outputs["hub_snapshot"], snapshot_of(hub_list, transform_permissions))
+    assert plan.full_update_reasons == ["the shared infrastructure's inputs changed"]
+    assert plan.targets == []
+
+
+@pytest.mark.parametrize("monitoring", [{}, {"errors_threshold": 1}, {"alarm_emails": ["hubverse@example.com"]}])
+def test_monitoring_changes_need_a_full_update(deployed_hubs, monitoring):
+    deployed = create_snapshot(deployed_hubs, get_shared_inputs(deployed_hubs, PROFILES, "bucket-policy"))
+    current = create_snapshot(
+        deployed_hubs,
+        get_shared_inputs(deployed_hubs, PROFILES, "bucket-policy", load_monitoring_settings(monitoring)),
+    )
+    plan = plan_deployment(deployed, current)
+    assert plan.full_update_reasons == ["the shared infrastructure's inputs changed"]
+
+
+def test_plan_without_snapshot(deployed_hubs):
+    plan = plan_deployment(None, snapshot_of(deployed_hubs))
+    assert plan.full_update
+    assert plan.added == ["hub-a", "hub-b", "hub-c"]
+
+
+def test_load_snapshot(tmp_path, stack_outputs):
+    outputs_path = tmp_path / "outputs.json"
+    outputs_path.write_text(json.dumps(stack_outputs))
+    manifest_path = tmp_path / "snapshot.json"
+    manifest_path.write_text(json.dumps(stack_outputs["hub_snapshot"]))
+
+    assert load_snapshot(outputs_path) == stack_outputs["hub_snapshot"]
+    assert load_snapshot(manifest_path) == stack_outputs["hub_snapshot"]
+    assert load_snapshot(tmp_path / "missing.json") is None
+
+
+def test_preview_only_declares_planned_hubs(run_program, deployed_hubs):
+    mocks = run_program(deployed_hubs, compute_profiles={"large": {"memory_size": 2048}}, planned_hubs={"hub-c"})
+    assert list(mocks.resources_of_type(BUCKET)) == ["hub-c"]
+
+
+def test_planned_hubs_only_in_previews(tmp_path, monkeypatch, deployed_hubs, stack_outputs):
+    plan = plan_deployment(stack_outputs["hub_snapshot"], snapshot_of([*deployed_hubs[1:], make_hub("hub-d")]))
+    plan_path = tmp_path / "plan.json"
+    plan_path.write_text(json.dumps(plan.to_dict()))
+    monkeypatch.setenv(PLAN_ENV_VAR, str(plan_path))
+
+    monkeypatch.setattr(pulumi.runtime, "is_dry_run", lambda: True)
+    # the removed hub-a isn't declared either
+    assert load_planned_hubs() == {"hub-d"}
+    monkeypatch.setattr(pulumi.runtime, "is_dry_run", lambda: False)
+    with pytest.raises(ValueError, match="can only be used with pulumi preview"):
+        load_planned_hubs()
@@ -0,0 +1,184 @@
+import json
+import time
+
+import pytest
+import yaml
+
+from hubverse_infrastructure.hubs.registry import DEFAULT_REGISTRY_PATH, HubRegistry, RegistryCache
+
+
+def write_admin_json(directory, hub_dir, bucket, owner="hubverse-org", repo=None, enabled=True):
+    path = directory / hub_dir / "admin.json"
+    path.parent.mkdir(parents=True)
+    admin = {
+        "name": hub_dir,
+        "repository": {"host": "github", "owner": owner, "name": repo or hub_dir},
+        "cloud": {"enabled": enabled, "host": {"name": "aws", "storage_service": "s3", "storage_location": bucket}},
+    }
+    path.write_text(json.dumps(admin))
+    return path
+
+
+def write_hubs_yaml(path, hubs):
+    path.write_text(yaml.safe_dump({"hubs": hubs}))
+    return path
+
+
+def test_load_hubs_yaml():
+    registry = HubRegistry.load(DEFAULT_REGISTRY_PATH)
+    assert "hubverse-cloud" in registry
+    assert registry.get("hubverse-cloud").org == "hubverse-org"
+    assert len(registry.names) == len(set(registry.names))
+
+
+def test_hub_list_is_a_copy(tmp_path):
+    path = write_hubs_yaml(tmp_path / "hubs.yaml", [{"hub": "hub-a", "org": "org", "repo": "repo", "cdn": True}])
+    registry = HubRegistry.from_yaml(path)
+
+    hub_list = registry.to_hub_list()
+    assert hub_list == [{"hub": "hub-a", "org": "org", "repo": "repo", "cdn": True}]
+    hub_list[0]["hub_bucket"] = "a resource"
+    assert registry.to_hub_list() == [{"hub": "hub-a", "org": "org", "repo": "repo", "cdn": True}]
+
+
+def test_unknown_hub():
+    registry = HubRegistry.load()
+    with pytest.raises(KeyError, match="unknown hub 'not-a-hub'"):
+        registry.get("not-a-hub")
+
+
+def test_validation_reports_every_problem(tmp_path):
+    hubs = [
+        {"hub": "hub-a", "org": "org", "repo": "repo"},
+        {"hub": "Hub_B", "org": "org", "repo": "repo"},
+        {"hub": "hub-c", "org": "org"},
+        {"hub": "hub-d", "org": "org", "repo": "repo", "cdnn": True},
+        {"hub": "hub-e", "org": "org", "repo": "repo", "cdn": "yes"},
+        "hub-f",
+    ]
+    path = write_hubs_yaml(tmp_path / "hubs.yaml", hubs)
+
+    with pytest.raises(ValueError) as excinfo:
+        HubRegistry.from_yaml(path)
+    errors = str(excinfo.value).splitlines()[1:]
+    assert errors == [
+        "hubs.yaml: hubs[1] (Hub_B): hub 'Hub_B' isn't a valid S3 bucket name "
+        "(3-63 lowercase letters, numbers, dots, and dashes)",
+        "hubs.yaml: hubs[2] (hub-c): missing repo",
+        "hubs.yaml: hubs[3] (hub-d): unknown hub settings: ['cdnn'] "
+        "(allowed: ['athena', 'cdn', 'compaction', 'compute_profile', 'event_filters', "
+        "'inventory', 'replication', 'shard', 'transform_trigger'])",
+        "hubs.yaml: hubs[4] (hub-e): cdn has the wrong type (str)",
+        "hubs.yaml: hubs[5]: expected a mapping with hub, org, and repo, got str",
+    ]
+
+
+def test_validation_reports_invalid_settings(tmp_path):
+    overlapping_filters = {"filters": [{"prefix": "raw/"}, {"prefix": "raw/model-output/"}]}
+    hubs = [
+        {"hub": "hub-a", "org": "org", "repo": "repo", "event_filters": overlapping_filters},
+        {"hub": "hub-b", "org": "org", "repo": "repo", "compaction": {"target_file_size_mb": 0}},
+        {"hub": "hub-c", "org": "org", "repo": "repo", "inventory": {"prefix": "model-output/"}},
+        {"hub": "hub-d", "org": "org", "repo": "repo", "transform_trigger": {"type": "queue", "batch_size": 0}},
+        {"hub": "hub-e", "org": "org", "repo": "repo", "transform_trigger": {"type": "bogus"}},
+        {"hub": "hub-f", "org": "org", "repo": "repo", "transform_trigger": {"type": "eventbridge", "batch_size": 10}},
+        {"hub": "hub-g", "org": "org", "repo": "repo", "shard": True},
+    ]
+    path = write_hubs_yaml(tmp_path / "hubs.yaml", hubs)
+
+    with pytest.raises(ValueError) as excinfo:
+        HubRegistry.from_yaml(path)
+    errors = str(excinfo.value).splitlines()[1:]
+    assert len(errors) == 6
+    assert errors[0].startswith("hubs.yaml: hubs[0] (hub-a): filters overlap:")
+    assert errors[1].startswith("hubs.yaml: hubs[1] (hub-b): target_file_size_mb must be between")
+    assert errors[2] == "hubs.yaml: hubs[3] (hub-d): batch_size must be between 1 and 10000, got 0"
+    assert errors[3] == "hubs.yaml: hubs[4] (hub-e): unknown transform_trigger type 'bogus'"
+    assert errors[4] == "hubs.yaml: hubs[5] (hub-f): the eventbridge transform_trigger does not accept other settings"
+    assert errors[5] == "hubs.yaml: hubs[6] (hub-g): shard has the wrong type (bool)"
+
+
+def test_duplicate_buckets(tmp_path):
+    hubs = [{"hub": "hub-a", "org": "org", "repo": "repo-1"}, {"hub": "hub-a", "org": "org", "repo": "repo-2"}]
+    path = write_hubs_yaml(tmp_path / "hubs.yaml", hubs)
+    with pytest.raises(ValueError, match=r"hubs\[1\] \(hub-a\): duplicate hub bucket 'hub-a' \(also in .*hubs\[0\]"):
+        HubRegistry.from_yaml(path)
+
+
+def test_load_admin_directory(tmp_path):
+    write_admin_json(tmp_path, "flu-hub", "flu-hub-bucket", owner="cdcepi", repo="FluSight-forecast-hub")
+    write_admin_json(tmp_path, "local-hub", "local-hub", enabled=False)
+
+    registry = HubRegistry.load(tmp_path)
+    assert registry.to_hub_list() == [{"hub": "flu-hub-bucket", "org": "cdcepi", "repo": "FluSight-forecast-hub"}]
+
+
+def test_admin_directory_errors(tmp_path):
+    write_admin_json(tmp_path, "hub-a", "shared-bucket")
+    write_admin_json(tmp_path, "hub-b", "shared-bucket")
+    (tmp_path / "hub-c").mkdir()
+    (tmp_path / "hub-c" / "admin.json").write_text("{not json")
+    write_admin_json(tmp_path, "hub-d", None)
+
+    with pytest.raises(ValueError) as excinfo:
+        HubRegistry.from_admin_directory(tmp_path)
+    errors = str(excinfo.value).splitlines()[1:]
+    assert errors[0].startswith("hub-c/admin.json: invalid JSON")
+    assert errors[1] == "hub-d/admin.json: missing cloud.host.storage_location"
+
+
+def test_cache_only_parses_changed_files(tmp_path):
+    hubs_dir = tmp_path / "hubs"
+    for i in range(3):
+        write_admin_json(hubs_dir, f"hub-{i}", f"hub-{i}")
+    cache_path = tmp_path / "cache" / "registry.json"
+
+    cache = RegistryCache(cache_path)
+    HubRegistry.from_admin_directory(hubs_dir, cache)
+    assert (cache.hits, cache.misses) == (0, 3)
+    cache.save()
+
+    # a new process (a new cache object) reuses the saved cache
+    admin_path = hubs_dir / "hub-1" / "admin.json"
+    admin = json.loads(admin_path.read_text())
+    admin["repository"]["owner"] = "reichlab"
+    admin_path.write_text(json.dumps(admin))
+
+    cache = RegistryCache(cache_path)
+    registry = HubRegistry.from_admin_directory(hubs_dir, cache)
+    assert (cache.hits, cache.misses) == (2, 1)
+    assert registry.get("hub-1").org == "reichlab"
+
+    # the old version of the changed file is dropped when the cache is saved
+    cache.save()
+    assert len(json.loads(cache_path.read_text())) == 3
+
+
+def test_load_cached(tmp_path):
+    hubs_dir = tmp_path / "hubs"
+    for i in range(3):
+        write_admin_json(hubs_dir, f"hub-{i}", f"hub-{i}")
+    cache_path = tmp_path / ".pulumi" / "hub-registry-cache.json"
+
+    registry = HubRegistry.load_cached(hubs_dir, cache_path)
+    assert registry.names == ["hub-0", "hub-1", "hub-2"]
+    assert len(json.loads(cache_path.read_text())) == 3
+
+    # a cache that can't be written doesn't stop the registry from loading
+    assert HubRegistry.load_cached(hubs_dir, tmp_path / "hubs" / "hub-0" / "admin.json" / "cache.json").names == [
+        "hub-0",
+        "hub-1",
+        "hub-2",
+    ]
+
+
+def test_load_many_hubs(tmp_path):
+    hubs = [{"hub": f"example-hub-{i:04d}", "org": "hubverse-org", "repo": f"example-hub-{i:04d}"} for i in range(500)]
+    path = write_hubs_yaml(tmp_path / "hubs.yaml", hubs)
+
+    start = time.perf_counter()
+    registry = HubRegistry.from_yaml(path)
+    assert len(registry) == 500
+    assert registry.get("example-hub-0499").repo == "example-hub-0499"
+    # generous, so that the test isn't flaky on slow CI runners
+    assert time.perf_counter() - start < 1
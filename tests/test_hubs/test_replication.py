@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+from hubverse_infrastructure.hubs.replication import ReplicationSettings, get_replication_settings
+from tests.conftest import make_hub
+
+BUCKET = "aws:s3/bucket:Bucket"
+BUCKET_POLICY = "aws:s3/bucketPolicy:BucketPolicy"
+PROVIDER = "pulumi:providers:aws"
+REPLICATION = "aws:s3/bucketReplicationConfig:BucketReplicationConfig"
+ROLE_POLICY = "aws:iam/rolePolicy:RolePolicy"
+
+
+def test_replica_buckets(run_program):
+    mocks = run_program(
+        [make_hub("hub-a", replication={"regions": ["eu-west-1", "ap-southeast-2"]}), make_hub("hub-b")]
+    )
+
+    buckets = mocks.resources_of_type(BUCKET)
+    assert set(buckets) == {"hub-a", "hub-a-eu-west-1", "hub-a-ap-southeast-2", "hub-b"}
+    replica = buckets["hub-a-eu-west-1"]
+    assert replica["versioning"] == {"enabled": True}
+    assert replica["corsRules"] == buckets["hub-a"]["corsRules"]
+    assert replica["tags"] == {"hub": "hub-a"}
+    assert "hub-a-eu-west-1-read-bucket-policy" in mocks.resources_of_type(BUCKET_POLICY)
+
+    # one provider per region, created in that region
+    providers = mocks.resources_of_type(PROVIDER)
+    assert {name: provider["region"] for name, provider in providers.items() if name != "default"} == {
+        "hubverse-eu-west-1": "eu-west-1",
+        "hubverse-ap-southeast-2": "ap-southeast-2",
+    }
+    replica_resource = next(resource for resource in mocks.resources if resource.name == "hub-a-eu-west-1")
+    assert "hubverse-eu-west-1" in replica_resource.provider
+
+
+def test_replication_rules(run_program):
+    hubs = [
+        make_hub(
+            "hub-a",
+            replication={"regions": ["eu-west-1", "ap-southeast-2"], "prefixes": ["model-output/", "compacted/"]},
+        )
+    ]
+    mocks = run_program(hubs)
+
+    replication = mocks.resources_of_type(REPLICATION)["hub-a-replication"]
+    assert replication["bucket"] == "hub-a_id"
+    assert replication["role"] == "arn:mock:hub-a-replication"
+    assert [(rule["id"], rule["priority"], rule["filter"]["prefix"]) for rule in replication["rules"]] == [
+        ("model-output-eu-west-1", 0, "model-output/"),
+        ("compacted-eu-west-1", 1, "compacted/"),
+        ("model-output-ap-southeast-2", 2, "model-output/"),
+        ("compacted-ap-southeast-2", 3, "compacted/"),
+    ]
+    rule = replication["rules"][0]
+    assert rule["destination"] == {"bucket": "arn:mock:hub-a-eu-west-1"}
+    assert rule["deleteMarkerReplication"] == {"status": "Enabled"}
+
+    policy = json.loads(mocks.resources_of_type(ROLE_POLICY)["hub-a-replication-policy"]["policy"])
+    assert policy["Statement"][2]["Resource"] == [
+        "arn:aws:s3:::hub-a-eu-west-1/*",
+        "arn:aws:s3:::hub-a-ap-southeast-2/*",
+    ]
+
+
+def test_replica_stack_output(run_program, monkeypatch):
+    exports = {}
+    monkeypatch.setattr("pulumi.export", lambda name, value: exports.update({name: value}))
+    run_program([make_hub("hub-a", replication={"regions": ["eu-west-1"]})])
+
+    assert exports["hub-a-replicas"] == {
+        "eu-west-1": {"bucket": "hub-a-eu-west-1", "url": "https://hub-a-eu-west-1.s3.eu-west-1.amazonaws.com"}
+    }
+
+
+def test_no_replicas_by_default(run_program):
+    mocks = run_program([make_hub("hub-a")])
+    assert mocks.resources_of_type(REPLICATION) == {}
+    assert set(mocks.resources_of_type(BUCKET)) == {"hub-a"}
+
+
+def test_default_replication_settings():
+    assert get_replication_settings(make_hub("hub-a")) is None
+    assert get_replication_settings(make_hub("hub-a", replication={"regions": ["eu-west-1"]})) == ReplicationSettings(
+        regions=("eu-west-1",), prefixes=("model-output/",)
+    )
+
+
+@pytest.mark.parametrize(
+    "replication, message",
+    [
+        ({}, "hub-a: regions must list at least one region"),
+        ({"regions": ["europe"]}, "hub-a: 'europe' isn't an AWS region"),
+        ({"regions": ["eu-west-1", "eu-west-1"]}, "hub-a: regions can't be listed more than once"),
+        ({"regions": ["eu-west-1"], "prefixes": ["raw/"]}, "hub-a: prefixes must be directories"),
+        ({"regions": ["eu-west-1"], "prefixes": ["model-output"]}, "hub-a: prefixes must be directories"),
+        ({"regions": ["eu-west-1"], "storage_class": "GLACIER"}, r"hub-a: unknown replication settings"),
+    ],
+)
+def test_invalid_replication_settings(replication, message):
+    with pytest.raises(ValueError, match=message):
+        get_replication_settings(make_hub("hub-a", replication=replication))
+
+
+@pytest.mark.parametrize(
+    "hub_name, regions, message",
+    [
+        ("hub-a", ["us-east-1"], "hub-a: regions can't include the hub bucket's region"),
+        ("h" * 52, ["ap-southeast-2"], "too long for a replica bucket in ap-southeast-2"),
+    ],
+)
+def test_invalid_replicas(run_program, hub_name, regions, message):
+    with pytest.raises(Exception, match=message):
+        run_program([make_hub(hub_name, replication={"regions": regions})])
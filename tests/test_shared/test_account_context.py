@@ -0,0 +1,55 @@
+import pulumi
+import pytest
+
+from tests.conftest import make_hub
+from tests.mocks import RecordingMocks
+
+OIDC_TOKEN = "aws:iam/getOpenIdConnectProvider:getOpenIdConnectProvider"
+CALLER_IDENTITY_TOKEN = "aws:index/getCallerIdentity:getCallerIdentity"
+REGION_TOKEN = "aws:index/getRegion:getRegion"
+POLICY_DOCUMENT_TOKEN = "aws:iam/getPolicyDocument:getPolicyDocument"
+
+
+@pytest.fixture
+def mocks() -> RecordingMocks:
+    mocks = RecordingMocks()
+    # preview=True keeps the lambda package placeholder from calling S3
+    pulumi.runtime.set_mocks(mocks, preview=True)
+    return mocks
+
+
+from hubverse_infrastructure.program import create_hubverse_infrastructure  # noqa
+from hubverse_infrastructure.shared.account_context import AccountContext  # noqa
+
+
+@pulumi.runtime.test
+def test_account_context_memoizes_lookups(mocks):
+    context = AccountContext()
+
+    assert context.account_id == "123456789012"
+    assert context.account_id == "123456789012"
+    assert context.region == "us-east-1"
+    assert context.oidc_github.url == "token.actions.githubusercontent.com"
+    assert context.oidc_github.url == "token.actions.githubusercontent.com"
+
+    assert mocks.calls[CALLER_IDENTITY_TOKEN] == 1
+    assert mocks.calls[REGION_TOKEN] == 1
+    assert mocks.calls[OIDC_TOKEN] == 1
+    assert context.invokes == 3
+    assert context.lookups == 5
+    assert context.invokes_saved == 2
+
+
+@pulumi.runtime.test
+def test_account_context_invokes_once_per_run(mocks):
+    context = AccountContext()
+    hub_count = 5
+    hub_list = [make_hub(f"test-hub-{i}") for i in range(hub_count)]
+    create_hubverse_infrastructure(hub_list, context)
+
+    assert mocks.calls[OIDC_TOKEN] == 1
+    assert mocks.calls[CALLER_IDENTITY_TOKEN] == 1
+    assert mocks.calls[REGION_TOKEN] == 1
+    assert context.invokes_saved == hub_count - 1
+    # policy documents are built locally and don't need an invoke
+    assert mocks.calls[POLICY_DOCUMENT_TOKEN] == 0
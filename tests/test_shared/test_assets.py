@@ -0,0 +1,89 @@
+import io
+from zipfile import ZipFile
+
+import pulumi
+import pytest
+
+from hubverse_infrastructure.shared import assets
+from hubverse_infrastructure.shared.assets import HASH_METADATA_KEY, Asset, AssetBootstrapper
+from hubverse_infrastructure.shared.hubverse_transforms import create_lambda_package_placeholder
+
+BUCKET = "hubverse-assets"
+
+
+@pytest.fixture
+def s3_bucket() -> str:
+    return BUCKET
+
+
+@pytest.fixture
+def s3_requests(s3_client):
+    """Record the S3 operations that the client makes."""
+    operations: list[str] = []
+    s3_client.meta.events.register("before-call.s3.*", lambda model, **kwargs: operations.append(model.name))
+    return operations
+
+
+def test_seed_missing_asset(s3_client, s3_requests):
+    result = AssetBootstrapper(BUCKET, s3_client).seed([Asset(key="schemas/tasks.json", content=b"{}")])
+    assert result == {"schemas/tasks.json": "created"}
+    assert s3_requests == ["HeadObject", "PutObject"]
+
+    head = s3_client.head_object(Bucket=BUCKET, Key="schemas/tasks.json")
+    assert head["Metadata"][HASH_METADATA_KEY] == Asset(key="schemas/tasks.json", content=b"{}").sha256
+
+
+def test_existing_asset_is_not_replaced(s3_client, s3_requests):
+    s3_client.put_object(Bucket=BUCKET, Key="lambda/package.zip", Body=b"the real package")
+    s3_requests.clear()
+
+    result = AssetBootstrapper(BUCKET, s3_client).seed([Asset(key="lambda/package.zip", content=b"placeholder")])
+    assert result == {"lambda/package.zip": "exists"}
+    # only the object's metadata is requested
+    assert s3_requests == ["HeadObject"]
+    assert s3_client.get_object(Bucket=BUCKET, Key="lambda/package.zip")["Body"].read() == b"the real package"
+
+
+def test_replaced_asset_is_only_uploaded_when_it_changes(s3_client, s3_requests):
+    bootstrapper = AssetBootstrapper(BUCKET, s3_client)
+    asset = Asset(key="layers/layer.zip", content=b"version 1", replace=True)
+
+    assert bootstrapper.seed([asset]) == {"layers/layer.zip": "created"}
+    s3_requests.clear()
+    assert bootstrapper.seed([asset]) == {"layers/layer.zip": "unchanged"}
+    assert s3_requests == ["HeadObject"]
+
+    new_asset = Asset(key="layers/layer.zip", content=b"version 2", replace=True)
+    assert bootstrapper.seed([new_asset]) == {"layers/layer.zip": "updated"}
+    assert s3_client.get_object(Bucket=BUCKET, Key="layers/layer.zip")["Body"].read() == b"version 2"
+
+
+def test_seed_many_assets(s3_client):
+    asset_list = [Asset(key=f"schemas/schema-{i}.json", content=f'{{"id": {i}}}'.encode()) for i in range(20)]
+    s3_client.put_object(Bucket=BUCKET, Key="schemas/schema-0.json", Body=b"{}")
+
+    result = AssetBootstrapper(BUCKET, s3_client, max_workers=4).seed(asset_list)
+    assert list(result) == [asset.key for asset in asset_list]
+    assert result["schemas/schema-0.json"] == "exists"
+    assert list(result.values()).count("created") == 19
+
+
+def test_seed_error(s3_client):
+    with pytest.raises(Exception, match="Error when seeding asset: not-a-bucket/key"):
+        AssetBootstrapper("not-a-bucket", s3_client).seed([Asset(key="key", content=b"")])
+
+
+def test_lambda_package_placeholder(s3_client, monkeypatch):
+    monkeypatch.setattr(pulumi.runtime, "is_dry_run", lambda: False)
+    # use the mocked client as the shared client
+    monkeypatch.setattr(assets, "get_s3_client", lambda: s3_client)
+
+    create_lambda_package_placeholder(BUCKET, "lambda/hubverse-transform-model-output.zip")
+    package = s3_client.get_object(Bucket=BUCKET, Key="lambda/hubverse-transform-model-output.zip")["Body"].read()
+    assert ZipFile(io.BytesIO(package)).read("placeholder") == b"lambda function placeholder"
+
+    # a deployed package is left alone
+    s3_client.put_object(Bucket=BUCKET, Key="lambda/hubverse-transform-model-output.zip", Body=b"deployed")
+    create_lambda_package_placeholder(BUCKET, "lambda/hubverse-transform-model-output.zip")
+    package = s3_client.get_object(Bucket=BUCKET, Key="lambda/hubverse-transform-model-output.zip")["Body"].read()
+    assert package == b"deployed"
@@ -0,0 +1,176 @@
+import io
+import json
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from hubverse_infrastructure.shared.compaction import CompactionSettings, get_compaction_settings
+from hubverse_infrastructure.shared.compaction_handler import compact_bucket, merge_parquet, plan_parts
+from tests.conftest import make_hub
+
+BUCKET = "hub-a"
+FUNCTION = "aws:lambda/function:Function"
+ROLE_POLICY = "aws:iam/rolePolicy:RolePolicy"
+SCHEDULE = "aws:scheduler/schedule:Schedule"
+
+
+def join(files: list[bytes]) -> bytes:
+    """Merge files by concatenating them (so that tests of the compaction bookkeeping can use any bytes)."""
+    return b"".join(files)
+
+
+def to_parquet(table: pa.Table) -> bytes:
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer)
+    return buffer.getvalue()
+
+
+def put(client, key: str, body: bytes = b"x"):
+    client.put_object(Bucket=BUCKET, Key=key, Body=body)
+
+
+def read(client, key: str) -> bytes:
+    return client.get_object(Bucket=BUCKET, Key=key)["Body"].read()
+
+
+def list_keys(client, prefix: str) -> list[str]:
+    return [obj["Key"] for obj in client.list_objects_v2(Bucket=BUCKET, Prefix=prefix).get("Contents", [])]
+
+
+def test_compaction_infrastructure(run_program):
+    mocks = run_program(
+        [
+            make_hub("hub-a", compaction={"schedule": "cron(0 6 ? * MON *)", "target_file_size_mb": 64}),
+            make_hub("hub-b"),
+        ]
+    )
+
+    function = mocks.resources_of_type(FUNCTION)["hubverse-compact-model-output"]
+    assert function["handler"] == "compaction_handler.lambda_handler"
+    assert function["timeout"] == 900
+
+    policy = json.loads(mocks.resources_of_type(ROLE_POLICY)["hubverse-compact-model-output-policy"]["policy"])
+    resources = {statement["Sid"]: statement["Resource"] for statement in policy["Statement"]}
+    assert resources["WriteCompactedModelOutput"] == "arn:aws:s3:::hub-a/compacted/model-output/*"
+
+    schedules = mocks.resources_of_type(SCHEDULE)
+    assert list(schedules) == ["hub-a-compaction"]
+    schedule = schedules["hub-a-compaction"]
+    assert schedule["name"] == "hubverse-compact-hub-a"
+    assert schedule["scheduleExpression"] == "cron(0 6 ? * MON *)"
+    assert json.loads(schedule["target"]["input"]) == {
+        "bucket": "hub-a",
+        "source_prefix": "model-output/",
+        "target_prefix": "compacted/model-output/",
+        "target_file_size_bytes": 64 * 1024 * 1024,
+    }
+
+
+def test_no_compaction_infrastructure(run_program):
+    mocks = run_program([make_hub("hub-a")])
+    assert "hubverse-compact-model-output" not in mocks.resources_of_type(FUNCTION)
+    assert mocks.resources_of_type(SCHEDULE) == {}
+
+
+def test_compaction_policy_size_limit(run_program):
+    # the policy lists each bucket, so it fits a few dozen hubs
+    run_program([make_hub(f"example-hub-{i:04d}", compaction={}) for i in range(40)])
+    with pytest.raises(ValueError, match="hubverse-compact-model-output Lambda's policy is 12120 characters"):
+        run_program([make_hub(f"example-hub-{i:04d}", compaction={}) for i in range(60)])
+
+
+def test_default_compaction_settings():
+    assert get_compaction_settings(make_hub("hub-a")) is None
+    assert get_compaction_settings(make_hub("hub-a", compaction={})) == CompactionSettings()
+
+
+@pytest.mark.parametrize(
+    "compaction, message",
+    [
+        ({"schedule": "daily"}, "hub-a: schedule must be a rate"),
+        ({"target_file_size_mb": 0}, "hub-a: target_file_size_mb must be between 1 and 256"),
+        ({"target_file_size_mb": 1024}, "hub-a: target_file_size_mb must be between 1 and 256"),
+        ({"size": 64}, r"hub-a: unknown compaction settings: \['size'\]"),
+    ],
+)
+def test_invalid_compaction_settings(compaction, message):
+    with pytest.raises(ValueError, match=message):
+        get_compaction_settings(make_hub("hub-a", compaction=compaction))
+
+
+def test_plan_parts():
+    files = [{"Key": str(i), "Size": size} for i, size in enumerate([40, 40, 40, 150, 10])]
+    assert [[obj["Key"] for obj in part] for part in plan_parts(files, 100)] == [["0", "1"], ["2"], ["3"], ["4"]]
+
+
+def test_compact_bucket(s3_client):
+    put(s3_client, "model-output/team1-model/2024-10-05-team1-model.parquet", b"a")
+    put(s3_client, "model-output/team1-model/2024-10-12-team1-model.parquet", b"b")
+    put(s3_client, "model-output/team2-model/2024-10-05-team2-model.parquet", b"c")
+    put(s3_client, "model-output/README.md")
+
+    result = compact_bucket(s3_client, BUCKET, merge=join)
+    assert result["directories"] == {
+        "model-output/team1-model/": {"status": "compacted", "files": 2, "parts": 1},
+        "model-output/team2-model/": {"status": "compacted", "files": 1, "parts": 1},
+    }
+    assert read(s3_client, "compacted/model-output/team1-model/part-00000.parquet") == b"ab"
+    manifest = json.loads(read(s3_client, "compacted/model-output/team1-model/_manifest.json"))
+    assert manifest["parts"] == ["compacted/model-output/team1-model/part-00000.parquet"]
+
+    # nothing changed, so nothing is rewritten
+    result = compact_bucket(s3_client, BUCKET, merge=join)
+    assert {directory["status"] for directory in result["directories"].values()} == {"unchanged"}
+
+
+def test_compact_bucket_merges_parquet(s3_client):
+    put(
+        s3_client,
+        "model-output/team1-model/2024-10-05-team1-model.parquet",
+        to_parquet(pa.table({"reference_date": ["2024-10-05"], "location": ["US"], "value": [1.0]})),
+    )
+    put(
+        s3_client,
+        "model-output/team1-model/2024-10-12-team1-model.parquet",
+        to_parquet(pa.table({"reference_date": ["2024-10-12"], "location": ["01"], "value": [2.0]})),
+    )
+
+    result = compact_bucket(s3_client, BUCKET)
+    assert result["directories"]["model-output/team1-model/"] == {"status": "compacted", "files": 2, "parts": 1}
+    merged = pq.read_table(io.BytesIO(read(s3_client, "compacted/model-output/team1-model/part-00000.parquet")))
+    assert merged.column("reference_date").to_pylist() == ["2024-10-05", "2024-10-12"]
+    assert merged.column("value").to_pylist() == [1.0, 2.0]
+
+
+def test_compact_bucket_after_changes(s3_client):
+    for i in range(3):
+        put(s3_client, f"model-output/team1-model/2024-10-0{i + 1}-team1-model.parquet", b"x" * 10)
+    put(s3_client, "model-output/team2-model/2024-10-05-team2-model.parquet")
+    compact_bucket(s3_client, BUCKET, target_file_size=10, merge=join)
+    assert len(list_keys(s3_client, "compacted/model-output/team1-model/")) == 4
+
+    # a removed submission leaves fewer parts, and a removed model leaves no compacted files
+    s3_client.delete_object(Bucket=BUCKET, Key="model-output/team1-model/2024-10-03-team1-model.parquet")
+    s3_client.delete_object(Bucket=BUCKET, Key="model-output/team2-model/2024-10-05-team2-model.parquet")
+    result = compact_bucket(s3_client, BUCKET, target_file_size=10, merge=join)
+
+    assert result["directories"] == {
+        "model-output/team1-model/": {"status": "compacted", "files": 2, "parts": 2},
+        "model-output/team2-model/": {"status": "removed", "files": 0, "parts": 0},
+    }
+    assert list_keys(s3_client, "compacted/") == [
+        "compacted/model-output/team1-model/_manifest.json",
+        "compacted/model-output/team1-model/part-00000.parquet",
+        "compacted/model-output/team1-model/part-00001.parquet",
+    ]
+
+
+def test_merge_parquet():
+    files = [
+        to_parquet(pa.table({"location": ["US"], "value": [1.0]})),
+        to_parquet(pa.table({"location": ["01"], "value": [2.0], "output_type_id": ["0.5"]})),
+    ]
+    merged = pq.read_table(io.BytesIO(merge_parquet(files)))
+    assert merged.column("location").to_pylist() == ["US", "01"]
+    assert merged.column("output_type_id").to_pylist() == [None, "0.5"]
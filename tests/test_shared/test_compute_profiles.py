@@ -0,0 +1,151 @@
+import json
+
+import pytest
+
+from hubverse_infrastructure.shared.compute_profiles import (
+    ComputeProfile,
+    get_compute_profile_name,
+    load_compute_profiles,
+)
+from tests.conftest import make_hub
+
+LAMBDA_FUNCTION = "aws:lambda/function:Function"
+LAMBDA_ALIAS = "aws:lambda/alias:Alias"
+PROVISIONED_CONCURRENCY = "aws:lambda/provisionedConcurrencyConfig:ProvisionedConcurrencyConfig"
+BUCKET_NOTIFICATION = "aws:s3/bucketNotification:BucketNotification"
+EVENT_RULE = "aws:cloudwatch/eventRule:EventRule"
+EVENT_TARGET = "aws:cloudwatch/eventTarget:EventTarget"
+ROLE = "aws:iam/role:Role"
+
+PROFILES = {
+    "large": {
+        "memory_size": 4096,
+        "ephemeral_storage": 4096,
+        "architecture": "arm64",
+        "reserved_concurrency": 20,
+        "provisioned_concurrency": 2,
+    },
+}
+
+
+def test_load_compute_profiles_includes_default():
+    profiles = load_compute_profiles(None)
+    assert profiles == {"default": ComputeProfile()}
+
+    profiles = load_compute_profiles(PROFILES)
+    assert list(profiles) == ["default", "large"]
+    assert profiles["large"].memory_size == 4096
+    assert profiles["large"].timeout == 600
+
+
+def test_load_compute_profiles_overrides_default():
+    profiles = load_compute_profiles({"default": {"memory_size": 1024}})
+    assert profiles["default"].memory_size == 1024
+
+
+@pytest.mark.parametrize(
+    "settings, message",
+    [
+        ({"memory": 1024}, "unknown compute profile settings: \\['memory'\\]"),
+        ({"memory_size": 64}, "memory_size must be between 128 and 10240"),
+        ({"architecture": "sparc"}, "architecture must be one of"),
+        ({"ephemeral_storage": 20000}, "ephemeral_storage must be between 512 and 10240"),
+        ({"reserved_concurrency": 1, "provisioned_concurrency": 2}, "can't be more than reserved_concurrency"),
+    ],
+)
+def test_load_compute_profiles_validates_settings(settings, message):
+    with pytest.raises(ValueError, match=message):
+        load_compute_profiles({"large": settings})
+
+
+def test_invalid_profile_name():
+    with pytest.raises(ValueError, match="compute profile names must be"):
+        load_compute_profiles({"Large Files": {}})
+
+
+def test_get_compute_profile_name():
+    profiles = load_compute_profiles(PROFILES)
+    assert get_compute_profile_name(make_hub("hub-a"), profiles) == "default"
+    assert get_compute_profile_name(make_hub("hub-a", compute_profile="large"), profiles) == "large"
+    with pytest.raises(ValueError, match="hub-a: unknown compute_profile 'huge'"):
+        get_compute_profile_name(make_hub("hub-a", compute_profile="huge"), profiles)
+
+
+def test_default_profile_keeps_original_lambda(run_program):
+    mocks = run_program([make_hub("hub-a")])
+
+    functions = mocks.resources_of_type(LAMBDA_FUNCTION)
+    assert list(functions) == ["hubverse-transform-model-output"]
+    function = functions["hubverse-transform-model-output"]
+    assert function["memorySize"] == 500
+    assert function["timeout"] == 600
+    assert function["publish"] is False
+    assert mocks.resources_of_type(LAMBDA_ALIAS) == {}
+    assert mocks.resources_of_type(PROVISIONED_CONCURRENCY) == {}
+
+
+def test_one_lambda_per_profile(run_program):
+    mocks = run_program([make_hub("hub-a"), make_hub("hub-b", compute_profile="large")], PROFILES)
+
+    functions = mocks.resources_of_type(LAMBDA_FUNCTION)
+    assert sorted(functions) == ["hubverse-transform-model-output", "hubverse-transform-model-output-large"]
+    large = functions["hubverse-transform-model-output-large"]
+    assert large["memorySize"] == 4096
+    assert large["architectures"] == ["arm64"]
+    assert large["ephemeralStorage"] == {"size": 4096}
+    assert large["reservedConcurrentExecutions"] == 20
+    assert large["publish"] is True
+
+    # provisioned concurrency is configured on the profile's alias
+    aliases = mocks.resources_of_type(LAMBDA_ALIAS)
+    assert list(aliases) == ["hubverse-transform-model-output-large-live"]
+    provisioned = mocks.resources_of_type(PROVISIONED_CONCURRENCY)
+    assert len(provisioned) == 1
+    assert next(iter(provisioned.values()))["provisionedConcurrentExecutions"] == 2
+
+    # every profile's function shares the transform role
+    role = mocks.resources_of_type(ROLE)["hubverse-transform-model-output-role"]
+    trust_policy = json.loads(role["assumeRolePolicy"])
+    assert trust_policy["Statement"][0]["Condition"]["StringEquals"]["aws:SourceArn"] == [
+        "arn:aws:lambda:us-east-1:123456789012:function:hubverse-transform-model-output-large",
+        "arn:aws:lambda:us-east-1:123456789012:function:hubverse-transform-model-output",
+    ]
+
+
+def test_hubs_trigger_their_profile_lambda(run_program):
+    mocks = run_program([make_hub("hub-a"), make_hub("hub-b", compute_profile="large")], PROFILES)
+
+    notifications = mocks.resources_of_type(BUCKET_NOTIFICATION)
+    lambda_arns = {name: config["lambdaFunctions"][0]["lambdaFunctionArn"] for name, config in notifications.items()}
+    assert lambda_arns == {
+        "hub-a-create-notification": "arn:mock:hubverse-transform-model-output",
+        # hubs with provisioned concurrency invoke the alias
+        "hub-b-create-notification": "arn:mock:hubverse-transform-model-output-large-live",
+    }
+
+
+def test_eventbridge_rule_per_profile(run_program):
+    hub_list = [
+        make_hub("hub-a", transform_trigger={"type": "eventbridge"}),
+        make_hub("hub-b", compute_profile="large", transform_trigger={"type": "eventbridge"}),
+        make_hub("hub-c", compute_profile="large", transform_trigger={"type": "eventbridge"}),
+    ]
+    mocks = run_program(hub_list, PROFILES)
+
+    rules = mocks.resources_of_type(EVENT_RULE)
+    assert sorted(rules) == ["hubverse-transform-model-output-events", "hubverse-transform-model-output-events-large"]
+    default_pattern = json.loads(rules["hubverse-transform-model-output-events"]["eventPattern"])
+    assert default_pattern["detail"]["bucket"] == {"name": ["hub-a"]}
+    large_pattern = json.loads(rules["hubverse-transform-model-output-events-large"]["eventPattern"])
+    assert large_pattern["detail"]["bucket"] == {"name": ["hub-b", "hub-c"]}
+
+    target_arns = sorted(target["arn"] for target in mocks.resources_of_type(EVENT_TARGET).values())
+    assert target_arns == [
+        "arn:mock:hubverse-transform-model-output",
+        "arn:mock:hubverse-transform-model-output-large-live",
+    ]
+
+
+def test_unknown_profile(run_program):
+    with pytest.raises(ValueError, match="hub-a: unknown compute_profile 'huge'"):
+        run_program([make_hub("hub-a", compute_profile="huge")])
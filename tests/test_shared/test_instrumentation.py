@@ -0,0 +1,92 @@
+import json
+
+from hubverse_infrastructure.shared.instrumentation import Instrumentation, compare_reports
+from tests.conftest import make_hub
+
+
+def make_hubs(hub_count: int) -> list[dict]:
+    return [make_hub(f"example-hub-{i}") for i in range(hub_count)]
+
+
+def test_disabled_instrumentation_records_nothing(run_program):
+    instrumentation = Instrumentation()
+    run_program(make_hubs(2), instrumentation=instrumentation)
+
+    report = instrumentation.report()
+    assert report["hub_count"] == 0
+    assert report["phases"] == {}
+    assert report["invokes"] == {}
+    assert report["resources"]["total"] == 0
+    assert instrumentation.time_invoke("account_id", lambda: "123") == "123"
+
+
+def test_instrumentation_report(run_program):
+    instrumentation = Instrumentation(enabled=True)
+    mocks = run_program(make_hubs(3), instrumentation=instrumentation)
+    report = instrumentation.report()
+
+    assert report["hub_count"] == 3
+    assert report["phases"]["shared"]["count"] == 1
+    for phase in ["hub", "hub.s3", "hub.athena", "hub.iam"]:
+        assert report["phases"][phase]["count"] == 3
+
+    # a hub's time includes its S3, Athena, and IAM phases
+    hub = report["hubs"]["example-hub-0"]
+    assert hub["seconds"] == hub["phases"]["hub"]
+    assert hub["seconds"] >= hub["phases"]["hub.s3"]
+
+    # every resource is counted, and a hub's resources (including its component) are counted for the hub
+    assert report["resources"]["total"] == len(mocks.resources)
+    assert report["resources"]["by_type"]["hubverse:hubs:HubverseHub"] == 3
+    assert hub["resources"] == sum(1 for resource in mocks.resources if resource.name.startswith("example-hub-0"))
+
+    # the account context's invokes are made once each
+    assert {name: invoke["count"] for name, invoke in report["invokes"].items()} == {
+        "account_id": 1,
+        "oidc_github": 1,
+        "region": 1,
+    }
+
+
+def test_instrumentation_summary(run_program):
+    instrumentation = Instrumentation(enabled=True)
+    run_program(make_hubs(12), instrumentation=instrumentation)
+
+    summary = instrumentation.summary()
+    assert summary["hub_count"] == 12
+    assert summary["invoke_count"] == 3
+    assert len(summary["slowest_hubs"]) == 10
+    assert list(summary["slowest_hubs"].values()) == sorted(summary["slowest_hubs"].values(), reverse=True)
+
+
+def test_instrumentation_writes_report(run_program, tmp_path):
+    report_path = tmp_path / "report.json"
+    instrumentation = Instrumentation(enabled=True, report_path=report_path)
+    run_program(make_hubs(1), instrumentation=instrumentation)
+
+    instrumentation.finish()
+    report = json.loads(report_path.read_text())
+    assert report["hub_count"] == 1
+    assert "example-hub-0" in report["hubs"]
+
+
+def test_compare_reports():
+    def make_report(hub_seconds: dict[str, float]) -> dict:
+        return {
+            "total_seconds": sum(hub_seconds.values()) + 1,
+            "hub_count": len(hub_seconds),
+            "phases": {"shared": {"count": 1, "total_seconds": 1.0, "max_seconds": 1.0}},
+            "hubs": {hub: {"seconds": seconds, "phases": {}, "resources": 10} for hub, seconds in hub_seconds.items()},
+            "invokes": {},
+            "resources": {"total": 10 * len(hub_seconds), "by_type": {}},
+        }
+
+    old = make_report({"hub-a": 0.5, "hub-b": 0.5})
+    new = make_report({"hub-a": 0.5, "hub-b": 2.0, "hub-c": 0.25})
+    lines = compare_reports(old, new, hub_count=2)
+
+    assert lines[1].split() == ["total", "seconds", "2.000", "3.750", "+1.750", "+88%"]
+    assert lines[2].split() == ["hubs", "2", "3", "+1"]
+    assert lines[3].split() == ["resources", "20", "30", "+10"]
+    # the hubs that changed the most, largest change first
+    assert [line.split()[0] for line in lines[-2:]] == ["hub-b", "hub-c"]
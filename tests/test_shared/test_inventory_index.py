@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from hubverse_infrastructure.shared.inventory_index_handler import (
+    INDEX_KEY,
+    find_latest_manifest,
+    get_manifest_prefix,
+    lambda_handler,
+    update_index,
+)
+
+BUCKET = "hub-a"
+MANIFEST_PREFIX = "inventory/hub-a/model-output/"
+
+
+def deliver(client, delivery: str, complete: bool = True):
+    """Write an inventory delivery the way S3 does (the checksum last)."""
+    manifest = {
+        "sourceBucket": BUCKET,
+        "creationTimestamp": "1728090000000",
+        "fileFormat": "Parquet",
+        "fileSchema": "message s3.inventory { required binary bucket (STRING); }",
+        "files": [{"key": f"{MANIFEST_PREFIX}data/{delivery}.parquet", "size": 1234, "MD5checksum": "abc"}],
+    }
+    client.put_object(Bucket=BUCKET, Key=f"{MANIFEST_PREFIX}{delivery}/manifest.json", Body=json.dumps(manifest))
+    if complete:
+        client.put_object(Bucket=BUCKET, Key=f"{MANIFEST_PREFIX}{delivery}/manifest.checksum", Body=b"abc")
+
+
+def read_index(client) -> dict:
+    return json.loads(client.get_object(Bucket=BUCKET, Key=INDEX_KEY)["Body"].read())
+
+
+def test_no_inventory_yet(s3_client):
+    assert find_latest_manifest(s3_client, BUCKET) is None
+    assert update_index(s3_client, BUCKET) == {"status": "no inventory"}
+
+
+def test_update_index(s3_client):
+    deliver(s3_client, "2024-10-04T01-00Z")
+    deliver(s3_client, "2024-10-05T01-00Z")
+    s3_client.put_object(Bucket=BUCKET, Key=f"{MANIFEST_PREFIX}hive/dt=2024-10-05-01-00/symlink.txt", Body=b"")
+
+    manifest_key = f"{MANIFEST_PREFIX}2024-10-05T01-00Z/manifest.json"
+    assert update_index(s3_client, BUCKET) == {"status": "updated", "manifest": manifest_key}
+    index = read_index(s3_client)
+    assert index["manifest"] == manifest_key
+    assert index["format"] == "Parquet"
+    assert index["files"] == [{"key": f"{MANIFEST_PREFIX}data/2024-10-05T01-00Z.parquet", "size": 1234}]
+    assert s3_client.head_object(Bucket=BUCKET, Key=INDEX_KEY)["ContentType"] == "application/json"
+
+    assert update_index(s3_client, BUCKET) == {"status": "unchanged", "manifest": manifest_key}
+
+
+def test_incomplete_delivery_is_skipped(s3_client):
+    deliver(s3_client, "2024-10-04T01-00Z")
+    deliver(s3_client, "2024-10-05T01-00Z", complete=False)
+
+    assert find_latest_manifest(s3_client, BUCKET) == f"{MANIFEST_PREFIX}2024-10-04T01-00Z/manifest.json"
+
+
+def test_one_failing_bucket_does_not_stop_the_others(s3_client):
+    # hub-b's latest delivery has a malformed manifest, and missing-hub doesn't exist
+    s3_client.create_bucket(Bucket="hub-b")
+    delivery = f"{get_manifest_prefix('hub-b')}2024-10-05T01-00Z/"
+    s3_client.put_object(Bucket="hub-b", Key=f"{delivery}manifest.json", Body=json.dumps({"sourceBucket": "hub-b"}))
+    s3_client.put_object(Bucket="hub-b", Key=f"{delivery}manifest.checksum", Body=b"abc")
+    deliver(s3_client, "2024-10-05T01-00Z")
+
+    with pytest.raises(RuntimeError, match=r"2 buckets: \['missing-hub', 'hub-b'\]"):
+        lambda_handler({"buckets": ["missing-hub", "hub-b", BUCKET]}, None)
+
+    # the buckets after the failing ones are still updated
+    assert read_index(s3_client)["manifest"] == f"{MANIFEST_PREFIX}2024-10-05T01-00Z/manifest.json"
@@ -0,0 +1,137 @@
+import json
+
+import pytest
+
+from hubverse_infrastructure.shared.compute_profiles import load_compute_profiles
+from hubverse_infrastructure.shared.monitoring import (
+    MonitoringSettings,
+    get_monitored_queue_names,
+    load_monitoring_settings,
+)
+from hubverse_infrastructure.shared.sharding import ShardSettings
+from tests.conftest import make_hub
+
+ALARM = "aws:cloudwatch/metricAlarm:MetricAlarm"
+DASHBOARD = "aws:cloudwatch/dashboard:Dashboard"
+LOG_GROUP = "aws:cloudwatch/logGroup:LogGroup"
+METRIC_FILTER = "aws:cloudwatch/logMetricFilter:LogMetricFilter"
+SUBSCRIPTION = "aws:sns/topicSubscription:TopicSubscription"
+
+
+def test_no_monitoring_by_default(run_program):
+    mocks = run_program([make_hub("hub-a")])
+    assert mocks.resources_of_type(ALARM) == {}
+    assert mocks.resources_of_type(DASHBOARD) == {}
+
+
+def test_transform_alarms(run_program):
+    profiles = {"large": {"memory_size": 4096, "reserved_concurrency": 20}}
+    monitoring = {"duration_p99_threshold": 0.9, "errors_threshold": 5, "alarm_emails": ["alerts@example.com"]}
+    mocks = run_program([make_hub("hub-a")], compute_profiles=profiles, monitoring=monitoring)
+
+    alarms = mocks.resources_of_type(ALARM)
+    p99 = alarms["hubverse-transform-model-output-duration-p99"]
+    assert (p99["metricName"], p99["extendedStatistic"], p99["threshold"]) == ("Duration", "p99", 540000)
+    assert p99["dimensions"] == {"FunctionName": "hubverse-transform-model-output"}
+    assert p99["alarmActions"] == ["arn:mock:hubverse-transform-alarms"]
+    assert alarms["hubverse-transform-model-output-duration-p50"]["threshold"] == 300000
+    assert alarms["hubverse-transform-model-output-errors"]["threshold"] == 5
+    assert alarms["hubverse-transform-model-output-throttles"]["threshold"] == 0
+    # 90% of the account's concurrency, or of the profile's reserved concurrency
+    assert alarms["hubverse-transform-model-output-concurrency"]["threshold"] == 900
+    assert alarms["hubverse-transform-model-output-large-concurrency"]["threshold"] == 18
+    assert not any(name.endswith("-age") for name in alarms)
+
+    assert [subscription["endpoint"] for subscription in mocks.resources_of_type(SUBSCRIPTION).values()] == [
+        "alerts@example.com"
+    ]
+
+
+def test_log_retention_and_processing_time(run_program):
+    mocks = run_program([make_hub("hub-a")], monitoring={"log_retention_days": 14})
+
+    log_group = mocks.resources_of_type(LOG_GROUP)["hubverse-transform-model-output-logs"]
+    assert log_group["name"] == "/aws/lambda/hubverse-transform-model-output"
+    assert log_group["retentionInDays"] == 14
+    metric_filter = mocks.resources_of_type(METRIC_FILTER)["hubverse-transform-model-output-processing-time"]
+    assert metric_filter["metricTransformation"]["value"] == "$.processing_time_ms"
+    assert metric_filter["metricTransformation"]["dimensions"] == {"hub": "$.hub"}
+
+
+def test_queue_age_alarms(run_program):
+    hubs = [
+        make_hub("hub-a", transform_trigger={"type": "queue"}),
+        make_hub("hub-b", transform_trigger={"type": "queue", "shared": True}),
+        make_hub("hub-c"),
+    ]
+    mocks = run_program(hubs, monitoring={"queue_age_threshold_seconds": 600})
+
+    alarms = mocks.resources_of_type(ALARM)
+    age_alarms = {name: alarm for name, alarm in alarms.items() if name.endswith("-age")}
+    assert sorted(age_alarms) == ["hubverse-transform-hub-a-age", "hubverse-transform-model-output-age"]
+    assert age_alarms["hubverse-transform-hub-a-age"]["dimensions"] == {"QueueName": "hubverse-transform-hub-a"}
+    assert age_alarms["hubverse-transform-hub-a-age"]["threshold"] == 600
+
+    dashboard = json.loads(mocks.resources_of_type(DASHBOARD)["hubverse-transform"]["dashboardBody"])
+    queue_widget = dashboard["widgets"][-1]["properties"]
+    assert [metric[3] for metric in queue_widget["metrics"]] == [
+        "hubverse-transform-hub-a",
+        "hubverse-transform-model-output",
+    ]
+
+
+def test_monitoring_in_shared_stack_only(run_program):
+    hubs = [make_hub("hub-a", transform_trigger={"type": "queue"})]
+    shared = run_program(hubs, shard_settings=ShardSettings(count=2, shard="shared"), monitoring={})
+    assert "hubverse-transform-hub-a-age" in shared.resources_of_type(ALARM)
+
+    shared_stack = "hubverse/hubverse-aws/hubverse-shared"
+    transform = {"id": "transform", "name": "transform", "arn": "arn:shared:transform"}
+    shared_outputs = {
+        "transform_role": {"id": "transform-role", "name": "transform-role", "arn": "arn:shared:transform-role"},
+        "transform_functions": {"default": {"function": transform, "alias": None}},
+        "shared_queues": {},
+        "event_rules": {},
+    }
+    shard = run_program(
+        hubs,
+        shard_settings=ShardSettings(count=1, shard="0", shared_stack=shared_stack),
+        stack_outputs={shared_stack: {"shared_infrastructure": shared_outputs}},
+        monitoring={},
+    )
+    assert shard.resources_of_type(ALARM) == {}
+
+
+def test_monitored_queue_names():
+    profiles = load_compute_profiles({"large": {}})
+    hubs = [
+        make_hub("hub-a", transform_trigger={"type": "queue"}),
+        make_hub("hub-b", transform_trigger={"type": "queue", "shared": True}, compute_profile="large"),
+        {**make_hub("hub-c"), "event_filters": {"remove_route": "shared_queue"}},
+    ]
+    assert get_monitored_queue_names(hubs, profiles) == [
+        "hubverse-transform-hub-a",
+        "hubverse-transform-model-output",
+        "hubverse-transform-model-output-large",
+    ]
+
+
+def test_default_monitoring_settings():
+    assert load_monitoring_settings(None) is None
+    assert load_monitoring_settings({}) == MonitoringSettings()
+
+
+@pytest.mark.parametrize(
+    "config, message",
+    [
+        ({"log_retention_days": 10}, "monitoring: log_retention_days must be one of"),
+        ({"duration_p99_threshold": 1.5}, "monitoring: duration_p99_threshold must be a fraction between 0 and 1"),
+        ({"duration_p50_threshold": 0.9}, "monitoring: duration_p50_threshold can't be more than"),
+        ({"errors_threshold": -1}, "monitoring: throttles_threshold and errors_threshold can't be negative"),
+        ({"queue_age_threshold_seconds": 30}, "monitoring: queue_age_threshold_seconds must be at least 60"),
+        ({"p99": 0.8}, r"monitoring: unknown settings: \['p99'\]"),
+    ],
+)
+def test_invalid_monitoring_settings(config, message):
+    with pytest.raises(ValueError, match=message):
+        load_monitoring_settings(config)
@@ -0,0 +1,234 @@
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import pulumi_aws as aws
+import pytest
+
+from hubverse_infrastructure.hubs.iam import create_bucket_write_policy_document, create_trust_policy
+from hubverse_infrastructure.hubs.s3 import create_public_read_policy_document
+from hubverse_infrastructure.shared.hubverse_transforms import (
+    create_asset_bucket_policy_document,
+    create_cloudwatch_write_policy_document,
+    create_lambda_role_policy_document,
+)
+from hubverse_infrastructure.shared.policy_document import Condition, PolicyDocument, Principal, Statement
+
+# The golden files pin the byte-for-byte JSON that the builder writes (which decides whether a
+# deployment sees a policy diff). They were written by the builder, not by the provider's
+# get_policy_document invoke (which needs the AWS provider plugin), so test_golden_files_match_baseline
+# checks them against the statements that the baseline code passed to that invoke.
+GOLDEN_DIR = Path(__file__).parent / "golden"
+
+OIDC_ARN = "arn:aws:iam::123456789012:oidc-provider/token.actions.githubusercontent.com"
+OIDC_URL = "token.actions.githubusercontent.com"
+
+# The get_policy_document statements of the baseline code, for the values used in the golden files
+BASELINE_STATEMENTS = {
+    "github_trust_policy.json": [
+        aws.iam.GetPolicyDocumentStatementArgs(
+            actions=["sts:AssumeRoleWithWebIdentity"],
+            principals=[aws.iam.GetPolicyDocumentStatementPrincipalArgs(type="Federated", identifiers=[OIDC_ARN])],
+            conditions=[
+                aws.iam.GetPolicyDocumentStatementConditionArgs(
+                    test="StringEquals", variable=f"{OIDC_URL}:aud", values=["sts.amazonaws.com"]
+                ),
+                aws.iam.GetPolicyDocumentStatementConditionArgs(
+                    test="StringEquals",
+                    variable=f"{OIDC_URL}:sub",
+                    values=["repo:hubverse-org/example-hub:ref:refs/heads/main"],
+                ),
+            ],
+        )
+    ],
+    "bucket_write_policy.json": [
+        aws.iam.GetPolicyDocumentStatementArgs(actions=["s3:ListBucket"], resources=["arn:aws:s3:::example-hub"]),
+        aws.iam.GetPolicyDocumentStatementArgs(
+            actions=["s3:PutObject", "s3:PutObjectAcl", "s3:GetObject", "s3:GetObjectAcl", "s3:DeleteObject"],
+            resources=["arn:aws:s3:::example-hub/*"],
+        ),
+    ],
+    "public_read_policy.json": [
+        aws.iam.GetPolicyDocumentStatementArgs(
+            sid="PublicReadGetObject",
+            actions=["s3:GetObject"],
+            principals=[aws.iam.GetPolicyDocumentStatementPrincipalArgs(type="*", identifiers=["*"])],
+            resources=["arn:aws:s3:::example-hub/*"],
+        ),
+        aws.iam.GetPolicyDocumentStatementArgs(
+            sid="PublicListBucket",
+            actions=["s3:ListBucket"],
+            principals=[aws.iam.GetPolicyDocumentStatementPrincipalArgs(type="*", identifiers=["*"])],
+            resources=["arn:aws:s3:::example-hub"],
+        ),
+    ],
+    "asset_bucket_policy.json": [
+        aws.iam.GetPolicyDocumentStatementArgs(
+            sid="ReadAssetBucket",
+            actions=["s3:GetObject", "s3:GetObjectAcl"],
+            principals=[
+                aws.iam.GetPolicyDocumentStatementPrincipalArgs(type="Service", identifiers=["lambda.amazonaws.com"])
+            ],
+            resources=["arn:aws:s3:::hubverse-assets/*"],
+        ),
+        aws.iam.GetPolicyDocumentStatementArgs(
+            sid="ListAssetBucket",
+            actions=["s3:ListBucket"],
+            principals=[
+                aws.iam.GetPolicyDocumentStatementPrincipalArgs(type="Service", identifiers=["lambda.amazonaws.com"])
+            ],
+            resources=["arn:aws:s3:::hubverse-assets"],
+        ),
+    ],
+    "cloudwatch_write_policy.json": [
+        aws.iam.GetPolicyDocumentStatementArgs(
+            actions=["logs:PutLogEvents", "logs:CreateLogGroup", "logs:CreateLogStream"],
+            resources=["arn:aws:logs:*:*:*"],
+        ),
+    ],
+    "lambda_role_policy.json": [
+        aws.iam.GetPolicyDocumentStatementArgs(
+            effect="Allow",
+            principals=[
+                aws.iam.GetPolicyDocumentStatementPrincipalArgs(type="Service", identifiers=["lambda.amazonaws.com"])
+            ],
+            actions=["sts:AssumeRole"],
+            conditions=[
+                aws.iam.GetPolicyDocumentStatementConditionArgs(
+                    test="StringEquals",
+                    variable="aws:SourceArn",
+                    values=["arn:aws:lambda:us-east-1:123456789012:function:hubverse-transform-model-output"],
+                ),
+            ],
+        )
+    ],
+}
+
+
+def read_golden(file_name: str) -> str:
+    return (GOLDEN_DIR / file_name).read_text()
+
+
+def as_list(value) -> list:
+    return sorted(value) if isinstance(value, list) else [value]
+
+
+def canonical_statement(statement: dict) -> dict:
+    """Return an IAM policy statement in a form that doesn't depend on how its values are written."""
+    canonical: dict = {"Sid": statement.get("Sid", ""), "Effect": statement["Effect"]}
+    for key in ["Action", "Resource"]:
+        if key in statement:
+            canonical[key] = as_list(statement[key])
+    if "Principal" in statement:
+        principal = statement["Principal"]
+        canonical["Principal"] = (
+            "*" if principal == "*" else {kind: as_list(identifiers) for kind, identifiers in principal.items()}
+        )
+    if "Condition" in statement:
+        canonical["Condition"] = {
+            test: {variable: as_list(values) for variable, values in variables.items()}
+            for test, variables in statement["Condition"].items()
+        }
+    return canonical
+
+
+def baseline_statement(args: aws.iam.GetPolicyDocumentStatementArgs) -> dict:
+    """Return the canonical form of a get_policy_document statement (see canonical_statement)."""
+    canonical: dict = {"Sid": args.sid or "", "Effect": args.effect or "Allow"}
+    if args.actions:
+        canonical["Action"] = sorted(set(args.actions))
+    if args.resources:
+        canonical["Resource"] = sorted(set(args.resources))
+    if args.principals:
+        # get_policy_document writes the "*" principal type as "Principal": "*"
+        if [(principal.type, principal.identifiers) for principal in args.principals] == [("*", ["*"])]:
+            canonical["Principal"] = "*"
+        else:
+            principals: dict = {}
+            for principal in args.principals:
+                principals.setdefault(principal.type, set()).update(principal.identifiers)
+            canonical["Principal"] = {kind: sorted(identifiers) for kind, identifiers in principals.items()}
+    if args.conditions:
+        conditions: dict = {}
+        for condition in args.conditions:
+            conditions.setdefault(condition.test, {}).setdefault(condition.variable, set()).update(condition.values)
+        canonical["Condition"] = {
+            test: {variable: sorted(values) for variable, values in variables.items()}
+            for test, variables in conditions.items()
+        }
+    return canonical
+
+
+@pytest.mark.parametrize(
+    "file_name, policy_json",
+    [
+        (
+            "github_trust_policy.json",
+            create_trust_policy(
+                "hubverse-org",
+                "example-hub",
+                SimpleNamespace(arn=OIDC_ARN, url=OIDC_URL),  # type: ignore[arg-type]
+            ),
+        ),
+        ("bucket_write_policy.json", create_bucket_write_policy_document("example-hub").json),
+        ("public_read_policy.json", create_public_read_policy_document("example-hub").json),
+        ("asset_bucket_policy.json", create_asset_bucket_policy_document("hubverse-assets").json),
+        ("cloudwatch_write_policy.json", create_cloudwatch_write_policy_document().json),
+        (
+            "lambda_role_policy.json",
+            create_lambda_role_policy_document(["hubverse-transform-model-output"], "us-east-1", "123456789012").json,
+        ),
+    ],
+)
+def test_policy_documents_match_golden_files(file_name, policy_json):
+    assert policy_json == read_golden(file_name)
+
+
+@pytest.mark.parametrize("file_name", BASELINE_STATEMENTS)
+def test_golden_files_match_baseline(file_name):
+    golden = json.loads(read_golden(file_name))
+    assert golden["Version"] == "2012-10-17"
+    assert [canonical_statement(statement) for statement in golden["Statement"]] == [
+        baseline_statement(statement) for statement in BASELINE_STATEMENTS[file_name]
+    ]
+
+
+def test_minified_json():
+    document = PolicyDocument(statements=[Statement(actions=["s3:GetObject"], resources=["arn:aws:s3:::hub/*"])])
+    assert document.minified_json == (
+        '{"Version":"2012-10-17","Statement":[{"Effect":"Allow","Action":"s3:GetObject","Resource":"arn:aws:s3:::hub/*"}]}'
+    )
+
+
+def test_string_sets_are_deduplicated_and_reverse_sorted():
+    statement = Statement(actions=["s3:GetObject", "s3:ListBucket", "s3:GetObject"])
+    assert statement.to_dict()["Action"] == ["s3:ListBucket", "s3:GetObject"]
+
+
+def test_principals_grouped_by_type():
+    statement = Statement(
+        principals=[
+            Principal(type="Service", identifiers=["lambda.amazonaws.com"]),
+            Principal(type="AWS", identifiers=["arn:aws:iam::123456789012:root"]),
+            Principal(type="Service", identifiers=["s3.amazonaws.com"]),
+        ]
+    )
+    assert statement.to_dict()["Principal"] == {
+        "AWS": "arn:aws:iam::123456789012:root",
+        "Service": ["s3.amazonaws.com", "lambda.amazonaws.com"],
+    }
+
+
+def test_conditions_grouped_by_test_and_variable():
+    statement = Statement(
+        conditions=[
+            Condition(test="StringLike", variable="s3:prefix", values=["raw/*"]),
+            Condition(test="StringEquals", variable="aws:SourceAccount", values=["123456789012"]),
+        ]
+    )
+    assert list(statement.to_dict()["Condition"]) == ["StringEquals", "StringLike"]
+
+
+def test_html_characters_escaped_like_the_provider():
+    document = PolicyDocument(statements=[Statement(sid="", resources=["arn:aws:s3:::a<b>&c"])])
+    assert "arn:aws:s3:::a\\u003cb\\u003e\\u0026c" in document.json
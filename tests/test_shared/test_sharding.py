@@ -0,0 +1,145 @@
+from collections import Counter
+
+import pytest
+
+from hubverse_infrastructure.shared import shard_driver
+from hubverse_infrastructure.shared.sharding import ShardSettings, get_hub_shard, get_shard_hubs
+from tests.conftest import make_hub
+
+BUCKET = "aws:s3/bucket:Bucket"
+FUNCTION = "aws:lambda/function:Function"
+QUEUE = "aws:sqs/queue:Queue"
+ROLE_POLICY = "aws:iam/rolePolicy:RolePolicy"
+LAMBDA_PERMISSION = "aws:lambda/permission:Permission"
+BUCKET_NOTIFICATION = "aws:s3/bucketNotification:BucketNotification"
+STACK_REFERENCE = "pulumi:pulumi:StackReference"
+
+SHARED_STACK = "hubverse/hubverse-aws/hubverse-shared"
+# the shared_infrastructure output of a shared stack
+SHARED_OUTPUTS = {
+    "shared_infrastructure": {
+        "transform_role": {"id": "transform-role", "name": "transform-role", "arn": "arn:shared:transform-role"},
+        "transform_functions": {
+            "default": {
+                "function": {"id": "transform", "name": "transform", "arn": "arn:shared:transform"},
+                "alias": None,
+            }
+        },
+        "shared_queues": {"default": {"id": "transform-queue", "arn": "arn:shared:transform-queue"}},
+        "event_rules": {},
+    }
+}
+
+
+def test_hub_shards_are_stable():
+    hubs = [make_hub(f"hub-{i}") for i in range(200)]
+    shards = [get_hub_shard(hub, 4) for hub in hubs]
+    assert shards == [get_hub_shard(hub, 4) for hub in hubs]
+    # every shard gets some hubs
+    assert set(Counter(shards)) == {0, 1, 2, 3}
+
+
+def test_explicit_shard():
+    assert get_hub_shard(make_hub("hub-a", shard=3), 4) == 3
+    with pytest.raises(ValueError, match="hub-a: shard must be a number from 0 to 3, got '4'"):
+        get_hub_shard(make_hub("hub-a", shard=4), 4)
+
+
+def test_every_hub_is_in_one_shard():
+    hubs = [make_hub(f"hub-{i}") for i in range(50)]
+    shard_hubs = [get_shard_hubs(hubs, ShardSettings(3, str(shard), SHARED_STACK)) for shard in range(3)]
+    assert sorted(hub["hub"] for hubs in shard_hubs for hub in hubs) == sorted(hub["hub"] for hub in hubs)
+
+
+@pytest.mark.parametrize(
+    "settings, message",
+    [
+        ({"count": 0, "shard": "shared"}, "shards must be at least 1, got 0"),
+        ({"count": 2, "shard": "2", "shared_stack": SHARED_STACK}, "a number from 0 to 1, got '2'"),
+        ({"count": 2, "shard": "0"}, "hub shards need the name of the shared stack"),
+    ],
+)
+def test_invalid_shard_settings(settings, message):
+    with pytest.raises(ValueError, match=message):
+        ShardSettings(**settings)
+
+
+def test_shared_stack(run_program):
+    hubs = [make_hub("hub-a"), make_hub("hub-b", transform_trigger={"type": "queue", "shared": True})]
+    mocks = run_program(hubs, shard_settings=ShardSettings(count=2, shard="shared"))
+
+    # the shared resources, including the shared queue for hub-b, but none of the hubs' resources
+    assert list(mocks.resources_of_type(FUNCTION)) == ["hubverse-transform-model-output"]
+    assert set(mocks.resources_of_type(QUEUE)) == {
+        "hubverse-transform-model-output",
+        "hubverse-transform-model-output-dlq",
+    }
+    assert list(mocks.resources_of_type(ROLE_POLICY)) == ["hubverse-transform-model-output-consumer-policy"]
+    assert mocks.resources_of_type(BUCKET) == {}
+
+
+def test_hub_shard(run_program):
+    hubs = [make_hub("hub-a", shard=0), make_hub("hub-b", shard=1, transform_trigger={"type": "queue", "shared": True})]
+    settings = ShardSettings(count=2, shard="1", shared_stack=SHARED_STACK)
+    mocks = run_program(hubs, shard_settings=settings, stack_outputs={SHARED_STACK: SHARED_OUTPUTS})
+
+    assert list(mocks.resources_of_type(STACK_REFERENCE)) == [SHARED_STACK]
+    # only this shard's hubs, which use the shared stack's resources
+    assert list(mocks.resources_of_type(BUCKET)) == ["hub-b"]
+    assert mocks.resources_of_type(FUNCTION) == {}
+    assert mocks.resources_of_type(QUEUE) == {}
+    assert mocks.resources_of_type(ROLE_POLICY) == {}
+    notification = mocks.resources_of_type(BUCKET_NOTIFICATION)["hub-b-create-notification"]
+    assert notification["queues"][0]["queueArn"] == "arn:shared:transform-queue"
+
+
+def test_hub_shard_lambda_trigger(run_program):
+    settings = ShardSettings(count=1, shard="0", shared_stack=SHARED_STACK)
+    mocks = run_program([make_hub("hub-a")], shard_settings=settings, stack_outputs={SHARED_STACK: SHARED_OUTPUTS})
+
+    assert mocks.resources_of_type(LAMBDA_PERMISSION)["hub-a-allow"]["function"] == "arn:shared:transform"
+
+
+def fake_runner(stack_name: str, operation: str, config: dict) -> dict:
+    """A stand-in for run_stack (a module-level function, so that it can run in another process)."""
+    if "broken" in stack_name or config["hubverse-aws:shard"] == "2":
+        raise RuntimeError("conflict: another update is in progress")
+    return {
+        "stack": stack_name,
+        "operation": operation,
+        "succeeded": True,
+        "changes": {"create": 1, "same": int(config["hubverse-aws:shards"])},
+        "seconds": 1.0,
+        "config": config,
+    }
+
+
+def test_run_shards():
+    summary = shard_driver.run_shards("preview", "hubverse", 3, max_workers=2, runner=fake_runner)
+
+    stacks = [result["stack"] for result in summary["stacks"]]
+    assert stacks == [f"hubverse/hubverse-aws/hubverse-{shard}" for shard in ("shared", "0", "1", "2")]
+    assert summary["stacks"][0]["config"] == {
+        "hubverse-aws:shards": "3",
+        "hubverse-aws:shard": "shared",
+        "aws:region": "us-east-1",
+    }
+    assert summary["stacks"][1]["config"]["hubverse-aws:shared_stack"] == SHARED_STACK
+
+    # a failed shard is reported without stopping the others
+    assert summary["stacks"][3] == {
+        "stack": "hubverse/hubverse-aws/hubverse-2",
+        "operation": "preview",
+        "succeeded": False,
+        "error": "conflict: another update is in progress",
+    }
+    assert not summary["succeeded"]
+    assert summary["changes"] == {"create": 3, "same": 9}
+    # the shared stack's time, plus the slowest shard's
+    assert summary["seconds"] == 2.0
+
+
+def test_shards_wait_for_the_shared_stack():
+    summary = shard_driver.run_shards("up", "hubverse", 2, prefix="broken", runner=fake_runner)
+    assert [result["stack"] for result in summary["stacks"]] == ["hubverse/hubverse-aws/broken-shared"]
+    assert not summary["succeeded"]
@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from hubverse_infrastructure.shared.transform_events import create_transform_event_pattern
+from tests.conftest import make_hub
+
+BUCKET_NOTIFICATION = "aws:s3/bucketNotification:BucketNotification"
+EVENT_RULE = "aws:cloudwatch/eventRule:EventRule"
+EVENT_TARGET = "aws:cloudwatch/eventTarget:EventTarget"
+LAMBDA_PERMISSION = "aws:lambda/permission:Permission"
+
+
+def matches(pattern: dict, event: dict) -> bool:
+    """Return whether an event matches an EventBridge pattern (with the exact and prefix filters that rules use)."""
+    for key, expected in pattern.items():
+        if key not in event:
+            return False
+        if isinstance(expected, dict):
+            if not matches(expected, event[key]):
+                return False
+        elif not any(
+            event[key].startswith(value["prefix"]) if isinstance(value, dict) else event[key] == value
+            for value in expected
+        ):
+            return False
+    return True
+
+
+def object_event(bucket: str, key: str) -> dict:
+    return {
+        "source": "aws.s3",
+        "detail-type": "Object Created",
+        "detail": {"bucket": {"name": bucket}, "object": {"key": key}},
+    }
+
+
+def test_event_pattern():
+    pattern = json.loads(create_transform_event_pattern(["hub-b", "hub-a"]))
+    assert pattern["source"] == ["aws.s3"]
+    assert pattern["detail-type"] == ["Object Created", "Object Deleted"]
+    assert pattern["detail"] == {"bucket": {"name": ["hub-a", "hub-b"]}, "object": {"key": [{"prefix": "raw/"}]}}
+
+
+def test_rule_only_matches_hub_buckets(run_program):
+    mocks = run_program([make_hub("hub-a", transform_trigger={"type": "eventbridge"}), make_hub("hub-b")])
+    pattern = json.loads(mocks.resources_of_type(EVENT_RULE)["hubverse-transform-model-output-events"]["eventPattern"])
+
+    assert matches(pattern, object_event("hub-a", "raw/model-output/team-a/2024-10-05-team-a-model.csv"))
+    assert not matches(pattern, object_event("hub-a", "model-output/team-a/2024-10-05-team-a-model.parquet"))
+    # other buckets in the account, including hubs that don't use EventBridge mode
+    assert not matches(pattern, object_event("hub-b", "raw/model-output/team-a/2024-10-05-team-a-model.csv"))
+    assert not matches(pattern, object_event("some-other-bucket", "raw/data.csv"))
+
+
+def test_no_rule_without_eventbridge_hubs(run_program):
+    mocks = run_program([make_hub("hub-a", transform_trigger={"type": "lambda"})])
+    assert mocks.resources_of_type(EVENT_RULE) == {}
+    assert mocks.resources_of_type(EVENT_TARGET) == {}
+
+
+def test_eventbridge_triggers_do_not_grow_with_hubs(run_program):
+    hub_count = 50
+    mocks = run_program([make_hub(f"hub-{i}", transform_trigger={"type": "eventbridge"}) for i in range(hub_count)])
+
+    rules = mocks.resources_of_type(EVENT_RULE)
+    assert list(rules) == ["hubverse-transform-model-output-events"]
+    targets = mocks.resources_of_type(EVENT_TARGET)
+    assert len(targets) == 1
+    assert next(iter(targets.values()))["arn"] == "arn:mock:hubverse-transform-model-output"
+
+    # one permission for EventBridge instead of one per hub bucket
+    permissions = mocks.resources_of_type(LAMBDA_PERMISSION)
+    assert list(permissions) == ["hubverse-transform-model-output-events-allow"]
+    assert permissions["hubverse-transform-model-output-events-allow"]["principal"] == "events.amazonaws.com"
+
+    notifications = mocks.resources_of_type(BUCKET_NOTIFICATION)
+    assert len(notifications) == hub_count
+    for notification in notifications.values():
+        assert notification["eventbridge"] is True
+        assert "lambdaFunctions" not in notification
+
+
+def test_eventbridge_trigger_rejects_settings(run_program):
+    hub = make_hub("hub-a", transform_trigger={"type": "eventbridge"})
+    hub["transform_trigger"]["batch_size"] = 10
+    with pytest.raises(ValueError, match="hub-a: the eventbridge transform_trigger does not accept other settings"):
+        run_program([hub])
+
+
+def test_unknown_trigger_type(run_program):
+    with pytest.raises(ValueError, match="hub-a: unknown transform_trigger type 'carrier-pigeon'"):
+        run_program([make_hub("hub-a", transform_trigger={"type": "carrier-pigeon"})])
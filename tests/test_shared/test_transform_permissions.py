@@ -0,0 +1,131 @@
+import json
+
+import pytest
+
+from hubverse_infrastructure.shared.transform_permissions import (
+    MAX_CONSOLIDATED_POLICIES,
+    MAX_POLICY_SIZE,
+    MAX_ROLE_POLICY_ATTACHMENTS,
+    create_buckets_policy_document,
+    create_transform_access_statement,
+    get_permissions_mode,
+    group_buckets,
+)
+from tests.conftest import make_hub
+
+POLICY = "aws:iam/policy:Policy"
+ROLE_POLICY_ATTACHMENT = "aws:iam/rolePolicyAttachment:RolePolicyAttachment"
+LAMBDA_ROLE = "hubverse-transform-model-output-role"
+
+
+def make_hubs(hub_count: int) -> list[dict]:
+    return [make_hub(f"example-hub-{i:04d}") for i in range(hub_count)]
+
+
+def lambda_role_attachments(mocks) -> dict[str, dict]:
+    return {
+        name: attachment
+        for name, attachment in mocks.resources_of_type(ROLE_POLICY_ATTACHMENT).items()
+        if attachment["role"] == LAMBDA_ROLE
+    }
+
+
+def test_get_permissions_mode():
+    assert get_permissions_mode(None) == "bucket-policy"
+    assert get_permissions_mode("consolidated") == "consolidated"
+    with pytest.raises(ValueError, match="transform_permissions must be one of"):
+        get_permissions_mode("wildcard")
+
+
+def test_buckets_policy_document():
+    document = json.loads(create_buckets_policy_document(["hub-a", "hub-b"]).json)
+    (statement,) = document["Statement"]
+    assert "s3:PutObject" in statement["Action"]
+    assert sorted(statement["Resource"]) == [
+        "arn:aws:s3:::hub-a",
+        "arn:aws:s3:::hub-a/*",
+        "arn:aws:s3:::hub-b",
+        "arn:aws:s3:::hub-b/*",
+    ]
+
+
+def test_transform_access_statement():
+    statement = create_transform_access_statement("hub-a", "arn:aws:iam::123456789012:role/transform").to_dict()
+    assert statement["Principal"] == {"AWS": "arn:aws:iam::123456789012:role/transform"}
+    assert sorted(statement["Resource"]) == ["arn:aws:s3:::hub-a", "arn:aws:s3:::hub-a/*"]
+    assert "s3:PutObject" in statement["Action"]
+
+
+def test_group_buckets_fits_policy_size_limit():
+    bucket_names = [hub["hub"] for hub in make_hubs(500)]
+    groups = group_buckets(bucket_names)
+
+    assert [name for group in groups for name in group] == bucket_names
+    for group in groups:
+        assert len(create_buckets_policy_document(group).minified_json) <= MAX_POLICY_SIZE
+
+
+def test_group_buckets_adding_a_bucket_only_changes_the_last_group():
+    bucket_names = [hub["hub"] for hub in make_hubs(200)]
+    groups = group_buckets(bucket_names)
+    new_groups = group_buckets(bucket_names + ["new-hub"])
+    assert new_groups[:-1] == groups[:-1]
+
+
+def test_group_buckets_too_many_buckets():
+    bucket_names = [f"a-very-long-hub-bucket-name-for-testing-{i:05d}" for i in range(2000)]
+    with pytest.raises(ValueError, match=f"can only have {MAX_CONSOLIDATED_POLICIES} .*bucket-policy"):
+        group_buckets(bucket_names)
+
+
+@pytest.mark.parametrize("hub_count", [1, 120])
+def test_consolidated_permissions(run_program, hub_count):
+    mocks = run_program(make_hubs(hub_count), transform_permissions="consolidated")
+
+    # no per-hub attachments to the Lambda role, and the role stays under IAM's attachment limit
+    attachments = lambda_role_attachments(mocks)
+    assert not any(name.endswith("-transform-model-output-lambda") for name in attachments)
+    assert len(attachments) <= MAX_ROLE_POLICY_ATTACHMENTS
+
+    policies = {
+        name: json.loads(policy["policy"])
+        for name, policy in mocks.resources_of_type(POLICY).items()
+        if name.startswith("hubverse-transform-model-output-buckets-")
+    }
+    resources = {resource for policy in policies.values() for resource in policy["Statement"][0]["Resource"]}
+    for hub in make_hubs(hub_count):
+        assert f"arn:aws:s3:::{hub['hub']}" in resources
+        assert f"arn:aws:s3:::{hub['hub']}/*" in resources
+
+
+def test_per_hub_permissions(run_program):
+    mocks = run_program(make_hubs(3), transform_permissions="per-hub")
+
+    attachments = lambda_role_attachments(mocks)
+    assert sorted(name for name in attachments if name.endswith("-transform-model-output-lambda")) == [
+        "example-hub-0000-transform-model-output-lambda",
+        "example-hub-0001-transform-model-output-lambda",
+        "example-hub-0002-transform-model-output-lambda",
+    ]
+    assert not any(name.startswith("hubverse-transform-model-output-buckets-") for name in attachments)
+
+
+@pytest.mark.parametrize("hub_count", [1, 120])
+def test_bucket_policy_permissions(run_program, hub_count):
+    # bucket-policy is the default mode
+    mocks = run_program(make_hubs(hub_count))
+
+    # only the CloudWatch policy, whatever the number of hubs
+    attachments = lambda_role_attachments(mocks)
+    assert not any(name.startswith("hubverse-transform-model-output-buckets-") for name in attachments)
+    assert not any(name.endswith("-transform-model-output-lambda") for name in attachments)
+    assert len(attachments) == 1
+
+    # each hub bucket's policy grants the role access to that bucket
+    bucket_policies = mocks.resources_of_type("aws:s3/bucketPolicy:BucketPolicy")
+    for hub in make_hubs(hub_count):
+        assert f"{hub['hub']}-read-bucket-policy" in bucket_policies
+    policy = json.loads(bucket_policies["example-hub-0000-read-bucket-policy"]["policy"])
+    (statement,) = [statement for statement in policy["Statement"] if statement.get("Sid") == "AllowTransformLambda"]
+    assert statement["Principal"] == {"AWS": f"arn:mock:{LAMBDA_ROLE}"}
+    assert sorted(statement["Resource"]) == ["arn:aws:s3:::example-hub-0000", "arn:aws:s3:::example-hub-0000/*"]
@@ -0,0 +1,96 @@
+import json
+
+import pytest
+
+from hubverse_infrastructure.shared.transform_queue import QueueSettings, get_queue_settings
+from tests.conftest import make_hub
+
+QUEUE = "aws:sqs/queue:Queue"
+EVENT_SOURCE_MAPPING = "aws:lambda/eventSourceMapping:EventSourceMapping"
+BUCKET_NOTIFICATION = "aws:s3/bucketNotification:BucketNotification"
+LAMBDA_PERMISSION = "aws:lambda/permission:Permission"
+ROLE_POLICY = "aws:iam/rolePolicy:RolePolicy"
+
+
+def test_hubs_invoke_lambda_by_default(run_program):
+    mocks = run_program([make_hub("hub-a")])
+
+    assert mocks.resources_of_type(QUEUE) == {}
+    assert mocks.resources_of_type(ROLE_POLICY) == {}
+    assert "hub-a-allow" in mocks.resources_of_type(LAMBDA_PERMISSION)
+    notification = mocks.resources_of_type(BUCKET_NOTIFICATION)["hub-a-create-notification"]
+    assert "lambdaFunctions" in notification
+    assert "queues" not in notification
+
+
+def test_per_hub_queue(run_program):
+    trigger = {"type": "queue", "batch_size": 50, "batching_window_seconds": 60, "max_concurrency": 5}
+    mocks = run_program([make_hub("hub-a", transform_trigger=trigger)])
+
+    queues = mocks.resources_of_type(QUEUE)
+    assert set(queues) == {"hubverse-transform-hub-a", "hubverse-transform-hub-a-dlq"}
+    redrive_policy = json.loads(queues["hubverse-transform-hub-a"]["redrivePolicy"])
+    assert redrive_policy == {"deadLetterTargetArn": "arn:mock:hubverse-transform-hub-a-dlq", "maxReceiveCount": 5}
+
+    mapping = mocks.resources_of_type(EVENT_SOURCE_MAPPING)["hubverse-transform-hub-a-event-source"]
+    assert mapping["eventSourceArn"] == "arn:mock:hubverse-transform-hub-a"
+    assert mapping["functionName"] == "arn:mock:hubverse-transform-model-output"
+    assert mapping["batchSize"] == 50
+    assert mapping["maximumBatchingWindowInSeconds"] == 60
+    assert mapping["scalingConfig"] == {"maximumConcurrency": 5}
+
+    # events go to the queue rather than directly to the lambda
+    assert mocks.resources_of_type(LAMBDA_PERMISSION) == {}
+    notification = mocks.resources_of_type(BUCKET_NOTIFICATION)["hub-a-create-notification"]
+    assert notification["queues"][0]["queueArn"] == "arn:mock:hubverse-transform-hub-a"
+    assert notification["queues"][0]["filterPrefix"] == "raw/"
+
+
+def test_shared_queue_created_once(run_program):
+    hubs = [make_hub(f"hub-{i}", transform_trigger={"type": "queue", "shared": True}) for i in range(3)]
+    hubs.append(make_hub("direct-hub"))
+    mocks = run_program(hubs)
+
+    assert set(mocks.resources_of_type(QUEUE)) == {
+        "hubverse-transform-model-output",
+        "hubverse-transform-model-output-dlq",
+    }
+    assert len(mocks.resources_of_type(EVENT_SOURCE_MAPPING)) == 1
+    # one inline policy lets the lambda read from every transform queue
+    assert list(mocks.resources_of_type(ROLE_POLICY)) == ["hubverse-transform-model-output-consumer-policy"]
+
+    notifications = mocks.resources_of_type(BUCKET_NOTIFICATION)
+    for i in range(3):
+        queue_arn = notifications[f"hub-{i}-create-notification"]["queues"][0]["queueArn"]
+        assert queue_arn == "arn:mock:hubverse-transform-model-output"
+    assert "lambdaFunctions" in notifications["direct-hub-create-notification"]
+
+
+def test_get_queue_settings():
+    assert get_queue_settings(make_hub("hub-a")) is None
+    assert get_queue_settings(make_hub("hub-a", transform_trigger={"type": "lambda"})) is None
+    assert get_queue_settings(make_hub("hub-a", transform_trigger={"type": "eventbridge"})) is None
+    assert get_queue_settings(make_hub("hub-a", transform_trigger={"type": "queue", "shared": True})) == (
+        True,
+        QueueSettings(),
+    )
+    assert get_queue_settings(make_hub("hub-a", transform_trigger={"type": "queue", "batch_size": 100})) == (
+        False,
+        QueueSettings(batch_size=100),
+    )
+
+
+@pytest.mark.parametrize(
+    "trigger, message",
+    [
+        ({"type": "queue", "shared": True, "batch_size": 5}, "does not accept per-hub settings"),
+        ({"type": "queue", "batch": 5}, "unknown transform_trigger settings"),
+        ({"type": "queue", "batch_size": 0}, "batch_size must be between 1 and 10000"),
+        ({"type": "queue", "batch_size": 100, "batching_window_seconds": 0}, "must be at least 1"),
+        ({"type": "queue", "max_concurrency": 1}, "max_concurrency must be between 2 and 1000"),
+    ],
+)
+def test_get_queue_settings_invalid(trigger, message):
+    with pytest.raises(ValueError, match=message) as e:
+        get_queue_settings(make_hub("hub-a", transform_trigger=trigger))
+    assert str(e.value).startswith("hub-a: ")